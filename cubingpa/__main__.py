@@ -0,0 +1,4 @@
+from cubingpa import cli
+
+
+cli.main()
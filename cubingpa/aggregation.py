@@ -0,0 +1,389 @@
+from abc import ABC, abstractmethod
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from numpy.typing import NDArray
+from typing import Any, Dict, Optional, Sequence
+
+from cubingpa.curve_store import CurveStore
+from cubingpa.time_grid import TimeGrid
+
+
+class Aggregator(ABC):
+    """
+    Per-day aggregate of curves, updated each time a curve or a part of curve is produced.
+    Memory only depends on the number of days, not on the number of curves.
+
+    Days are the points of a time grid (see cubingpa.time_grid.TimeGrid): with a coarser grid
+    than the daily one, curves are only aggregated at the points of the grid.
+
+    Parameters
+    ----------
+    grid: TimeGrid, optional
+        Points at which curves are aggregated. Default: None, every day
+    """
+
+    def __init__(self, grid: Optional[TimeGrid] = None) -> None:
+        self._grid = grid if grid is not None else TimeGrid()
+        # in grid slots, i.e. days for the daily grid
+        self._first_day = 0
+        self._days_count = 0
+
+    @property
+    def grid(self) -> TimeGrid:
+        return self._grid
+
+    def add(self, start_day: int, values: NDArray[np.float64]) -> None:
+        """
+        Add values of a curve (or of a new part of a curve) at consecutive points of the grid to the aggregate
+
+        Parameters
+        ----------
+        start_day: int
+            Grid slot of the first value, i.e. number of days since 1970-01-01 for the daily grid
+        values: ndarray
+            One value per point
+        """
+        if len(values) == 0:
+            return
+
+        self._ensure_days(start_day, start_day + len(values))
+        self._add(start_day - self._first_day, values, 1)
+
+    def remove(self, start_day: int, values: NDArray[np.float64]) -> None:
+        """
+        Remove values previously added, when a curve is realigned
+
+        Parameters
+        ----------
+        start_day: int
+            Grid slot of the first value, as added
+        values: ndarray
+            One value per point, as added
+        """
+        if len(values) == 0:
+            return
+
+        self._add(start_day - self._first_day, values, -1)
+
+    def parameters(self) -> Dict[str, Any]:
+        """
+        JSON serializable parameters: aggregates with the same type and parameters can restore each other's state
+        """
+        return {'resolution': self._grid.resolution}
+
+    def state(self) -> Dict[str, NDArray[Any]]:
+        """
+        Aggregate content as arrays, see restore()
+        """
+        return {'first_day': np.array(self._first_day), 'days_count': np.array(self._days_count)}
+
+    def restore(self, state: Dict[str, NDArray[Any]]) -> None:
+        """
+        Restore aggregate content saved by state()
+        """
+        self._first_day = int(state['first_day'])
+        self._days_count = int(state['days_count'])
+
+    @abstractmethod
+    def to_dataframe(self) -> DataFrame:
+        """
+        Aggregate per day, for days having at least one value, with dates as an index
+        """
+
+    @abstractmethod
+    def _add(self, offset: int, values: NDArray[np.float64], sign: int) -> None:
+        """
+        Add (sign 1) or remove (sign -1) values
+        """
+
+    @abstractmethod
+    def _resize(self, before: int, after: int) -> None:
+        """
+        Add rows for before days at the beginning and after days at the end
+        """
+
+    def _ensure_days(self, start_day: int, end_day: int) -> None:
+        if self._days_count == 0:
+            self._first_day = start_day
+
+        before = max(self._first_day - start_day, 0)
+        after = max(end_day - (self._first_day + self._days_count), 0)
+
+        if before == 0 and after == 0:
+            return
+
+        # grow by at least the current size, so that a curve extended day after day
+        # doesn't trigger a reallocation each time
+        if before > 0:
+            before = max(before, self._days_count)
+        if after > 0:
+            after = max(after, self._days_count)
+
+        self._resize(before, after)
+        self._first_day -= before
+        self._days_count += before + after
+
+    def _dates_index(self, mask: NDArray[np.bool_]) -> pd.DatetimeIndex:
+        return self._grid.dates(self._first_day + np.flatnonzero(mask))
+
+
+class MeanAggregator(Aggregator):
+    """
+    Average of curves per day, from running sums and counts
+
+    Parameters
+    ----------
+    grid: TimeGrid, optional
+        Points at which curves are aggregated. Default: None, every day
+    """
+
+    def __init__(self, grid: Optional[TimeGrid] = None) -> None:
+        super().__init__(grid)
+        self._sums = np.zeros(0, dtype=np.float64)
+        self._counts = np.zeros(0, dtype=np.int64)
+
+    def _add(self, offset: int, values: NDArray[np.float64], sign: int) -> None:
+        self._sums[offset:offset + len(values)] += sign * values
+        self._counts[offset:offset + len(values)] += sign
+
+    def state(self) -> Dict[str, NDArray[Any]]:
+        return dict(super().state(), sums=self._sums, counts=self._counts)
+
+    def restore(self, state: Dict[str, NDArray[Any]]) -> None:
+        super().restore(state)
+        self._sums = state['sums']
+        self._counts = state['counts']
+
+    def _resize(self, before: int, after: int) -> None:
+        self._sums = np.pad(self._sums, (before, after))
+        self._counts = np.pad(self._counts, (before, after))
+
+    def to_dataframe(self) -> DataFrame:
+        """
+        Average per day, for days having at least one value
+
+        Returns
+        -------
+        Dataframe
+            Dataframe with dates as an index and an 'Average time' column
+        """
+        mask = self._counts > 0
+        averages = self._sums[mask] / self._counts[mask]
+
+        return pd.DataFrame({'Average time': averages}, index=self._dates_index(mask))
+
+
+DEFAULT_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+DEFAULT_BINS = 512
+
+
+class QuantileAggregator(Aggregator):
+    """
+    Approximate quantiles of curves per day, from a fixed-bin histogram per day.
+    Memory is days times bins, whatever the number of curves.
+
+    Bins are evenly spaced on a logarithmic scale between min_value and max_value,
+    so that the relative precision is the same for all values: (max_value / min_value) ** (1 / bins).
+    Values outside of the range are counted in the first or last bin.
+
+    Quantiles are ranked as DataFrame.quantile() does, values being assumed evenly spread within their bin.
+    This is close to DataFrame.quantile() when bins hold many values, i.e. on days with many curves.
+    On days with few curves, DataFrame.quantile() interpolates between distant values while the histogram
+    stays within the bins of these values: the error can then be a large part of the gap between two values
+    (ex: a median of about 40.3 for 40 and 50, instead of 45)
+
+    Parameters
+    ----------
+    min_value: float
+        Lowest expected value, strictly positive
+    max_value: float
+        Highest expected value
+    quantiles: Sequence[float], optional
+        Quantiles to compute, between 0 and 1. Default: 0.1, 0.25, 0.5, 0.75 and 0.9
+    bins: int, optional
+        Number of bins per day. Default: 512
+    grid: TimeGrid, optional
+        Points at which curves are aggregated. Default: None, every day
+    """
+
+    def __init__(self, min_value: float, max_value: float, quantiles: Sequence[float] = DEFAULT_QUANTILES, bins: int = DEFAULT_BINS,
+        grid: Optional[TimeGrid] = None) -> None:
+        super().__init__(grid)
+
+        if min_value <= 0 or max_value < min_value:
+            raise ValueError(f"Invalid values range: {min_value} - {max_value}")
+
+        self._log_min = float(np.log(min_value))
+        # a single value range still needs a non empty bin
+        self._log_width = max(float(np.log(max_value)) - self._log_min, 1e-9) / bins
+        self._bins = bins
+        self._quantiles = list(quantiles)
+        self._counts = np.zeros((0, bins), dtype=np.int32)
+
+    def _add(self, offset: int, values: NDArray[np.float64], sign: int) -> None:
+        bins = ((np.log(values) - self._log_min) / self._log_width).astype(np.int64)
+        np.clip(bins, 0, self._bins - 1, out=bins)
+        # one value per day: no duplicated cell
+        self._counts[offset + np.arange(len(values)), bins] += sign
+
+    def parameters(self) -> Dict[str, Any]:
+        return {**super().parameters(), 'log_min': self._log_min, 'log_width': self._log_width, 'bins': self._bins, 'quantiles': self._quantiles}
+
+    def state(self) -> Dict[str, NDArray[Any]]:
+        return dict(super().state(), counts=self._counts)
+
+    def restore(self, state: Dict[str, NDArray[Any]]) -> None:
+        super().restore(state)
+        self._counts = state['counts']
+
+    def _resize(self, before: int, after: int) -> None:
+        self._counts = np.pad(self._counts, ((before, after), (0, 0)))
+
+    def to_dataframe(self) -> DataFrame:
+        """
+        Quantiles per day, for days having at least one value
+
+        Returns
+        -------
+        Dataframe
+            Dataframe with dates as an index and one column per quantile, named after the percentile
+            (ex: 'p50' for the median)
+        """
+        totals = self._counts.sum(axis=1)
+        mask = totals > 0
+        counts = self._counts[mask]
+        totals = totals[mask]
+        cumulated = np.cumsum(counts, axis=1)
+
+        columns = {}
+        rows = np.arange(len(counts))
+        for quantile in self._quantiles:
+            # rank (from 0) of the quantile among the sorted values of the day, as pandas.DataFrame.quantile()
+            ranks = quantile * (totals - 1)
+            bins = np.minimum((cumulated <= ranks[:, np.newaxis]).sum(axis=1), self._bins - 1)
+            # values of a bin are assumed evenly spread, each one in the middle of its share of the bin
+            before = cumulated[rows, bins] - counts[rows, bins]
+            fractions = np.clip((ranks - before + 0.5) / np.maximum(counts[rows, bins], 1), 0, 1)
+            columns[quantile_name(quantile)] = np.exp(self._log_min + (bins + fractions) * self._log_width)
+
+        return pd.DataFrame(columns, index=self._dates_index(mask), columns=[quantile_name(quantile) for quantile in self._quantiles])
+
+
+def quantile_name(quantile: float) -> str:
+    """
+    Column name of a quantile: 'p' followed by the percentile, ex: 'p10' for 0.1
+    """
+    return f'p{quantile * 100:g}'
+
+
+DEFAULT_RESAMPLES = 200
+
+DEFAULT_CONFIDENCE = 0.95
+
+# curves evaluated at once when bootstrapping
+_BOOTSTRAP_CHUNK = 64
+
+
+def bootstrap_average(store: CurveStore, grid: Optional[TimeGrid] = None, resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = DEFAULT_CONFIDENCE, seed: int = 0) -> DataFrame:
+    """
+    Average of curves per day with a bootstrap confidence band: curves are drawn with replacement
+    (as many as there are curves) to build each resample, the band holding the given share of the resamples averages
+
+    Parameters
+    ----------
+    store: CurveStore
+        Curves, usually of a sample of persons
+    grid: TimeGrid, optional
+        Points at which curves are averaged. Default: None, every day
+    resamples: int, optional
+        Number of bootstrap resamples. Default: 200
+    confidence: float, optional
+        Confidence level of the band, between 0 and 1. Default: 0.95
+    seed: int, optional
+        Random seed of the resamples. Default: 0
+
+    Returns
+    -------
+    Dataframe
+        Dataframe with dates as an index and 'Average time', 'Lower bound' and 'Upper bound' columns,
+        for days having at least one value
+    """
+    if not 0 < confidence < 1:
+        raise ValueError(f"Invalid confidence: {confidence}")
+
+    if grid is None:
+        grid = TimeGrid()
+
+    columns = ['Average time', 'Lower bound', 'Upper bound']
+    curves_count = len(store)
+
+    if curves_count == 0:
+        return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([]), dtype=np.float64)
+
+    starts = np.array([store.start(curve_id) for curve_id in store.ids], dtype=np.int64)
+    ends = starts + np.array([store.length(curve_id) for curve_id in store.ids], dtype=np.int64)
+    points = grid.points(int(starts.min()), int(ends.max()))
+    firsts = np.searchsorted(points, starts)
+    lasts = np.searchsorted(points, ends)
+
+    # number of times each curve is drawn, first row being the curves themselves
+    rng = np.random.default_rng(seed)
+    weights = np.vstack([np.ones(curves_count), rng.multinomial(curves_count, np.full(curves_count, 1 / curves_count), size=resamples)])
+
+    sums = np.zeros((len(weights), len(points)))
+    counts = np.zeros((len(weights), len(points)))
+
+    # curves of a chunk start close to each other: only the points they cover are evaluated
+    order = np.argsort(firsts, kind='stable')
+
+    for chunk_start in range(0, curves_count, _BOOTSTRAP_CHUNK):
+        chunk = order[chunk_start:chunk_start + _BOOTSTRAP_CHUNK]
+        window_first, window_last = int(firsts[chunk].min()), int(lasts[chunk].max())
+        values = np.zeros((len(chunk), window_last - window_first))
+        covered = np.zeros((len(chunk), window_last - window_first))
+
+        for row, position in enumerate(chunk):
+            first, last = firsts[position], lasts[position]
+            values[row, first - window_first:last - window_first] = store.values_at(store.ids[position], points[first:last])
+            covered[row, first - window_first:last - window_first] = 1
+
+        sums[:, window_first:window_last] += weights[:, chunk] @ values
+        counts[:, window_first:window_last] += weights[:, chunk] @ covered
+
+    mask = counts[0] > 0
+    # days without any curve drawn in a resample don't count for that resample
+    with np.errstate(invalid='ignore', divide='ignore'):
+        averages = sums[:, mask] / counts[:, mask]
+
+    lower, upper = _nan_quantiles(averages[1:], [(1 - confidence) / 2, (1 + confidence) / 2])
+
+    return pd.DataFrame({'Average time': averages[0], 'Lower bound': lower, 'Upper bound': upper},
+        index=grid.dates(grid.slots(points[mask])), columns=columns)
+
+
+def _nan_quantiles(values: NDArray[np.float64], quantiles: Sequence[float]) -> NDArray[np.float64]:
+    """
+    Quantiles of each column ignoring NaN values, with linear interpolation as np.nanquantile()
+    (which is much slower, handling columns one by one). NaN for columns without any value
+    """
+    # NaN values are sorted last
+    sorted_values = np.sort(values, axis=0)
+    counts = np.count_nonzero(~np.isnan(values), axis=0)
+    columns = np.arange(values.shape[1])
+
+    results = np.full((len(quantiles), values.shape[1]), np.nan)
+    valid = counts > 0
+
+    for number, quantile in enumerate(quantiles):
+        ranks = quantile * (np.maximum(counts, 1) - 1)
+        below = np.floor(ranks).astype(np.int64)
+        above = np.minimum(below + 1, np.maximum(counts, 1) - 1)
+        fractions = ranks - below
+        low_values = sorted_values[below, columns]
+        high_values = sorted_values[above, columns]
+        results[number, valid] = (low_values + (high_values - low_values) * fractions)[valid]
+
+    return results
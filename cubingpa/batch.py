@@ -0,0 +1,88 @@
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pandas import DataFrame
+from typing import Dict, Optional, Sequence
+
+from cubingpa import data_filter, snapshot
+from cubingpa.events import EventId
+from cubingpa.raw_data import RawData
+from cubingpa.reference_processor import ReferenceProcessor
+
+
+# raw data of the current worker process, loaded once by _init_worker
+_worker_raw_data = None # type: Optional[RawData]
+
+_BATCH_FINGERPRINT = 'batch'
+
+
+def process_events(raw_data: RawData, events: Sequence[EventId], processes: Optional[int] = None,
+    snapshot_directory: Optional[str] = None) -> Dict[EventId, DataFrame]:
+    """
+    Process several events in parallel, each event in its own worker process.
+
+    Raw data is encoded then shared with the workers through a memory-mapped snapshot
+    (see cubingpa.snapshot): workers map the same files instead of receiving a pickled copy.
+
+    Parameters
+    ----------
+    raw_data: RawData
+        Data as loaded from source (DB, CSV, etc)
+    events: Sequence[EventId]
+        Events to process
+    processes: int, optional
+        Number of worker processes. Default: None, number of CPUs
+    snapshot_directory: str, optional
+        Directory where the shared snapshot is written. Default: None, a temporary directory
+
+    Returns
+    -------
+    Dict[EventId, Dataframe]
+        Average time per day of each event, as returned by ReferenceProcessor.process_average()
+    """
+    if snapshot_directory is not None:
+        return _process_events(raw_data, events, processes, snapshot_directory)
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        return _process_events(raw_data, events, processes, temporary_directory)
+
+
+def process_event(raw_data: RawData, event: EventId) -> DataFrame:
+    """
+    Filter and process one event
+
+    Parameters
+    ----------
+    raw_data: RawData
+        Data as loaded from source (DB, CSV, etc)
+    event: EventId
+        Event to process
+
+    Returns
+    -------
+    Dataframe
+        Average time per day, as returned by ReferenceProcessor.process_average()
+    """
+    filtered_results = data_filter.filter(raw_data, event)
+    return ReferenceProcessor(filtered_results).process_average()
+
+
+def _process_events(raw_data: RawData, events: Sequence[EventId], processes: Optional[int], directory: str) -> Dict[EventId, DataFrame]:
+    # encoded ids are memory-mapped codes, plain strings would be rebuilt by every worker
+    snapshot.save(raw_data.encode(), directory, _BATCH_FINGERPRINT)
+
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(directory,)) as executor:
+        futures = {event: executor.submit(_process_event, event) for event in events}
+
+        return {event: future.result() for event, future in futures.items()}
+
+
+def _init_worker(directory: str) -> None:
+    global _worker_raw_data
+    _worker_raw_data = snapshot.load(directory, _BATCH_FINGERPRINT)
+
+
+def _process_event(event: EventId) -> DataFrame:
+    if _worker_raw_data is None:
+        raise RuntimeError("Worker raw data not loaded")
+
+    return process_event(_worker_raw_data, event)
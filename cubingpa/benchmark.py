@@ -0,0 +1,179 @@
+import os
+import sys
+import time
+import zipfile
+import argparse
+import tempfile
+import tracemalloc
+import pandas as pd
+from pandas import DataFrame
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from cubingpa import data_filter, export_data_loader, snapshot, synthetic
+from cubingpa.events import EventId
+from cubingpa.raw_data import RawData
+from cubingpa.reference_processor import ReferenceProcessor
+
+
+DEFAULT_SCALES = (1000, 10000, 50000)
+
+_MEBIBYTE = 1 << 20
+
+
+def run(scales: Sequence[int] = DEFAULT_SCALES, event: EventId = EventId.E_333, results_per_person: int = 10,
+    seed: int = 0, track_memory: bool = True, log: bool = False) -> DataFrame:
+    """
+    Benchmark each stage, from loading raw data to the average progression curve,
+    on synthetic data (see cubingpa.synthetic) of several sizes.
+
+    Loading is measured from a WCA export zip (cubingpa.export_data_loader) and from a snapshot
+    (cubingpa.snapshot), standing in for the DB loader. Each step of cubingpa.data_filter is measured
+    separately, as well as the fused filter, then ReferenceProcessor processing, building the processed results dataframe
+    and computing the average curve.
+
+    Parameters
+    ----------
+    scales: Sequence[int], optional
+        Numbers of persons to generate data for. Default: 1000, 10000 and 50000
+    event: EventId, optional
+        Event to process. Default: 3x3x3
+    results_per_person: int, optional
+        Average number of results per person, see cubingpa.synthetic.generate(). Default: 10
+    seed: int, optional
+        Random seed of the generated data. Default: 0
+    track_memory: bool, optional
+        Indicates if peak memory should be measured, by running each stage a second time
+        while tracing allocations (tracing slows the stages down). Default: True
+    log: bool, optional
+        Indicates if each measure should be printed as it is made. Default: False
+
+    Returns
+    -------
+    Dataframe
+        One row per scale and stage: number of input rows, seconds, rows per second
+        and peak memory in MiB (NaN if not measured)
+    """
+    measures = [] # type: List[Dict[str, Any]]
+
+    for persons in scales:
+        raw_data = synthetic.generate(persons, events=[event], results_per_person=results_per_person, seed=seed)
+
+        with tempfile.TemporaryDirectory() as directory:
+            for stage, rows, function in _stages(raw_data, event, directory):
+                seconds, result = _measure_time(function)
+                peak_memory = _measure_peak_memory(function) if track_memory else float('nan')
+
+                measures.append({'persons': persons, 'stage': stage, 'rows': rows, 'seconds': seconds,
+                    'rows_per_second': rows / seconds if seconds > 0 else float('nan'), 'peak_memory': peak_memory})
+
+                if log:
+                    print(f'{persons} persons, {stage}: {rows} rows, {round(seconds, 3)} seconds, {round(peak_memory, 1)} MiB')
+
+    return pd.DataFrame(measures, columns=['persons', 'stage', 'rows', 'seconds', 'rows_per_second', 'peak_memory'])
+
+
+def write_export(raw_data: RawData, export_path: str) -> None:
+    """
+    Write raw data as a WCA export zip, with the tables and columns read by cubingpa.export_data_loader
+
+    Parameters
+    ----------
+    raw_data: RawData
+        Data to write
+    export_path: str
+        Path of the zip file
+    """
+    competitions = raw_data.competitions.rename(columns={'YEAR': 'year', 'MONTH': 'month', 'DAY': 'day'})
+
+    with zipfile.ZipFile(export_path, 'w', zipfile.ZIP_DEFLATED) as export_zip:
+        export_zip.writestr(export_data_loader.RESULTS_FILE_NAME, raw_data.results.to_csv(sep='\t', index=False))
+        export_zip.writestr(export_data_loader.COMPETITIONS_FILE_NAME, competitions.to_csv(sep='\t', index=False))
+
+
+def _stages(raw_data: RawData, event: EventId, directory: str) -> List[Tuple[str, int, Callable[[], Any]]]:
+    """
+    Stages to measure: name, number of input rows and function running the stage.
+    Inputs of each stage are computed beforehand, so that stages are measured independently
+    """
+    export_path = os.path.join(directory, 'WCA_export.tsv.zip')
+    write_export(raw_data, export_path)
+    snapshot_directory = os.path.join(directory, 'snapshot')
+    snapshot.save(raw_data, snapshot_directory, 'benchmark')
+
+    rows = len(raw_data.results)
+    stages = [
+        ('load export', rows, lambda: export_data_loader.load(export_path)),
+        ('load snapshot', rows, lambda: snapshot.load(snapshot_directory, 'benchmark'))
+    ] # type: List[Tuple[str, int, Callable[[], Any]]]
+
+    # same steps as data_filter.filter(fused=False)
+    filter_steps = [
+        ('filter event', lambda results: data_filter._filter_on_event(results, event)),
+        ('remove invalid results', data_filter._remove_invalid_results),
+        ('remove insufficient results', lambda results: data_filter._remove_persons_with_insufficient_results(results, 2)),
+        ('convert to seconds', data_filter._convert_results_to_seconds),
+        ('join competitions', lambda results: data_filter._join_results_on_competitions(results, raw_data.competitions)),
+        ('sort', data_filter._sort_results),
+        ('convert to dates', data_filter._convert_year_month_day_to_date)
+    ] # type: List[Tuple[str, Callable[[DataFrame], DataFrame]]]
+
+    results = raw_data.results
+    for name, step in filter_steps:
+        # steps may modify their input
+        stages.append((f'filter: {name}', len(results), _copying(step, results)))
+        results = step(results.copy())
+
+    stages.append(('filter (fused)', rows, lambda: data_filter.filter(raw_data, event)))
+
+    filtered_results = results
+    processed_curves = ReferenceProcessor(filtered_results).process_curves()
+
+    rows = len(filtered_results)
+    stages += [
+        ('process', rows, lambda: ReferenceProcessor(filtered_results).process_curves()),
+        ('processed dataframe', rows, processed_curves.to_dataframe),
+        ('process average', rows, lambda: ReferenceProcessor(filtered_results).process_average())
+    ]
+
+    return stages
+
+
+def _copying(step: Callable[[DataFrame], DataFrame], results: DataFrame) -> Callable[[], DataFrame]:
+    return lambda: step(results.copy())
+
+
+def _measure_time(function: Callable[[], Any]) -> Tuple[float, Any]:
+    start_time = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start_time, result
+
+
+def _measure_peak_memory(function: Callable[[], Any]) -> float:
+    """
+    Peak memory allocated while running the function, in MiB
+    """
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peak / _MEBIBYTE
+
+
+def main(arguments: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog='python -m cubingpa.benchmark', description='Benchmark cubingpa stages on synthetic data')
+    parser.add_argument('--scales', type=int, nargs='+', default=list(DEFAULT_SCALES), help='numbers of persons')
+    parser.add_argument('--event', type=EventId, default=EventId.E_333, help='event id, e.g. 333')
+    parser.add_argument('--results-per-person', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true', help="don't measure peak memory")
+    parsed = parser.parse_args(arguments)
+
+    measures = run(parsed.scales, parsed.event, parsed.results_per_person, parsed.seed, not parsed.no_memory, log=True)
+    print(measures.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,62 @@
+import os
+import json
+import numpy as np
+from numpy.typing import NDArray
+from typing import Any, Dict, Optional, Tuple
+
+
+# incremented whenever the checkpoint layout changes, invalidating older checkpoints
+FORMAT_VERSION = 2
+
+_METADATA_KEY = 'metadata'
+
+
+def save(path: str, metadata: Dict[str, Any], arrays: Dict[str, NDArray[Any]]) -> None:
+    """
+    Save a checkpoint as a single .npz file. The file is replaced atomically,
+    so that a process killed while saving leaves the previous checkpoint intact
+
+    Parameters
+    ----------
+    path: str
+        Checkpoint file path
+    metadata: Dict[str, Any]
+        JSON serializable data
+    arrays: Dict[str, ndarray]
+        Arrays to save, without python objects
+    """
+    metadata = dict(metadata, version=FORMAT_VERSION)
+    temporary_path = path + '.tmp'
+
+    with open(temporary_path, 'wb') as checkpoint_file:
+        np.savez(checkpoint_file, **arrays, **{_METADATA_KEY: np.array(json.dumps(metadata))})
+
+    os.replace(temporary_path, path)
+
+
+def load(path: str) -> Optional[Tuple[Dict[str, Any], Dict[str, NDArray[Any]]]]:
+    """
+    Load a checkpoint saved by save()
+
+    Parameters
+    ----------
+    path: str
+        Checkpoint file path
+
+    Returns
+    -------
+    Tuple[Dict[str, Any], Dict[str, ndarray]]
+        Metadata and arrays, or None if there is no valid checkpoint
+    """
+    if not os.path.exists(path):
+        return None
+
+    with np.load(path, allow_pickle=False) as checkpoint_file:
+        arrays = {key: checkpoint_file[key] for key in checkpoint_file.files}
+
+    metadata = json.loads(str(arrays.pop(_METADATA_KEY))) # type: Dict[str, Any]
+
+    if metadata.get('version') != FORMAT_VERSION:
+        return None
+
+    return metadata, arrays
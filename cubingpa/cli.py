@@ -0,0 +1,139 @@
+import os
+import sys
+import argparse
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+    from cubingpa.events import EventId
+    from cubingpa.raw_data import RawData
+
+# heavy modules (pandas, numpy, SQLAlchemy and DB drivers...) are imported when needed only,
+# so that starting the command and printing its help stays fast
+
+_FORMAT_CSV = 'csv'
+_FORMAT_CURVES = 'curves'
+
+
+def main(arguments: Optional[Sequence[str]] = None) -> None:
+    """
+    Headless batch processing: load raw data, process each event and write, in the output directory,
+    either its average curve as a CSV file (date, average time) or all its processed curves
+    (see cubingpa.curve_file), named after the event
+
+    Parameters
+    ----------
+    arguments: Sequence[str], optional
+        Command line arguments. Default: None, arguments of the current process
+    """
+    parsed = _parse_arguments(arguments)
+
+    from cubingpa.events import EventId
+    events = [EventId(event) for event in parsed.events]
+
+    raw_data = _load(parsed, events)
+
+    os.makedirs(parsed.output, exist_ok=True)
+
+    if parsed.format == _FORMAT_CURVES:
+        _save_curves(raw_data, events, parsed.output)
+        return
+
+    averages = _process(raw_data, events, parsed.processes)
+
+    for event, average in averages.items():
+        output_path = os.path.join(parsed.output, f'{event.value}.csv')
+        average.to_csv(output_path, index_label='date')
+        print(f'{event.value}: {output_path}')
+
+
+def _parse_arguments(arguments: Optional[Sequence[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='python -m cubingpa', description='Compute the average progression curve of WCA events')
+    parser.add_argument('events', nargs='+', help='event ids, e.g. 333 444bf')
+
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--db', action='store_true', help='load from the DB configured in cubingpa/config/db_config.py')
+    source.add_argument('--export', metavar='PATH', help='load from a WCA export zip (WCA_export.tsv.zip)')
+    source.add_argument('--snapshot', metavar='DIRECTORY', help='load from a snapshot made by cubingpa.snapshot')
+
+    parser.add_argument('--cache', metavar='DIRECTORY',
+        help='snapshot directory caching data loaded from the DB or the export, reloaded until the source changes')
+    parser.add_argument('--processes', type=int, default=1,
+        help='number of events processed in parallel, or of processes preprocessing persons of a single event, default: 1')
+    parser.add_argument('--format', choices=[_FORMAT_CSV, _FORMAT_CURVES], default=_FORMAT_CSV,
+        help=f'{_FORMAT_CSV}: average curve as a CSV file, {_FORMAT_CURVES}: all the curves as memory-mappable files, default: {_FORMAT_CSV}')
+    parser.add_argument('-o', '--output', metavar='DIRECTORY', required=True, help='output directory')
+
+    parsed = parser.parse_args(arguments)
+
+    if parsed.cache is not None and parsed.snapshot is not None:
+        parser.error('--cache does not apply to --snapshot')
+
+    # validate event ids before loading anything
+    valid_events = _event_ids()
+    for event in parsed.events:
+        if event not in valid_events:
+            parser.error(f"unknown event '{event}', valid events: {', '.join(valid_events)}")
+
+    return parsed
+
+
+def _event_ids() -> List[str]:
+    from cubingpa.events import EventId
+    return [event.value for event in EventId]
+
+
+def _load(parsed: argparse.Namespace, events: List['EventId']) -> 'RawData':
+    from cubingpa import snapshot
+
+    if parsed.snapshot is not None:
+        raw_data = snapshot.load(parsed.snapshot)
+        if raw_data is None:
+            sys.exit(f'No valid snapshot in {parsed.snapshot}')
+        return raw_data
+
+    if parsed.export is not None:
+        from cubingpa import export_data_loader
+        export_path = parsed.export # type: str
+
+        if parsed.cache is None:
+            return export_data_loader.load(export_path)
+
+        return snapshot.load_or_create(parsed.cache, export_data_loader.fingerprint(export_path),
+            lambda: export_data_loader.load(export_path))
+
+    from cubingpa import db_data_loader
+    # a single event can be filtered by the DB, the cache must hold all the events though
+    event_id = events[0] if len(events) == 1 and parsed.cache is None else None
+
+    if parsed.cache is None:
+        return db_data_loader.load(event_id)
+
+    return snapshot.load_or_create(parsed.cache, db_data_loader.fingerprint(), lambda: db_data_loader.load(event_id))
+
+
+def _process(raw_data: 'RawData', events: List['EventId'], processes: int) -> Dict['EventId', 'DataFrame']:
+    from cubingpa import batch, data_filter
+    from cubingpa.reference_processor import ReferenceProcessor
+
+    if processes > 1 and len(events) > 1:
+        return batch.process_events(raw_data, events, processes)
+
+    # results are scanned once for all the events
+    filtered_results = data_filter.filter_many(raw_data, events)
+
+    # a single event uses the processes to preprocess its persons
+    return {event: ReferenceProcessor(filtered_results[event], workers=processes).process_average() for event in events}
+
+
+def _save_curves(raw_data: 'RawData', events: List['EventId'], output: str) -> None:
+    from cubingpa import curve_file, data_filter
+    from cubingpa.reference_processor import ReferenceProcessor
+
+    filtered_results = data_filter.filter_many(raw_data, events)
+
+    for event in events:
+        store = ReferenceProcessor(filtered_results[event]).process_curves()
+        output_directory = os.path.join(output, event.value)
+        curve_file.save(store, output_directory, {'event': event.value})
+        print(f'{event.value}: {output_directory}')
@@ -0,0 +1,229 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from numpy.typing import NDArray
+from typing import Any, Dict, Optional, cast
+
+from cubingpa.curve_store import CurveStore
+
+
+METADATA_FILE_NAME = 'metadata.json'
+
+# incremented whenever the layout changes, invalidating older files
+FORMAT_VERSION = 1
+
+# one .npy file per array, memory-mapped when loaded
+# values: flat float32 values of all the curves, in processing order
+# ids, starts, offsets, lengths: per curve id, first day (days since 1970-01-01), position in values and number of values
+# averages, counts: per day from metadata first_day, average of the curves and number of curves
+_ARRAYS = ['values', 'ids', 'starts', 'offsets', 'lengths', 'averages', 'counts']
+
+
+def save(store: CurveStore, directory: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Save processed curves, with their average per day, as a set of memory-mappable .npy files
+
+    Parameters
+    ----------
+    store: CurveStore
+        Processed curves, as returned by ReferenceProcessor.process_curves()
+    directory: str
+        Output directory, created if needed. Existing files are overwritten
+    metadata: Dict[str, Any], optional
+        JSON serializable data to keep with the curves, ex: the event id. Default: None
+    """
+    if store.released_count > 0:
+        raise RuntimeError("Curves have been released, they can't be saved")
+
+    os.makedirs(directory, exist_ok=True)
+
+    # metadata is written last: a directory without metadata is never considered valid
+    metadata_path = os.path.join(directory, METADATA_FILE_NAME)
+    if os.path.exists(metadata_path):
+        os.remove(metadata_path)
+
+    starts = np.array([store.start(curve_id) for curve_id in store.ids], dtype=np.int64)
+    lengths = np.array([store.length(curve_id) for curve_id in store.ids], dtype=np.int64)
+
+    offsets = np.zeros(len(lengths), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=offsets[1:])
+
+    first_day = int(starts.min()) if len(starts) > 0 else 0
+    days_count = int((starts + lengths).max()) - first_day if len(starts) > 0 else 0
+
+    # daily values are evaluated from the knots of the curves, one curve at a time,
+    # directly into the saved array: only one curve is held in double precision
+    values = np.empty(int(lengths.sum()), dtype=np.float32)
+    counts = np.zeros(days_count, dtype=np.int64)
+    sums = np.zeros(days_count, dtype=np.float64)
+
+    for curve_id, start, offset, length in zip(store.ids, starts - first_day, offsets, lengths):
+        curve_values = store.values(curve_id)
+        values[offset:offset + length] = curve_values
+        counts[start:start + length] += 1
+        sums[start:start + length] += curve_values
+
+    averages = np.full(days_count, np.nan)
+    np.divide(sums, counts, out=averages, where=counts > 0)
+
+    arrays = {
+        'values': values,
+        'ids': np.array(store.ids, dtype=str),
+        'starts': starts,
+        'offsets': offsets,
+        'lengths': lengths,
+        'averages': averages,
+        'counts': counts
+    } # type: Dict[str, NDArray[Any]]
+
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, f'{name}.npy'), array)
+
+    metadata = {'version': FORMAT_VERSION, 'first_day': first_day, 'days_count': days_count,
+        'curves_count': len(lengths), 'metadata': metadata if metadata is not None else {}}
+
+    with open(metadata_path, 'w') as metadata_file:
+        json.dump(metadata, metadata_file)
+
+
+def load(directory: str) -> Optional['CurveFile']:
+    """
+    Open curves saved by save(). Arrays are memory-mapped: only the parts read are loaded
+
+    Parameters
+    ----------
+    directory: str
+        Directory of the curves
+
+    Returns
+    -------
+    CurveFile
+        Saved curves, or None if there are no valid curves in the directory
+    """
+    metadata_path = os.path.join(directory, METADATA_FILE_NAME)
+
+    if not os.path.exists(metadata_path):
+        return None
+
+    with open(metadata_path) as metadata_file:
+        metadata = json.load(metadata_file) # type: Dict[str, Any]
+
+    if metadata.get('version') != FORMAT_VERSION:
+        return None
+
+    arrays = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r') for name in _ARRAYS}
+
+    return CurveFile(metadata, arrays)
+
+
+class CurveFile:
+    """
+    Processed curves opened by load(), read on demand from memory-mapped arrays
+
+    Parameters
+    ----------
+    metadata: Dict[str, Any]
+        Content of the metadata file
+    arrays: Dict[str, ndarray]
+        Memory-mapped arrays
+    """
+
+    def __init__(self, metadata: Dict[str, Any], arrays: Dict[str, NDArray[Any]]) -> None:
+        self._metadata = metadata
+        self._arrays = arrays
+        # built on first lookup by id
+        self._positions = None # type: Optional[Dict[str, int]]
+
+    def __len__(self) -> int:
+        return int(self._metadata['curves_count'])
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """
+        Metadata given to save()
+        """
+        return cast(Dict[str, Any], self._metadata['metadata'])
+
+    @property
+    def ids(self) -> NDArray[Any]:
+        """
+        Curves ids, in processing order
+        """
+        return self._arrays['ids']
+
+    @property
+    def first_day(self) -> int:
+        """
+        First day covered by a curve, in number of days since 1970-01-01
+        """
+        return int(self._metadata['first_day'])
+
+    @property
+    def days_count(self) -> int:
+        return int(self._metadata['days_count'])
+
+    def start(self, curve_id: str) -> int:
+        """
+        First day of a curve, in number of days since 1970-01-01
+        """
+        return int(self._arrays['starts'][self._position(curve_id)])
+
+    def values(self, curve_id: str) -> NDArray[np.float32]:
+        """
+        Daily values of a curve, memory-mapped
+        """
+        position = self._position(curve_id)
+        offset = self._arrays['offsets'][position]
+        return self._arrays['values'][offset:offset + self._arrays['lengths'][position]]
+
+    def get_dataframe(self, curve_id: str) -> DataFrame:
+        """
+        Curve as a dataframe with dates as an index and the curve id as the only column
+        """
+        values = self.values(curve_id)
+        days = self.start(curve_id) + np.arange(len(values))
+        return pd.DataFrame({curve_id: np.asarray(values, dtype=np.float64)}, index=pd.DatetimeIndex(days.astype('datetime64[D]')))
+
+    def get_average(self, first_date: Optional[Any] = None, last_date: Optional[Any] = None) -> DataFrame:
+        """
+        Average time per day, for days having at least one value, optionally restricted to a range of dates
+
+        Parameters
+        ----------
+        first_date: date, optional
+            First date included. Default: None, from the first day
+        last_date: date, optional
+            Last date included. Default: None, to the last day
+
+        Returns
+        -------
+        Dataframe
+            Dataframe with dates as an index and an 'Average time' column
+        """
+        begin = 0 if first_date is None else max(self._to_day(first_date) - self.first_day, 0)
+        end = self.days_count if last_date is None else min(self._to_day(last_date) - self.first_day + 1, self.days_count)
+        end = max(begin, end)
+
+        counts = self._arrays['counts'][begin:end]
+        mask = counts > 0
+        days = self.first_day + begin + np.flatnonzero(mask)
+
+        return pd.DataFrame({'Average time': np.asarray(self._arrays['averages'][begin:end][mask])},
+            index=pd.DatetimeIndex(days.astype('datetime64[D]')))
+
+    def get_counts(self) -> NDArray[np.int64]:
+        """
+        Number of curves per day from first_day, memory-mapped
+        """
+        return self._arrays['counts']
+
+    def _position(self, curve_id: str) -> int:
+        if self._positions is None:
+            self._positions = {curve_id: position for position, curve_id in enumerate(self._arrays['ids'].tolist())}
+
+        return self._positions[curve_id]
+
+    def _to_day(self, date: Any) -> int:
+        return int(np.datetime64(pd.Timestamp(date), 'D').astype(np.int64))
@@ -0,0 +1,304 @@
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from numpy.typing import NDArray
+from typing import Any, Dict, List, Optional, Tuple
+
+from cubingpa.time_grid import TimeGrid
+
+
+class CurveStore:
+    """
+    Append-only store of aligned curves. Each curve is a start day (number of days since 1970-01-01)
+    and its knots: days relative to the start day (the first knot being on day 0) with the time at
+    each of them. The curve has one value per day from the start day to its last knot, linearly
+    interpolated between knots.
+
+    Only knots are stored: daily values are evaluated on demand, when reading a curve or building
+    the wide dataframe (one column per curve, one row per day). Adding a knot to a curve mostly only
+    writes this knot, curves having a spare capacity.
+    """
+
+    def __init__(self) -> None:
+        self._ids = [] # type: List[str]
+        self._positions = {} # type: Dict[str, int]
+        self._starts = [] # type: List[int]
+        # knots of each curve are the first _counts[position] items of its buffers
+        self._days = [] # type: List[NDArray[np.int64]]
+        self._times = [] # type: List[NDArray[np.float64]]
+        self._counts = [] # type: List[int]
+        # arrays given to append() are never written (they may be views of other data),
+        # extending a curve first copies them to buffers owned by the store
+        self._owned = [] # type: List[bool]
+        # curves before this position have been released
+        self._released_count = 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, curve_id: object) -> bool:
+        return curve_id in self._positions
+
+    @property
+    def ids(self) -> List[str]:
+        """
+        Curves ids, in insertion order
+        """
+        return self._ids
+
+    @property
+    def released_count(self) -> int:
+        """
+        Number of curves released, see release_until()
+        """
+        return self._released_count
+
+    def append(self, curve_id: str, start_day: int, days: NDArray[np.int64], times: NDArray[np.float64]) -> None:
+        """
+        Add a curve after the existing ones
+
+        Parameters
+        ----------
+        curve_id: str
+            Id of the curve, usually a person id
+        start_day: int
+            Day of the first knot, in number of days since 1970-01-01
+        days: ndarray
+            Days of the knots, relative to the start day, in ascending order starting at 0
+        times: ndarray
+            Time at each knot
+        """
+        if curve_id in self._positions:
+            raise ValueError(f"Curve already stored: {curve_id}")
+
+        self._positions[curve_id] = len(self._ids)
+        self._ids.append(curve_id)
+        self._starts.append(start_day)
+        self._days.append(days)
+        self._times.append(times)
+        self._counts.append(len(days))
+        self._owned.append(False)
+
+    def extend(self, curve_id: str, day: int, time: float) -> None:
+        """
+        Add a knot to the end of a curve, values between the last knot and this one being interpolated
+
+        Parameters
+        ----------
+        curve_id: str
+            Id of the curve
+        day: int
+            Day of the knot, relative to the start day, after the last knot
+        time: float
+            Time at the knot
+        """
+        position = self._positions[curve_id]
+        count = self._counts[position]
+
+        if count == len(self._days[position]) or not self._owned[position]:
+            # double the capacity: a curve extended many times is copied O(log n) times only
+            capacity = max(2 * count, 1)
+            self._days[position] = np.resize(self._days[position][:count], capacity)
+            self._times[position] = np.resize(self._times[position][:count], capacity)
+            self._owned[position] = True
+
+        self._days[position][count] = day
+        self._times[position][count] = time
+        self._counts[position] = count + 1
+
+    def truncate(self, count: int) -> None:
+        """
+        Remove the curves inserted from the given position, undoing their append()
+
+        Parameters
+        ----------
+        count: int
+            Number of curves to keep
+        """
+        for curve_id in self._ids[count:]:
+            del self._positions[curve_id]
+
+        del self._ids[count:]
+        del self._starts[count:]
+        del self._days[count:]
+        del self._times[count:]
+        del self._counts[count:]
+        del self._owned[count:]
+
+    def shorten(self, curve_id: str, knots_count: int) -> None:
+        """
+        Remove knots from the end of a curve, undoing extend()
+
+        Parameters
+        ----------
+        curve_id: str
+            Id of the curve
+        knots_count: int
+            Number of knots to keep
+        """
+        position = self._positions[curve_id]
+        self._counts[position] = min(knots_count, self._counts[position])
+
+    def position(self, curve_id: str) -> int:
+        """
+        Insertion position of a curve, starting at zero
+        """
+        return self._positions[curve_id]
+
+    def start(self, curve_id: str) -> int:
+        """
+        First day of a curve
+        """
+        return self._starts[self._positions[curve_id]]
+
+    def end(self, curve_id: str) -> int:
+        """
+        Day following the last day of a curve
+        """
+        return self.start(curve_id) + self.length(curve_id)
+
+    def length(self, curve_id: str) -> int:
+        """
+        Number of days of a curve
+        """
+        position = self._positions[curve_id]
+        count = self._counts[position]
+        return int(self._days[position][count - 1]) + 1 if count > 0 else 0
+
+    def knots_count(self, curve_id: str) -> int:
+        return self._counts[self._positions[curve_id]]
+
+    def knots(self, curve_id: str) -> Tuple[NDArray[np.int64], NDArray[np.float64]]:
+        """
+        Days (relative to the start day) and times of the knots of a curve.
+        The arrays are not copies and must not be modified
+        """
+        position = self._positions[curve_id]
+        count = self._counts[position]
+        return self._days[position][:count], self._times[position][:count]
+
+    def values(self, curve_id: str) -> NDArray[np.float64]:
+        """
+        Daily values of a curve, from its start day to its last day
+        """
+        days, times = self.knots(curve_id)
+
+        if len(days) == 0:
+            return np.zeros(0, dtype=np.float64)
+
+        return np.interp(np.arange(days[-1] + 1), days, times)
+
+    def values_at(self, curve_id: str, days: NDArray[np.int64]) -> NDArray[np.float64]:
+        """
+        Values of a curve at the given days (number of days since 1970-01-01), NaN outside of the curve
+        """
+        knot_days, knot_times = self.knots(curve_id)
+
+        if len(knot_days) == 0:
+            return np.full(len(days), np.nan)
+
+        return np.interp(days - self.start(curve_id), knot_days, knot_times, left=np.nan, right=np.nan)
+
+    def release_until(self, position: int) -> None:
+        """
+        Free knots of the curves inserted before the given position, when they are not needed anymore.
+        Their ids and positions are kept, but their values can't be read anymore
+
+        Parameters
+        ----------
+        position: int
+            Insertion position of the first curve to keep
+        """
+        for released_position in range(self._released_count, position):
+            self._days[released_position] = np.zeros(0, dtype=np.int64)
+            self._times[released_position] = np.zeros(0, dtype=np.float64)
+            self._counts[released_position] = 0
+
+        self._released_count = max(self._released_count, position)
+
+    def to_arrays(self) -> Dict[str, NDArray[Any]]:
+        """
+        Store content as flat arrays, see from_arrays()
+        """
+        knots = [self.knots(curve_id) for curve_id in self._ids]
+
+        return {
+            'ids': np.array(self._ids, dtype=str),
+            'starts': np.array(self._starts, dtype=np.int64),
+            'counts': np.array(self._counts, dtype=np.int64),
+            'days': np.concatenate([days for days, _ in knots]) if len(knots) > 0 else np.zeros(0, dtype=np.int64),
+            'times': np.concatenate([times for _, times in knots]) if len(knots) > 0 else np.zeros(0, dtype=np.float64),
+            'released_count': np.array(self._released_count)
+        }
+
+    def to_dataframe(self, grid: Optional[TimeGrid] = None) -> DataFrame:
+        """
+        Build the wide dataframe: one column per curve, in insertion order, one row per point of the grid
+        covered by at least one curve, in ascending order. Points not covered by a curve are NaN
+
+        Parameters
+        ----------
+        grid: TimeGrid, optional
+            Points at which curves are evaluated. Default: None, every day
+
+        Returns
+        -------
+        Dataframe
+            Dataframe with dates as an index
+        """
+        if self._released_count > 0:
+            raise RuntimeError("Curves have been released, dataframe can't be built")
+
+        if len(self._ids) == 0:
+            return pd.DataFrame(index=pd.DatetimeIndex([]))
+
+        if grid is None:
+            grid = TimeGrid()
+
+        starts = np.array(self._starts, dtype=np.int64)
+        ends = starts + np.array([self.length(curve_id) for curve_id in self._ids], dtype=np.int64)
+        points = grid.points(int(starts.min()), int(ends.max()))
+
+        # points covered by at least one curve become rows
+        firsts = np.searchsorted(points, starts)
+        lasts = np.searchsorted(points, ends)
+        coverage = np.zeros(len(points) + 1, dtype=np.int64)
+        np.add.at(coverage, firsts, 1)
+        np.add.at(coverage, lasts, -1)
+        covered = np.cumsum(coverage[:-1]) > 0
+        # curves cover contiguous points, which map to contiguous rows
+        rows = np.cumsum(covered) - 1
+
+        matrix = np.full((int(covered.sum()), len(self._ids)), np.nan)
+        for column, (curve_id, first, last) in enumerate(zip(self._ids, firsts, lasts)):
+            if first < last:
+                matrix[rows[first]:rows[first] + last - first, column] = self.values_at(curve_id, points[first:last])
+
+        index = pd.DatetimeIndex(points[covered].astype('datetime64[D]'))
+
+        return pd.DataFrame(matrix, index=index, columns=pd.Index(self._ids))
+
+
+def from_arrays(arrays: Dict[str, NDArray[Any]]) -> CurveStore:
+    """
+    Rebuild a store from the arrays returned by CurveStore.to_arrays()
+
+    Parameters
+    ----------
+    arrays: Dict[str, ndarray]
+        Store content as flat arrays
+
+    Returns
+    -------
+    CurveStore
+    """
+    store = CurveStore()
+    offsets = np.concatenate([[0], np.cumsum(arrays['counts'])])
+
+    for position, curve_id in enumerate(arrays['ids'].tolist()):
+        knots = slice(offsets[position], offsets[position + 1])
+        store.append(curve_id, int(arrays['starts'][position]), arrays['days'][knots], arrays['times'][knots])
+
+    store._released_count = int(arrays['released_count'])
+
+    return store
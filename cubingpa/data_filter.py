@@ -1,48 +1,315 @@
+import time
+import numpy as np
 import pandas as pd
 from pandas import DataFrame
-from sqlalchemy import create_engine
+from numpy.typing import NDArray
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
 
+from cubingpa import instrumentation
+from cubingpa.instrumentation import Sink
 from cubingpa.raw_data import RawData
 from cubingpa.events import EventId
 
 
-def filter(raw_data: RawData, event_id: EventId) -> DataFrame:
+# the steps' inner pd.merge groups rows by competition, in order of first appearance, before pandas 2.2 only
+# (left order is kept from 2.2): _sort_and_build reproduces this order, used for the index and for ties
+_MERGE_GROUPS_BY_KEY = tuple(int(part) for part in pd.__version__.split('.')[:2]) < (2, 2)
+
+
+def filter(raw_data: RawData, event_id: EventId, sink: Optional[Sink] = None, fused: bool = True) -> DataFrame:
     """
     Filter, merge and organize raw data, retaining specified event only
 
     Parameters
     ----------
     raw_data: RawData
-        Data as loaded from source (DB, CSV, etc)
+        Data as loaded from source (DB, CSV, etc), possibly encoded (see RawData.encode),
+        in which case personId stays encoded in the output
     even_id: EventId
         Event to filter on
+    sink: Sink, optional
+        Receives a STAGE event per step, with its duration and its rows count in and out
+        (see cubingpa.instrumentation). Fused filtering reports the event, DNF and persons filters as the
+        steps do, then the join and the sort as _join_competitions and _sort_and_build. Default: None
+    fused: bool, optional
+        Indicates if rows should be selected, joined and sorted at once (see _filter_fused), instead of
+        running each step on a new dataframe. Same output, with less time and memory. Default: True
 
     Returns
     -------
     Dataframe
         Filtered data as a Dataframe
     """
-    
+
+    if fused and _can_fuse(raw_data):
+        return _filter_fused(raw_data, [event_id], sink)[event_id]
+
     results = raw_data.results
     competitions = raw_data.competitions
 
-    results = _filter_on_event(results, event_id)
+    results = _run_step(sink, _filter_on_event, results, event_id)
 
-    results = _remove_invalid_results(results)
+    results = _run_step(sink, _remove_invalid_results, results)
 
-    results = _remove_persons_with_insufficient_results(results, 2)
+    results = _run_step(sink, _remove_persons_with_insufficient_results, results, 2)
 
-    results = _convert_results_to_seconds(results)
+    results = _run_step(sink, _convert_results_to_seconds, results)
 
-    results = _join_results_on_competitions(results, competitions)
+    results = _run_step(sink, _join_results_on_competitions, results, competitions)
 
-    results = _sort_results(results)
+    results = _run_step(sink, _sort_results, results)
 
-    results = _convert_year_month_day_to_date(results)
+    results = _run_step(sink, _convert_year_month_day_to_date, results)
 
     return results
 
 
+def filter_many(raw_data: RawData, events: Sequence[EventId], sink: Optional[Sink] = None) -> Dict[EventId, DataFrame]:
+    """
+    Filter, merge and organize raw data for several events at once: validity filter, competition join
+    and date conversion are made once for all the events, results being split by event at the end.
+    Same output as filter() for each event, in a single pass on the results
+
+    Parameters
+    ----------
+    raw_data: RawData
+        Data as loaded from source (DB, CSV, etc), possibly encoded (see RawData.encode),
+        in which case personId stays encoded in the output
+    events: Sequence[EventId]
+        Events to filter on
+    sink: Sink, optional
+        Receives a STAGE event per step, with its duration and its rows count in and out, all events
+        together (see cubingpa.instrumentation), steps being reported as by filter(). Default: None
+
+    Returns
+    -------
+    Dict[EventId, Dataframe]
+        Filtered data of each event, in the order of events
+    """
+    events = list(dict.fromkeys(events))
+
+    if not _can_fuse(raw_data):
+        return {event_id: filter(raw_data, event_id, sink, fused=False) for event_id in events}
+
+    return _filter_fused(raw_data, events, sink)
+
+
+def _can_fuse(raw_data: RawData) -> bool:
+    """
+    Fused filtering gives the same output as the steps when competition ids are unique
+    (otherwise the join duplicates results), columns names don't clash (otherwise the join renames them)
+    and pd.merge groups rows by key (see _MERGE_GROUPS_BY_KEY)
+    """
+    competitions = raw_data.competitions
+    result_columns = set(raw_data.results.columns) - {'competitionId'}
+    competition_columns = set(competitions.columns) - {'id'}
+
+    return _MERGE_GROUPS_BY_KEY and competitions['id'].is_unique and len(result_columns & competition_columns) == 0
+
+
+def _filter_fused(raw_data: RawData, events: Sequence[EventId], sink: Optional[Sink],
+    minimum_results_per_person: int = 2) -> Dict[EventId, DataFrame]:
+    """
+    Same output as the filtering steps, without building intermediate dataframes:
+    rows are selected by position, competitions are looked up by position in the
+    competitions table instead of being merged, rows are sorted once on integer keys,
+    then each output column is built with a single take.
+    Work on rows is made once for all the events, which are split at the end
+    """
+    results = raw_data.results
+    competitions = raw_data.competitions
+
+    # selection is reported as the steps it replaces, with the same rows counts
+    with instrumentation.timed(sink, instrumentation.STAGE, stage=_filter_on_event.__name__, rows_in=len(results)) as data:
+        positions, event_numbers = _select_events(results, events)
+        data['rows_out'] = len(positions)
+
+    with instrumentation.timed(sink, instrumentation.STAGE, stage=_remove_invalid_results.__name__, rows_in=len(positions)) as data:
+        positions, event_numbers = _select_valid_results(results, positions, event_numbers)
+        data['rows_out'] = len(positions)
+
+    with instrumentation.timed(sink, instrumentation.STAGE, stage=_remove_persons_with_insufficient_results.__name__,
+        rows_in=len(positions)) as data:
+        positions, event_numbers, person_codes = _select_persons(results, positions, event_numbers, len(events),
+            minimum_results_per_person)
+        data['rows_out'] = len(positions)
+
+    with instrumentation.timed(sink, instrumentation.STAGE, stage=_join_competitions.__name__, rows_in=len(positions)) as data:
+        positions, event_numbers, person_codes, competition_positions = _join_competitions(
+            results, competitions, positions, event_numbers, person_codes)
+        data['rows_out'] = len(positions)
+
+    with instrumentation.timed(sink, instrumentation.STAGE, stage=_sort_and_build.__name__, rows_in=len(positions)) as data:
+        date_ranks, competition_dates = _competition_dates(competitions, competition_positions)
+
+        # split by event, rows of an event keeping their order
+        event_order = np.argsort(event_numbers, kind='stable')
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(event_numbers, minlength=len(events)))])
+
+        filtered_results = {}
+        for number, event_id in enumerate(events):
+            rows = event_order[bounds[number]:bounds[number + 1]]
+            filtered_results[event_id] = _sort_and_build(results, competitions, positions[rows], person_codes[rows],
+                competition_positions[rows], date_ranks, competition_dates)
+
+        data['rows_out'] = sum(len(event_results) for event_results in filtered_results.values())
+
+    return filtered_results
+
+
+def _select_events(results: DataFrame, events: Sequence[EventId]) -> Tuple[NDArray[np.int64], NDArray[np.int64]]:
+    """
+    Positions of the results of the events, with the number of the event of each result (in events)
+    """
+    if len(events) == 1:
+        positions = np.flatnonzero((results['eventId'] == events[0].value).to_numpy())
+        return positions, np.zeros(len(positions), dtype=np.int64)
+
+    event_numbers = _lookup(results['eventId'], pd.Index([event_id.value for event_id in events]))
+    positions = np.flatnonzero(event_numbers >= 0)
+
+    return positions, event_numbers[positions]
+
+
+def _select_valid_results(results: DataFrame, positions: NDArray[np.int64],
+    event_numbers: NDArray[np.int64]) -> Tuple[NDArray[np.int64], NDArray[np.int64]]:
+    """
+    Selected results which are not DNF
+    """
+    valid = results['best'].to_numpy()[positions] != -1
+
+    return positions[valid], event_numbers[valid]
+
+
+def _select_persons(results: DataFrame, positions: NDArray[np.int64], event_numbers: NDArray[np.int64], events_count: int,
+    minimum_results_per_person: int) -> Tuple[NDArray[np.int64], NDArray[np.int64], NDArray[np.int64]]:
+    """
+    Selected results of persons having enough of them in their event, with the code of each person (see _codes)
+    """
+    person_codes, persons_count = _codes(results['personId'].iloc[positions])
+    # missing ids are never removed and sorted last, as sort_values() does
+    person_codes = np.where(person_codes < 0, persons_count, person_codes)
+
+    # results per event and person
+    keys = event_numbers * (persons_count + 1) + person_codes
+    counts = np.bincount(keys, minlength=events_count * (persons_count + 1))
+    counts[persons_count::persons_count + 1] = minimum_results_per_person
+    kept = counts[keys] >= minimum_results_per_person
+
+    return positions[kept], event_numbers[kept], person_codes[kept]
+
+
+def _codes(ids: pd.Series) -> Tuple[NDArray[np.int64], int]:
+    """
+    Integer code of each id, codes being in the order sort_values() gives to the ids, and number of distinct codes.
+    Missing ids have code -1
+    """
+    if isinstance(ids.dtype, pd.CategoricalDtype):
+        # categoricals are sorted in the order of their categories
+        return ids.cat.codes.to_numpy(dtype=np.int64), len(ids.cat.categories)
+
+    codes, uniques = pd.factorize(ids, sort=True)
+    return codes.astype(np.int64), len(uniques)
+
+
+def _lookup(ids: pd.Series, index: pd.Index) -> NDArray[np.int64]:
+    """
+    Position of each id in the index, -1 if not found. Distinct ids only are looked up
+    """
+    if isinstance(ids.dtype, pd.CategoricalDtype):
+        codes = ids.cat.codes.to_numpy(dtype=np.int64)
+        uniques = ids.cat.categories
+    else:
+        codes, uniques = pd.factorize(ids)
+
+    # missing ids (code -1) take the last position: -1, not found
+    positions = np.append(index.get_indexer(uniques), -1).astype(np.int64) # type: NDArray[np.int64]
+    return positions[np.asarray(codes, dtype=np.int64)]
+
+
+def _join_competitions(results: DataFrame, competitions: DataFrame, positions: NDArray[np.int64], event_numbers: NDArray[np.int64],
+    person_codes: NDArray[np.int64]) -> Tuple[NDArray[np.int64], NDArray[np.int64], NDArray[np.int64], NDArray[np.int64]]:
+    """
+    Position of the competition of each result in the competitions table, results without a competition
+    being removed (inner join)
+    """
+    competition_positions = _lookup(results['competitionId'].iloc[positions], pd.Index(competitions['id']))
+
+    found = competition_positions >= 0
+
+    return positions[found], event_numbers[found], person_codes[found], competition_positions[found]
+
+
+def _competition_dates(competitions: DataFrame, competition_positions: NDArray[np.int64]) -> Tuple[NDArray[np.int64], NDArray[Any]]:
+    """
+    Rank of the date of each competition, and date of each competition having results (NaT for the others)
+    """
+    dates = competitions[['YEAR', 'MONTH', 'DAY']].to_numpy(dtype=np.int64)
+    date_ranks = np.unique((dates[:, 0] * 100 + dates[:, 1]) * 100 + dates[:, 2], return_inverse=True)[1]
+
+    # dates of the competitions having results only, as the steps convert them
+    used = np.bincount(competition_positions, minlength=len(competitions)) > 0
+    competition_dates = np.full(len(competitions), np.datetime64('NaT'), dtype='datetime64[ns]')
+    competition_dates[used] = pd.to_datetime(competitions[['YEAR', 'MONTH', 'DAY']][used]).to_numpy()
+
+    return date_ranks, competition_dates
+
+
+def _sort_and_build(results: DataFrame, competitions: DataFrame, positions: NDArray[np.int64], person_codes: NDArray[np.int64],
+    competition_positions: NDArray[np.int64], date_ranks: NDArray[np.int64], competition_dates: NDArray[Any]) -> DataFrame:
+    """
+    Sort results of one event as sort_values() on the output of pd.merge() and build the output columns
+    """
+    competitions_count = len(competitions)
+
+    # pd.merge() groups results by competition, in order of first appearance of the competitions
+    # (within a competition, results keep their order)
+    first_appearances = np.full(competitions_count, len(positions), dtype=np.int64)
+    first_appearances[competition_positions[::-1]] = np.arange(len(positions) - 1, -1, -1)
+    merge_ranks = np.empty(competitions_count, dtype=np.int64)
+    merge_ranks[np.argsort(first_appearances, kind='stable')] = np.arange(competitions_count)
+
+    # sort_values() is stable: sort by person, date then merge order, on a single integer key
+    competition_keys = date_ranks * competitions_count + merge_ranks
+    keys = person_codes * (competitions_count * competitions_count) + competition_keys[competition_positions]
+    order = np.argsort(keys, kind='stable')
+
+    # index of the pd.merge() output, kept by sort_values()
+    merge_positions = np.empty(len(positions), dtype=np.int64)
+    # small integers are sorted with a radix sort
+    row_merge_ranks = merge_ranks[competition_positions].astype(np.min_scalar_type(competitions_count))
+    merge_positions[np.argsort(row_merge_ranks, kind='stable')] = np.arange(len(positions))
+
+    positions = positions[order]
+    competition_positions = competition_positions[order]
+
+    data = {}
+    for column in results.columns:
+        if column not in ('eventId', 'competitionId'):
+            data[column] = results[column].iloc[positions].array
+    data['best'] = data['best'] / 100
+
+    for column in competitions.columns:
+        if column not in ('id', 'YEAR', 'MONTH', 'DAY'):
+            data[column] = competitions[column].iloc[competition_positions].array
+
+    data['date'] = competition_dates[competition_positions]
+
+    return pd.DataFrame(data, index=pd.Index(merge_positions[order]))
+
+
+def _run_step(sink: Optional[Sink], step: Callable[..., DataFrame], results: DataFrame, *arguments: Any) -> DataFrame:
+    if sink is None:
+        return step(results, *arguments)
+
+    start_time = time.perf_counter()
+    step_results = step(results, *arguments)
+    instrumentation.emit(sink, instrumentation.STAGE, time.perf_counter() - start_time,
+        stage=step.__name__, rows_in=len(results), rows_out=len(step_results))
+
+    return step_results
+
+
 def _filter_on_event(results: DataFrame, event_id: EventId) -> DataFrame:
     """
     Filter on event and drop unneeded eventId column
@@ -60,9 +327,7 @@ def _remove_invalid_results(results: DataFrame) -> DataFrame:
 def _convert_results_to_seconds(results: DataFrame) -> DataFrame:
     # enven though floats take more memory than integers it won't matter
     # because using NaN and interpolating data will make float columns anyway
-    results['best'] = results['best'] / 100
-
-    return results
+    return results.assign(best=results['best'] / 100)
 
 
 def _remove_persons_with_insufficient_results(results: DataFrame, minimum_results_per_person: int) -> DataFrame:
@@ -101,6 +366,6 @@ def _convert_year_month_day_to_date(results: DataFrame) -> DataFrame:
     Convert year, month and day to date and drop unneeded YEAR, MONTH, DAY columns
     """
 
-    results['date'] = pd.to_datetime(results[['YEAR', 'MONTH', 'DAY']])
+    results = results.assign(date=pd.to_datetime(results[['YEAR', 'MONTH', 'DAY']]))
     
     return results.drop(columns=['YEAR', 'MONTH', 'DAY'])
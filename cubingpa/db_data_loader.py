@@ -1,41 +1,220 @@
+import os
+import asyncio
+import functools
+import threading
 import pandas as pd
 from pandas import DataFrame
-from sqlalchemy import create_engine
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine, text
 from sqlalchemy.engine import Engine
+from typing import Any, Dict, List, Optional, Tuple
 
-from cubingpa.config import db_config
+from cubingpa import utils
+from cubingpa.events import EventId
 from cubingpa.raw_data import RawData
 
 
-def load() -> RawData:
+# compact dtypes applied to each chunk when streaming results
+_RESULTS_DTYPES = {'personId': 'category', 'eventId': 'category', 'best': 'int32', 'competitionId': 'category'}
+
+_RESULTS_COLUMNS = ['personId', 'eventId', 'best', 'competitionId']
+
+# engines of the current process by URL, reused across calls: each one holds a pool of connections
+_engines = {} # type: Dict[Tuple[int, str], Engine]
+_engines_lock = threading.Lock()
+
+
+def load(event_id: Optional[EventId] = None, chunksize: Optional[int] = None, url: Optional[str] = None,
+    partitions: int = 1) -> RawData:
     """
     Load raw SQL tables
 
+    Results and Competitions tables are fetched concurrently, each query on its own connection
+    of a pooled engine reused across calls (see get_engine()). Results can also be fetched
+    as several slices of ids, all fetched concurrently.
+
+    Parameters
+    ----------
+    event_id: EventId, optional
+        If given, only valid results of this event are read from the Results table
+        (filtering done by the DB). Default: None, all results are read
+    chunksize: int, optional
+        If given, results are streamed by chunks of this number of rows, each chunk being converted to
+        compact dtypes (ids as categoricals) then appended, so that memory is bounded by the compact
+        results plus one chunk. Default: None, results are read at once
+    url: str, optional
+        SQLAlchemy URL of the DB, ex: 'sqlite:///WCA.db' for a local copy. Default: None, URL built
+        from cubingpa.config.db_config
+    partitions: int, optional
+        Number of slices of Results ids fetched concurrently. Default: 1, a single query
+
     Returns
     -------
     RawData
     """
-    engine = _get_db_engine()
-    results = _get_raw_results(engine)
-    competitions = _get_raw_competitions(engine)
+    engine = get_engine(url)
+
+    id_ranges = _get_id_ranges(engine, partitions) if partitions > 1 else [None]
+
+    with ThreadPoolExecutor(max_workers=len(id_ranges) + 1) as executor:
+        competitions_future = executor.submit(_get_raw_competitions, engine)
+        results_futures = [executor.submit(_get_raw_results, engine, event_id, chunksize, id_range) for id_range in id_ranges]
+
+        results_parts = [future.result() for future in results_futures]
+        competitions = competitions_future.result()
+
+    # empty slices have no dtypes, they would turn numbers into objects
+    results_parts = [part for part in results_parts if len(part) > 0] or results_parts[:1]
+
+    if len(results_parts) == 1:
+        results = results_parts[0]
+    elif chunksize is None:
+        results = pd.concat(results_parts, ignore_index=True)
+    else:
+        # keeps categorical columns categorical
+        results = utils.concat_chunks(results_parts, _RESULTS_COLUMNS)
+
     return RawData(results, competitions)
 
 
-def _get_db_engine() -> Engine:
-    return create_engine(f'{db_config.protocol}://{db_config.login}:{db_config.password}@{db_config.host}:{db_config.port}/{db_config.name}', echo=False)
+async def load_async(event_id: Optional[EventId] = None, chunksize: Optional[int] = None, url: Optional[str] = None,
+    partitions: int = 1) -> RawData:
+    """
+    Same as load(), without blocking the event loop: loading runs in the loop's default executor.
+    See load() for the parameters
+
+    Returns
+    -------
+    RawData
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(load, event_id, chunksize, url, partitions))
+
 
+def fingerprint(url: Optional[str] = None) -> str:
+    """
+    Fingerprint of the DB content, changing whenever rows are added to or removed from the tables
 
-def _get_raw_results(db_engine: Engine) -> DataFrame:
-    # read the whole table without SQL filtering
+    Parameters
+    ----------
+    url: str, optional
+        SQLAlchemy URL of the DB. Default: None, URL built from cubingpa.config.db_config
+
+    Returns
+    -------
+    str
+        Row counts and max ids of the Results and Competitions tables
+    """
+    engine = get_engine(url)
+    results = _get_table_stats(engine, 'Results')
+    competitions = _get_table_stats(engine, 'Competitions')
+    return f'db:Results:{results}:Competitions:{competitions}'
+
+
+def get_engine(url: Optional[str] = None) -> Engine:
+    """
+    Engine of the DB, created on first use then reused by the calls of the current process
+    (a child process creates its own: pooled connections can't be shared across processes)
+
+    Parameters
+    ----------
+    url: str, optional
+        SQLAlchemy URL of the DB. Default: None, URL built from cubingpa.config.db_config
+
+    Returns
+    -------
+    Engine
+    """
+    if url is None:
+        url = _get_db_url()
+
+    key = (os.getpid(), url)
+
+    with _engines_lock:
+        if key not in _engines:
+            _engines[key] = _create_engine(url)
+
+        return _engines[key]
+
+
+def _create_engine(url: str) -> Engine:
+    options = {'echo': False} # type: Dict[str, Any]
+
+    # SQLite engines use their own pool classes, without size settings
+    if not url.startswith('sqlite'):
+        # enough connections for the concurrent queries of load(), checked before use since engines are long-lived
+        options.update(pool_size=8, max_overflow=8, pool_pre_ping=True)
+
+    return create_engine(url, **options)
+
+
+def _get_table_stats(db_engine: Engine, table_name: str) -> str:
+    stats_query = f"SELECT COUNT(*) AS row_count, MAX(id) AS max_id FROM {table_name}"
+    stats = pd.read_sql_query(stats_query, db_engine)
+    return f'{stats.loc[0, "row_count"]}/{stats.loc[0, "max_id"]}'
+
+
+def _get_db_url() -> str:
+    # imported on first connection: modules using other sources don't need a DB configuration
+    from cubingpa.config import db_config
+
+    return f'{db_config.protocol}://{db_config.login}:{db_config.password}@{db_config.host}:{db_config.port}/{db_config.name}'
+
+
+def _get_id_ranges(db_engine: Engine, partitions: int) -> List[Optional[Tuple[int, int]]]:
+    """
+    Contiguous ranges of Results ids (first included, last excluded), of similar sizes, covering all the ids
+    """
+    stats = pd.read_sql_query("SELECT MIN(id) AS min_id, MAX(id) AS max_id FROM Results", db_engine)
+    min_id, max_id = stats.loc[0, 'min_id'], stats.loc[0, 'max_id']
+
+    # empty table
+    if pd.isna(min_id):
+        return [None]
+
+    min_id, max_id = int(min_id), int(max_id) + 1
+    partitions = min(partitions, max_id - min_id)
+    bounds = [min_id + (max_id - min_id) * number // partitions for number in range(partitions + 1)]
+
+    return [(bounds[number], bounds[number + 1]) for number in range(partitions)]
+
+
+def _get_raw_results(db_engine: Engine, event_id: Optional[EventId] = None, chunksize: Optional[int] = None,
+    id_range: Optional[Tuple[int, int]] = None) -> DataFrame:
+    # by default read the whole table without SQL filtering
     # pandas filtering is faster, and it allows reusing the same mechanisms for csv input
     results_query = "SELECT personId, eventId, best, competitionId FROM Results"
-    
-    return pd.read_sql_query(results_query, db_engine)
+    conditions = [] # type: List[str]
+    params = {} # type: Dict[str, Any]
+
+    # opt-in: when only one event is processed, most of the table doesn't need to go over the wire
+    # data_filter still applies the same filters, so results are identical
+    if event_id is not None:
+        conditions.append("eventId = :event_id AND best != -1")
+        params['event_id'] = event_id.value
+
+    # slice of the table fetched concurrently with the others, slices being concatenated in ids order
+    if id_range is not None:
+        conditions.append("id >= :first_id AND id < :end_id")
+        params['first_id'], params['end_id'] = id_range
+        results_query += " WHERE " + " AND ".join(conditions) + " ORDER BY id"
+    elif len(conditions) > 0:
+        results_query += " WHERE " + " AND ".join(conditions)
+
+    if chunksize is None:
+        return pd.read_sql_query(text(results_query), db_engine, params=params)
+
+    # server-side cursor: rows are fetched chunk by chunk, instead of the whole result being buffered by the driver
+    with db_engine.connect().execution_options(stream_results=True) as connection:
+        # chunks are compacted and concatenated as they are read: the whole result is never held as objects
+        chunks = pd.read_sql_query(text(results_query), connection, params=params, chunksize=chunksize)
+
+        return utils.concat_chunks((chunk.astype(_RESULTS_DTYPES) for chunk in chunks), _RESULTS_COLUMNS)
 
 
 def _get_raw_competitions(db_engine: Engine) -> DataFrame:
     # read the whole table without SQL filtering
     # pandas filtering is faster, and it allows reusing the same mechanisms for csv input
     competitions_query = "SELECT id, YEAR, MONTH, DAY FROM Competitions"
-    
+
     return pd.read_sql_query(competitions_query, db_engine)
@@ -0,0 +1,96 @@
+import os
+import csv
+import hashlib
+import zipfile
+import pandas as pd
+from pandas import DataFrame
+from typing import Dict
+
+from cubingpa import utils
+from cubingpa.raw_data import RawData
+
+
+RESULTS_FILE_NAME = 'WCA_export_Results.tsv'
+COMPETITIONS_FILE_NAME = 'WCA_export_Competitions.tsv'
+
+DEFAULT_CHUNKSIZE = 1000000
+
+_HASH_BLOCK_SIZE = 1 << 20
+
+# only the columns needed by cubingpa.data_filter, with the most compact dtypes able to hold them
+# ids repeated all over the table are read as categories, so that each distinct string is stored once
+_RESULTS_DTYPES = {'personId': 'category', 'eventId': 'category', 'best': 'int32', 'competitionId': 'category'}
+_COMPETITIONS_DTYPES = {'id': 'object', 'year': 'int16', 'month': 'int8', 'day': 'int8'}
+
+# the export uses lower case column names where the DB columns are upper case
+_COMPETITIONS_COLUMNS_RENAMING = {'year': 'YEAR', 'month': 'MONTH', 'day': 'DAY'}
+
+
+def load(export_path: str, chunksize: int = DEFAULT_CHUNKSIZE) -> RawData:
+    """
+    Load raw tables from the official WCA TSV export zip, without restoring it in a DB
+
+    Parameters
+    ----------
+    export_path: str
+        Path to the WCA export zip file (WCA_export.tsv.zip)
+    chunksize: int, optional
+        Number of rows parsed at once. Default: 1000000
+
+    Returns
+    -------
+    RawData
+        Same layout as the one returned by cubingpa.db_data_loader.load()
+    """
+    with zipfile.ZipFile(export_path) as export_zip:
+        results = _get_raw_results(export_zip, chunksize)
+        competitions = _get_raw_competitions(export_zip, chunksize)
+
+    return RawData(results, competitions)
+
+
+def fingerprint(export_path: str) -> str:
+    """
+    Fingerprint of the export file, changing whenever a new export is downloaded
+
+    Parameters
+    ----------
+    export_path: str
+        Path to the WCA export zip file
+
+    Returns
+    -------
+    str
+        Modification time, size and SHA-256 hash of the file
+    """
+    file_hash = hashlib.sha256()
+
+    with open(export_path, 'rb') as export_file:
+        for block in iter(lambda: export_file.read(_HASH_BLOCK_SIZE), b''):
+            file_hash.update(block)
+
+    stat = os.stat(export_path)
+    return f'export:{stat.st_mtime_ns}:{stat.st_size}:{file_hash.hexdigest()}'
+
+
+def _get_raw_results(export_zip: zipfile.ZipFile, chunksize: int) -> DataFrame:
+    return _read_tsv(export_zip, RESULTS_FILE_NAME, _RESULTS_DTYPES, chunksize)
+
+
+def _get_raw_competitions(export_zip: zipfile.ZipFile, chunksize: int) -> DataFrame:
+    competitions = _read_tsv(export_zip, COMPETITIONS_FILE_NAME, _COMPETITIONS_DTYPES, chunksize)
+
+    return competitions.rename(columns=_COMPETITIONS_COLUMNS_RENAMING)
+
+
+def _read_tsv(export_zip: zipfile.ZipFile, file_name: str, dtypes: Dict[str, str], chunksize: int) -> DataFrame:
+    """
+    Stream a TSV file from the zip, parsing only the columns in dtypes
+    """
+    with export_zip.open(file_name) as tsv_file:
+        # free text columns (names, information...) contain unbalanced quotes: never interpret them
+        reader = pd.read_csv(tsv_file, sep='\t', usecols=list(dtypes), dtype=dtypes,
+            quoting=csv.QUOTE_NONE, na_filter=False, chunksize=chunksize)
+
+        # chunks are appended as they are parsed, only one of them being held at a time
+        return utils.concat_chunks(reader, list(dtypes))
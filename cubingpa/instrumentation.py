@@ -0,0 +1,142 @@
+import time
+import pandas as pd
+from pandas import DataFrame
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional
+
+
+# processing stage (data_filter step, ReferenceProcessor phase...), data: stage, plus rows_in/rows_out for filter steps
+STAGE = 'stage'
+# alignment of one person by ReferenceProcessor, data: position, person_id
+PERSON = 'person'
+# reference change by ReferenceProcessor, data: case (1: no interpolation, 2: interpolation), reference_id
+REFERENCE_SWITCH = 'reference_switch'
+# curve extended by ReferenceProcessor to reach a lower time, data: curve_id, days (number of days added)
+INTERPOLATION = 'interpolation'
+
+
+class Event(NamedTuple):
+    """
+    Instrumentation event
+
+    Attributes
+    ----------
+    name: str
+        Kind of event: STAGE, PERSON, REFERENCE_SWITCH or INTERPOLATION
+    seconds: float
+        Duration of what the event reports, 0 for instantaneous events
+    data: Dict[str, Any]
+        Event details, depending on the kind of event
+    """
+    name: str
+    seconds: float
+    data: Dict[str, Any]
+
+
+# receives events as they happen
+Sink = Callable[[Event], None]
+
+
+def emit(sink: Optional[Sink], name: str, seconds: float = 0.0, **data: Any) -> None:
+    """
+    Send an event to the sink, if any
+    """
+    if sink is not None:
+        sink(Event(name, seconds, data))
+
+
+@contextmanager
+def timed(sink: Optional[Sink], name: str, **data: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Send an event with the duration of the enclosed block. The yielded dictionary
+    can be completed with data only known at the end of the block
+    """
+    start_time = time.perf_counter()
+    yield data
+    emit(sink, name, time.perf_counter() - start_time, **data)
+
+
+class ProfileCollector:
+    """
+    Sink keeping all the events, summarizing them into a profile report
+
+    Examples
+    --------
+    >>> collector = ProfileCollector()
+    >>> filtered_results = data_filter.filter(raw_data, EventId.E_444_BF, sink=collector)
+    >>> ReferenceProcessor(filtered_results, sink=collector).process_average()
+    >>> print(collector.report())
+    """
+
+    def __init__(self) -> None:
+        self._events = [] # type: List[Event]
+
+    def __call__(self, event: Event) -> None:
+        self._events.append(event)
+
+    @property
+    def events(self) -> List[Event]:
+        return self._events
+
+    def clear(self) -> None:
+        self._events = []
+
+    def stages(self) -> DataFrame:
+        """
+        Stages in order of completion
+
+        Returns
+        -------
+        Dataframe
+            One row per stage: stage, seconds, rows_in and rows_out (NaN if not reported)
+        """
+        rows = [dict(event.data, seconds=event.seconds) for event in self._events if event.name == STAGE]
+        return pd.DataFrame(rows, columns=['stage', 'seconds', 'rows_in', 'rows_out'])
+
+    def summary(self) -> DataFrame:
+        """
+        Count and duration of the events per kind (stages being detailed)
+
+        Returns
+        -------
+        Dataframe
+            One row per kind of event: count, total_seconds, mean_seconds and max_seconds
+        """
+        events = pd.DataFrame({
+            'event': [_event_label(event) for event in self._events],
+            'seconds': [event.seconds for event in self._events]})
+
+        summary = events.groupby('event', sort=False)['seconds'].agg(['count', 'sum', 'mean', 'max'])
+
+        return summary.rename(columns={'sum': 'total_seconds', 'mean': 'mean_seconds', 'max': 'max_seconds'})
+
+    def report(self) -> str:
+        """
+        Human readable profile: stages, slowest persons, reference switches and interpolations
+        """
+        lines = ['Stages:', self.stages().to_string(index=False), '']
+
+        persons = [event for event in self._events if event.name == PERSON]
+        if len(persons) > 0:
+            slowest = sorted(persons, key=lambda event: event.seconds, reverse=True)[:5]
+            lines.append(f'Persons: {len(persons)}, {round(sum(event.seconds for event in persons), 3)} seconds, slowest:')
+            lines += [f"  {event.data['person_id']} (position {event.data['position']}): {round(event.seconds, 6)} seconds" for event in slowest]
+
+        switches = [event for event in self._events if event.name == REFERENCE_SWITCH]
+        cases = [event.data['case'] for event in switches]
+        lines.append(f'Reference switches: {cases.count(1)} without interpolation (CASE 1), {cases.count(2)} with interpolation (CASE 2)')
+
+        interpolations = [event for event in self._events if event.name == INTERPOLATION]
+        if len(interpolations) > 0:
+            days = [event.data['days'] for event in interpolations]
+            lines.append(f'Interpolations: {len(interpolations)}, {sum(days)} days added (max {max(days)}), '
+                f'{round(sum(event.seconds for event in interpolations), 3)} seconds')
+
+        return '\n'.join(lines)
+
+
+def _event_label(event: Event) -> str:
+    if event.name == STAGE:
+        return f"{STAGE}: {event.data['stage']}"
+
+    return event.name
@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from concurrent.futures import ProcessPoolExecutor
+from numpy.typing import NDArray
+from typing import Any, List
+
+from cubingpa import utils
+
+
+# persons preprocessed by one worker task, see preprocess(): enough work to pay for sending the rows
+_MIN_PERSONS_PER_CHUNK = 1000
+
+
+class PersonCurves:
+    """
+    Preprocessed results of every person (one result per date, progressing solves only),
+    stored as flat arrays: the curve of the person at position i is made of
+    dates[offsets[i]:offsets[i + 1]] and times[offsets[i]:offsets[i + 1]], in ascending date order.
+
+    Parameters
+    ----------
+    person_ids: Index
+        Ids of the persons, in the order of their curves
+    offsets: ndarray
+        Start of each person's curve in the flat arrays, followed by the total length
+    dates: ndarray
+        Flat datetime64 array of the curves dates
+    times: ndarray
+        Flat float array of the curves times
+    """
+
+    def __init__(self, person_ids: pd.Index, offsets: NDArray[np.int64], dates: NDArray[Any], times: NDArray[np.float64]) -> None:
+        self._person_ids = person_ids
+        self._offsets = offsets
+        self._dates = dates
+        self._times = times
+
+    @property
+    def person_ids(self) -> pd.Index:
+        return self._person_ids
+
+    @property
+    def offsets(self) -> NDArray[np.int64]:
+        return self._offsets
+
+    @property
+    def dates(self) -> NDArray[Any]:
+        return self._dates
+
+    @property
+    def times(self) -> NDArray[np.float64]:
+        return self._times
+
+    def __len__(self) -> int:
+        return len(self._person_ids)
+
+    def length(self, person_id: str) -> int:
+        """
+        Number of points of a person's curve
+        """
+        position = self._person_ids.get_loc(person_id)
+        return int(self._offsets[position + 1] - self._offsets[position])
+
+    def get_dates(self, person_id: str) -> NDArray[Any]:
+        position = self._person_ids.get_loc(person_id)
+        return self._dates[self._offsets[position]:self._offsets[position + 1]]
+
+    def get_times(self, person_id: str) -> NDArray[np.float64]:
+        position = self._person_ids.get_loc(person_id)
+        return self._times[self._offsets[position]:self._offsets[position + 1]]
+
+    def subset(self, person_ids: pd.Index) -> 'PersonCurves':
+        """
+        Curves of the given persons, in the given order
+        """
+        positions = self._person_ids.get_indexer(person_ids)
+        starts = self._offsets[positions]
+        lengths = self._offsets[positions + 1] - starts
+
+        offsets = np.zeros(len(positions) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        # position of each point in the flat arrays
+        indexes = np.repeat(starts - offsets[:-1], lengths) + np.arange(offsets[-1])
+
+        return PersonCurves(pd.Index(person_ids), offsets, self._dates[indexes], self._times[indexes])
+
+    def get_dataframe(self, person_id: str) -> DataFrame:
+        """
+        Person's curve as a dataframe with dates as an index and the person id as the only column
+        """
+        dates_index = pd.DatetimeIndex(self.get_dates(person_id), name='date')
+        return pd.DataFrame({person_id: self.get_times(person_id)}, index=dates_index)
+
+
+def preprocess(filtered_results: DataFrame, workers: int = 1) -> PersonCurves:
+    """
+    Preprocess results of all persons at once: keep the best solve of each date,
+    then remove solves not making progress
+
+    Persons don't depend on each other: with several workers, persons are split into ranges
+    (in person id order) preprocessed in worker processes, curves of the ranges being
+    concatenated in the same order. Output is the same whatever the number of workers.
+
+    Parameters
+    ----------
+    filtered_results: Dataframe
+        Results filtered on one event, sorted and cleaned by cubingpa.data_filter
+    workers: int, optional
+        Number of worker processes. Default: 1, preprocessing in the current process
+
+    Returns
+    -------
+    PersonCurves
+        Curves of all the persons, in person id order
+    """
+    chunks = _split_persons(filtered_results, workers)
+
+    if len(chunks) <= 1:
+        return _preprocess(filtered_results)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # map() returns the chunks curves in order of submission
+        return _concatenate(list(executor.map(_preprocess, chunks)))
+
+
+def _preprocess(filtered_results: DataFrame) -> PersonCurves:
+    # remove duplicate dates by keeping best solve
+    # sorting groups makes each person's rows contiguous, in ascending date order
+    results = filtered_results.groupby(['personId', 'date'], observed=True, sort=True)['best'].min().reset_index()
+
+    results = utils.remove_not_progressing_solves_grouped(results, 'personId', 'best')
+
+    sizes = results.groupby('personId', observed=True, sort=True).size()
+    offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+    np.cumsum(sizes.to_numpy(), out=offsets[1:])
+
+    # ids as plain labels, even if encoded
+    person_ids = pd.Index(np.asarray(sizes.index))
+
+    return PersonCurves(person_ids, offsets, results['date'].to_numpy(), results['best'].to_numpy(dtype=np.float64))
+
+
+def _split_persons(filtered_results: DataFrame, workers: int) -> List[DataFrame]:
+    """
+    Rows of consecutive ranges of persons, in the order persons are sorted by groupby(sort=True):
+    categories order for encoded ids, ids order otherwise
+    """
+    person_ids = filtered_results['personId']
+
+    if isinstance(person_ids.dtype, pd.CategoricalDtype):
+        ranks = person_ids.cat.codes.to_numpy(dtype=np.int64)
+    else:
+        ranks = pd.factorize(person_ids, sort=True)[0].astype(np.int64)
+
+    # ranks of the persons having rows: with encoded ids, codes of filtered out persons are skipped
+    present = np.flatnonzero(np.bincount(ranks, minlength=1) > 0)
+    chunks_count = min(workers, len(present) // _MIN_PERSONS_PER_CHUNK)
+
+    if chunks_count <= 1:
+        return [filtered_results]
+
+    # first rank of each range, then one past the last rank
+    bounds = present[np.arange(chunks_count) * len(present) // chunks_count].tolist() + [int(present[-1]) + 1]
+    chunk_numbers = np.searchsorted(bounds, ranks, side='right') - 1
+    # stable: rows keep their order within a chunk
+    order = np.argsort(chunk_numbers, kind='stable')
+    ends = np.cumsum(np.bincount(chunk_numbers, minlength=chunks_count))
+    starts = np.concatenate([[0], ends[:-1]])
+
+    return [filtered_results.iloc[order[start:end]] for start, end in zip(starts, ends)]
+
+
+def _concatenate(chunks: List[PersonCurves]) -> PersonCurves:
+    offsets = [np.zeros(1, dtype=np.int64)]
+    for chunk in chunks:
+        offsets.append(chunk.offsets[1:] + offsets[-1][-1])
+
+    person_ids = pd.Index(np.concatenate([np.asarray(chunk.person_ids) for chunk in chunks]))
+
+    return PersonCurves(person_ids, np.concatenate(offsets), np.concatenate([chunk.dates for chunk in chunks]),
+        np.concatenate([chunk.times for chunk in chunks]))
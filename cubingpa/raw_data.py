@@ -1,4 +1,6 @@
+import numpy as np
 import pandas as pd
+from typing import Optional
 
 class RawData:
     """
@@ -10,11 +12,22 @@ class RawData:
         Dataframe holding the Results table data
     competitions: Dataframe
         Dataframe holding the Competitions table data
+    person_ids: Index
+        Dictionary of person ids, when encoded (None otherwise)
+    event_ids: Index
+        Dictionary of event ids, when encoded (None otherwise)
+    competition_ids: Index
+        Dictionary of competition ids, shared by results and competitions, when encoded (None otherwise)
     """
 
-    def __init__(self, results: pd.DataFrame, competitions: pd.DataFrame) -> None:
+    def __init__(self, results: pd.DataFrame, competitions: pd.DataFrame, person_ids: Optional[pd.Index] = None,
+        event_ids: Optional[pd.Index] = None, competition_ids: Optional[pd.Index] = None) -> None:
         self._results = results
         self._competitions = competitions
+        # given for data already encoded by encode(), ex: when loaded from a snapshot
+        self._person_ids = person_ids
+        self._event_ids = event_ids
+        self._competition_ids = competition_ids
 
     @property
     def results(self) -> pd.DataFrame:
@@ -24,3 +37,57 @@ class RawData:
     def competitions(self) -> pd.DataFrame:
         return self._competitions
 
+    @property
+    def person_ids(self) -> Optional[pd.Index]:
+        return self._person_ids
+
+    @property
+    def event_ids(self) -> Optional[pd.Index]:
+        return self._event_ids
+
+    @property
+    def competition_ids(self) -> Optional[pd.Index]:
+        return self._competition_ids
+
+    @property
+    def encoded(self) -> bool:
+        return self._person_ids is not None
+
+    def encode(self) -> 'RawData':
+        """
+        Encode personId, eventId and competitionId columns as categoricals.
+        Each id is then stored once in a sorted dictionary, and rows only hold integer codes.
+        Competitions id column shares the competitionId dictionary, so that joins are made on codes.
+
+        Filtering and processing work the same on encoded data, ids are decoded when used as labels
+        (ex: columns of the processed results).
+
+        Returns
+        -------
+        RawData
+            Encoded data (self if already encoded)
+        """
+        if self.encoded:
+            return self
+
+        results = self._results
+        competitions = self._competitions
+
+        # sorted dictionaries: sorting on codes is then the same as sorting on ids
+        person_ids = _sorted_unique(results['personId'])
+        event_ids = _sorted_unique(results['eventId'])
+        competition_ids = _sorted_unique(results['competitionId'], competitions['id'])
+
+        results = results.assign(
+            personId=pd.Categorical(results['personId'], categories=person_ids),
+            eventId=pd.Categorical(results['eventId'], categories=event_ids),
+            competitionId=pd.Categorical(results['competitionId'], categories=competition_ids))
+        competitions = competitions.assign(id=pd.Categorical(competitions['id'], categories=competition_ids))
+
+        return RawData(results, competitions, person_ids, event_ids, competition_ids)
+
+
+def _sorted_unique(*columns: pd.Series) -> pd.Index:
+    # np.asarray() turns categoricals (ex: from loaders) back to their values
+    uniques = [np.asarray(column.unique()) for column in columns]
+    return pd.Index(np.unique(np.concatenate(uniques)))
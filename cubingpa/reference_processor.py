@@ -1,13 +1,25 @@
 import math
 import time
+from collections import OrderedDict
 import numpy as np
 import pandas as pd
-from datetime import datetime
-from datetime import timedelta
-from typing import List, Tuple, Any, cast
-from pandas import DataFrame, Series
+from numpy.typing import NDArray
+from typing import Dict, List, Optional, Sequence, Tuple, Any, cast
+from pandas import DataFrame
 
-from cubingpa import utils
+from cubingpa import utils, person_curves, curve_store, checkpoint, instrumentation
+from cubingpa.aggregation import Aggregator, MeanAggregator, QuantileAggregator, DEFAULT_QUANTILES, DEFAULT_BINS, \
+    DEFAULT_RESAMPLES, DEFAULT_CONFIDENCE, bootstrap_average
+from cubingpa.curve_store import CurveStore
+from cubingpa.instrumentation import Sink
+from cubingpa.person_curves import PersonCurves
+from cubingpa.segment_tree import MinSegmentTree
+from cubingpa.time_grid import TimeGrid, Resolution
+
+
+DEFAULT_CHECKPOINT_INTERVAL = 600.0
+
+DEFAULT_PERSON_CACHE_SIZE = 4096
 
 
 class ReferenceProcessor:
@@ -25,21 +37,44 @@ class ReferenceProcessor:
     time, data of the person with the lowest time is interpolated to reach the current
     person's highest time.
 
+    An instance processes its results once: any further process_*() call raises a RuntimeError.
+
+    Processing can be checkpointed to a file: a killed run is then resumed from the last checkpoint.
+    Once processing is over, the checkpoint holds the final state. When processing newer results
+    of the same event (previous results plus new ones) with the same checkpoint file, only persons
+    from the first one whose position or results changed are processed again.
+
     Parameters
     ----------
     filtered_results: Dataframe
         Results filtered on one event, sorted and cleaned by cubingpa.data_filter
+    checkpoint_path: str, optional
+        Checkpoint file. Default: None, no checkpoint
+    checkpoint_interval: float, optional
+        Minimum number of seconds between two checkpoints during processing. Default: 600
+    sink: Sink, optional
+        Receives instrumentation events (see cubingpa.instrumentation): STAGE events for each
+        processing phase, a PERSON event per aligned person, REFERENCE_SWITCH and INTERPOLATION
+        events. Default: None
+    person_cache_size: int, optional
+        Maximum number of persons whose curve is kept ready to use (days as integers, see _get_person_curve),
+        the least recently used being evicted first. Default: 4096
+    workers: int, optional
+        Number of worker processes preprocessing persons (see cubingpa.person_curves.preprocess),
+        only the alignment of persons being sequential. Default: 1, preprocessing in the current process
     """
 
-    _reference_df = None # type: DataFrame
     _reference_id = None # type: str
-    _reference_values = None # type: Series
-    _processed_results = None # type: DataFrame
-    _df_to_concat = None # type: List[DataFrame]
 
 
-    def __init__(self, filtered_results: DataFrame) -> None:
-        self._persons_groups = filtered_results.groupby('personId')
+    def __init__(self, filtered_results: DataFrame, checkpoint_path: Optional[str] = None,
+        checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL, sink: Optional[Sink] = None,
+        person_cache_size: int = DEFAULT_PERSON_CACHE_SIZE, workers: int = 1) -> None:
+        self._sink = sink
+        start_time = time.perf_counter()
+
+        # observed=True: with encoded ids, persons filtered out must not come back as empty groups
+        self._persons_groups = filtered_results.groupby('personId', observed=True)
 
         # further algorithms rely on the fact that dataframes are dealt with in descending max(time) order
         # since "not progressing solves" are removed later, max(time) is not groupby.max() but groupby.first()
@@ -52,8 +87,47 @@ class ReferenceProcessor:
         self._mintimes = self._persons_groups.min()
         self._mintimes = self._mintimes.reindex(self._maxtimes.index)
 
-
-    def process(self, log_progression: bool = False, log_debug: bool = False) -> DataFrame:
+        # deduplicated dates and progressing solves of every person, computed at once
+        self._person_curves = person_curves.preprocess(filtered_results, workers)
+
+        # (days, times) of the persons recently used, least recently used first
+        self._person_cache = OrderedDict() # type: OrderedDict[str, Tuple[NDArray[np.int64], NDArray[np.float64]]]
+        self._person_cache_size = max(person_cache_size, 1)
+
+        # aligned and interpolated curves, in processing order
+        self._curve_store = CurveStore()
+        # min time of the actual data of each curve, in the curve store order, for searching a new reference
+        self._curve_mintimes = MinSegmentTree()
+        # knots of the reference curve (see CurveStore.knots()) and its last day, set with the reference
+        self._reference_days = np.zeros(0, dtype=np.int64) # type: NDArray[np.int64]
+        self._reference_times = np.zeros(0, dtype=np.float64) # type: NDArray[np.float64]
+        self._reference_last_day = 0
+
+        # aggregates updated each time curve values are produced
+        self._aggregators = [] # type: List[Aggregator]
+        # free curves as soon as they can't become the reference anymore
+        self._release_curves = False
+        # persons and curves are modified by processing (and by sampling), which thus runs once
+        self._processed = False
+
+        self._checkpoint_path = checkpoint_path
+        self._checkpoint_interval = checkpoint_interval
+
+        # processing log, allowing to undo the processing of the last persons (see _restore_checkpoint)
+        # position in _maxtimes of the person being processed
+        self._position = 0
+        # position at which each curve of the store has been added
+        self._curve_positions = [] # type: List[int]
+        # (position, curve id, knots count before interpolation) of each interpolated curve
+        self._extensions = [] # type: List[Tuple[int, str, int]]
+        # (position, reference id) of each reference change
+        self._references = [] # type: List[Tuple[int, str]]
+
+        instrumentation.emit(self._sink, instrumentation.STAGE, time.perf_counter() - start_time,
+            stage='preprocess', rows_in=len(filtered_results), rows_out=len(self._maxtimes))
+
+
+    def process(self, log_progression: bool = False, log_debug: bool = False, resolution: Resolution = 'D') -> DataFrame:
         """
         Launch processing
 
@@ -63,66 +137,420 @@ class ReferenceProcessor:
             Indicates if process progression should be logged. Default: False
         log_debug: bool, optional
             Indicates if process progression debug information should be shown. Default: False
+        resolution: Resolution, optional
+            Resolution of the rows: 'D' (every day), 'W' (every Monday), 'M' (first day of each month)
+            or a number of days, see cubingpa.time_grid.TimeGrid. Alignment is made on daily values whatever
+            the resolution, rows of a coarser resolution are a subset of the daily ones. Default: 'D'
+
+        Returns
+        -------
+        Dataframe
+            Processed results: one column per person, one row per day (or per point of the resolution)
+        """
+
+        grid = TimeGrid(resolution)
+        store = self.process_curves(log_progression, log_debug)
+
+        with instrumentation.timed(self._sink, instrumentation.STAGE, stage='dataframe', rows_in=len(store)) as data:
+            processed_results = store.to_dataframe(grid)
+            data['rows_out'] = len(processed_results)
+
+        return processed_results
+
+
+    def process_curves(self, log_progression: bool = False, log_debug: bool = False) -> CurveStore:
+        """
+        Launch processing, without building the processed results dataframe
+
+        Parameters
+        ----------
+        log_progression: bool, optional
+            Indicates if process progression should be logged. Default: False
+        log_debug: bool, optional
+            Indicates if process progression debug information should be shown. Default: False
+
+        Returns
+        -------
+        CurveStore
+            Processed results: one aligned curve per person
+        """
+
+        self._run(log_progression, log_debug)
+
+        return self._curve_store
+
+
+    def process_average(self, log_progression: bool = False, log_debug: bool = False, resolution: Resolution = 'D') -> DataFrame:
+        """
+        Launch processing, computing the average of the aligned curves on the fly instead of
+        building the processed results dataframe. Curves not needed for aligning the next persons
+        are freed during processing, memory thus mostly depends on the number of days
+
+        Parameters
+        ----------
+        log_progression: bool, optional
+            Indicates if process progression should be logged. Default: False
+        log_debug: bool, optional
+            Indicates if process progression debug information should be shown. Default: False
+        resolution: Resolution, optional
+            Resolution of the average, see process(). A coarser resolution aggregates fewer values:
+            memory and time spent on values are divided by the number of days between points. Default: 'D'
+
+        Returns
+        -------
+        Dataframe
+            Average time per day (or per point of the resolution), same as the processed results mean(axis=1)
+        """
+
+        return self._process_aggregator(MeanAggregator(TimeGrid(resolution)), 'average', log_progression, log_debug)
+
+
+    def process_quantiles(self, quantiles: Sequence[float] = DEFAULT_QUANTILES, bins: int = DEFAULT_BINS,
+        log_progression: bool = False, log_debug: bool = False, resolution: Resolution = 'D') -> DataFrame:
+        """
+        Launch processing, computing quantiles of the aligned curves per day on the fly instead of
+        building the processed results dataframe. Quantiles are approximated from a histogram per day
+        (see cubingpa.aggregation.QuantileAggregator), memory thus mostly depends on the number of days.
+        The approximation is close to the processed results quantile() on days with many curves, the error
+        is larger on days with few curves (up to a large part of the gap between their values)
+
+        Parameters
+        ----------
+        quantiles: Sequence[float], optional
+            Quantiles to compute, between 0 and 1. Default: 0.1, 0.25, 0.5, 0.75 and 0.9
+        bins: int, optional
+            Number of histogram bins per day, spanning the event times: more bins give more precise quantiles.
+            Default: 512
+        log_progression: bool, optional
+            Indicates if process progression should be logged. Default: False
+        log_debug: bool, optional
+            Indicates if process progression debug information should be shown. Default: False
+        resolution: Resolution, optional
+            Resolution of the quantiles, see process_average(). Default: 'D'
 
         Returns
         -------
         Dataframe
-            Processed results
+            Quantiles per day (or per point of the resolution), one column per quantile named after the percentile (ex: 'p50' for the median)
+        """
+
+        # curves values stay within the times of the event, except for the last interpolated day
+        # which may be slightly below (counted in the first bin)
+        quantile_aggregator = QuantileAggregator(float(self._mintimes['best'].min()), float(self._maxtimes['best'].max()),
+            quantiles, bins, TimeGrid(resolution))
+
+        return self._process_aggregator(quantile_aggregator, 'quantiles', log_progression, log_debug)
+
+
+    def process_preview(self, fraction: float = 0.1, seed: int = 0, resamples: int = DEFAULT_RESAMPLES,
+        confidence: float = DEFAULT_CONFIDENCE, log_progression: bool = False, log_debug: bool = False,
+        resolution: Resolution = 'D') -> DataFrame:
+        """
+        Launch processing on a sample of persons only, for a quick estimate of the average curve.
+
+        Persons sorted by descending max time are split into consecutive strata, one person being drawn
+        in each: the sample spans all the times of the event, so that each sampled person finds a reference
+        among the previous ones as in a full processing. The first person is always kept as the first reference.
+
+        The confidence band is a bootstrap of the sampled curves (see cubingpa.aggregation.bootstrap_average()).
+        It reflects the choice of the persons averaged, not the differences of alignment with a full processing.
+
+        Parameters
+        ----------
+        fraction: float, optional
+            Share of the persons to process, between 0 and 1. Default: 0.1
+        seed: int, optional
+            Random seed of the sample and of the bootstrap: same seed gives same results. Default: 0
+        resamples: int, optional
+            Number of bootstrap resamples. Default: 200
+        confidence: float, optional
+            Confidence level of the band, between 0 and 1. Default: 0.95
+        log_progression: bool, optional
+            Indicates if process progression should be logged. Default: False
+        log_debug: bool, optional
+            Indicates if process progression debug information should be shown. Default: False
+        resolution: Resolution, optional
+            Resolution of the average, see process(). Default: 'D'
+
+        Returns
+        -------
+        Dataframe
+            Average time per day (or per point of the resolution) of the sampled curves,
+            with 'Lower bound' and 'Upper bound' columns
+        """
+
+        if not 0 < fraction <= 1:
+            raise ValueError(f"Invalid fraction: {fraction}")
+
+        grid = TimeGrid(resolution)
+
+        # the sample replaces the persons to process
+        self._check_not_processed()
+
+        with instrumentation.timed(self._sink, instrumentation.STAGE, stage='sample', rows_in=len(self._maxtimes)) as data:
+            self._sample_persons(fraction, seed)
+            data['rows_out'] = len(self._maxtimes)
+
+        store = self.process_curves(log_progression, log_debug)
+
+        with instrumentation.timed(self._sink, instrumentation.STAGE, stage='bootstrap', rows_in=len(store)):
+            return bootstrap_average(store, grid, resamples, confidence, seed)
+
+
+    def _sample_persons(self, fraction: float, seed: int) -> None:
+        """
+        Keep one person per stratum of the persons sorted by descending max time, see process_preview()
+        """
+        # persons with a single progressing solve are skipped by the processing anyway
+        lengths = np.diff(self._person_curves.subset(self._maxtimes.index).offsets)
+        eligible = np.flatnonzero(lengths >= 2)
+
+        if len(eligible) == 0:
+            return
+
+        strata_count = max(int(round(len(eligible) * fraction)), 1)
+        bounds = (np.arange(strata_count + 1) * len(eligible)) // strata_count
+
+        rng = np.random.default_rng(seed)
+        picks = bounds[:-1] + (rng.random(strata_count) * np.diff(bounds)).astype(np.int64)
+        picks[0] = 0
+
+        self._maxtimes = self._maxtimes.iloc[eligible[picks]]
+        self._mintimes = self._mintimes.iloc[eligible[picks]]
+
+
+    def _check_not_processed(self) -> None:
+        if self._processed:
+            raise RuntimeError("Results have already been processed, a new ReferenceProcessor is needed to process them again")
+
+
+    def _process_aggregator(self, aggregator: Aggregator, stage: str, log_progression: bool, log_debug: bool) -> DataFrame:
+        self._check_not_processed()
+        self._aggregators.append(aggregator)
+        self._release_curves = True
+
+        self._run(log_progression, log_debug)
+
+        with instrumentation.timed(self._sink, instrumentation.STAGE, stage=stage):
+            return aggregator.to_dataframe()
+
+
+    def _run(self, log_progression: bool = False, log_debug: bool = False) -> None:
+        self._check_not_processed()
+        self._processed = True
+
+        start_position = None # type: Optional[int]
+
+        if self._checkpoint_path is not None:
+            with instrumentation.timed(self._sink, instrumentation.STAGE, stage='restore checkpoint'):
+                start_position = self._restore_checkpoint()
+
+        if start_position is None:
+            with instrumentation.timed(self._sink, instrumentation.STAGE, stage='init reference'):
+                self._init_reference()
+            start_position = 1
+
+        with instrumentation.timed(self._sink, instrumentation.STAGE, stage='main process',
+            rows_in=len(self._maxtimes) - start_position) as data:
+            self._launch_main_process(log_progression, log_debug, start_position)
+            data['rows_out'] = len(self._curve_store)
+
+        if self._checkpoint_path is not None:
+            with instrumentation.timed(self._sink, instrumentation.STAGE, stage='save checkpoint'):
+                self._save_checkpoint(len(self._maxtimes))
+
+
+    def _save_checkpoint(self, next_position: int) -> None:
+        """
+        Save processing state, persons before next_position being processed
+        """
+        metadata = {
+            'release_curves': self._release_curves,
+            'aggregators': self._aggregators_description(),
+            'next_position': next_position,
+            'curve_positions': self._curve_positions,
+            'extensions': self._extensions,
+            'references': self._references
+        }
+
+        arrays = {} # type: Dict[str, NDArray[Any]]
+
+        for key, array in self._curve_store.to_arrays().items():
+            arrays['store_' + key] = array
+
+        for number, aggregator in enumerate(self._aggregators):
+            for key, array in aggregator.state().items():
+                arrays[f'aggregator{number}_{key}'] = array
+
+        # input of the processed persons, to detect changes when resuming
+        processed = self._maxtimes.iloc[:next_position]
+        curves = self._person_curves.subset(processed.index)
+        arrays['input_ids'] = np.array(processed.index.tolist(), dtype=str)
+        arrays['input_maxtimes'] = processed['best'].to_numpy(dtype=np.float64)
+        arrays['input_offsets'] = curves.offsets
+        arrays['input_days'] = utils.dates_to_days(curves.dates)
+        arrays['input_times'] = curves.times
+
+        checkpoint.save(cast(str, self._checkpoint_path), metadata, arrays)
+
+
+    def _restore_checkpoint(self) -> Optional[int]:
+        """
+        Restore processing state from the checkpoint, then undo the processing of the persons
+        from the first one whose position or results changed since the checkpoint
+
+        Returns
+        -------
+        int
+            Position of the next person to process, or None if processing must start over
         """
+        loaded = checkpoint.load(cast(str, self._checkpoint_path))
+
+        if loaded is None:
+            return None
+
+        metadata, arrays = loaded
+
+        if metadata['release_curves'] != self._release_curves \
+            or metadata['aggregators'] != self._aggregators_description():
+            return None
+
+        self._remove_unusable_first_persons()
+
+        position = self._find_first_change(metadata['next_position'], arrays)
+
+        if position == 0:
+            return None
+
+        store = curve_store.from_arrays({key[len('store_'):]: array for key, array in arrays.items() if key.startswith('store_')})
+        references = [(int(step), str(id)) for step, id in metadata['references']]
+        reference_id = [id for step, id in references if step < position][-1]
+
+        # released curves can't be restored
+        if store.released_count > store.position(reference_id):
+            return None
+
+        self._curve_store = store
+
+        for number, aggregator in enumerate(self._aggregators):
+            prefix = f'aggregator{number}_'
+            aggregator.restore({key[len(prefix):]: array for key, array in arrays.items() if key.startswith(prefix)})
+
+        self._curve_positions = [int(step) for step in metadata['curve_positions']]
+        self._extensions = [(int(step), str(id), int(length)) for step, id, length in metadata['extensions']]
+        self._references = references
+
+        self._rollback(position)
+
+        for curve_id in self._curve_store.ids:
+            self._curve_mintimes.append(float(self._get_person_curve(curve_id)[1][-1]))
+
+        self._position = position
+        self._reference_id = reference_id
+        self._set_reference_values()
+
+        return position
+
+
+    def _aggregators_description(self) -> List[Any]:
+        return [[type(aggregator).__name__, aggregator.parameters()] for aggregator in self._aggregators]
+
+
+    def _find_first_change(self, next_position: int, arrays: Dict[str, NDArray[Any]]) -> int:
+        """
+        Position of the first person whose position or results differ from the checkpoint ones,
+        or next_position if the persons processed before the checkpoint are unchanged
+        """
+        count = min(next_position, len(self._maxtimes))
+        processed = self._maxtimes.iloc[:count]
+
+        changed = (np.array(processed.index.tolist(), dtype=str) != arrays['input_ids'][:count]) \
+            | (processed['best'].to_numpy(dtype=np.float64) != arrays['input_maxtimes'][:count])
+
+        curves = self._person_curves.subset(processed.index)
+        lengths = np.diff(curves.offsets)
+        changed |= lengths != np.diff(arrays['input_offsets'])[:count]
 
-        self._init_reference()
-        self._init_processed_results()
-        self._launch_main_process(log_progression, log_debug)
+        # compare points of the persons before the first change, their points are at the same offsets
+        first_change = int(np.argmax(changed)) if changed.any() else count
+        points_count = int(curves.offsets[first_change])
+        changed_points = (utils.dates_to_days(curves.dates[:points_count]) != arrays['input_days'][:points_count]) \
+            | (curves.times[:points_count] != arrays['input_times'][:points_count])
 
-        return self._processed_results
+        if changed_points.any():
+            first_point = int(np.argmax(changed_points))
+            first_change = int(np.searchsorted(curves.offsets, first_point, side='right')) - 1
+
+        return first_change
+
+
+    def _rollback(self, position: int) -> None:
+        """
+        Undo the processing of the persons from the given position
+        """
+        # undo interpolations, latest first
+        while len(self._extensions) > 0 and self._extensions[-1][0] >= position:
+            _, curve_id, knots_count = self._extensions.pop()
+            days, times = self._curve_store.knots(curve_id)
+            start_day = self._curve_store.start(curve_id)
+            self._aggregate(start_day + days, times, start_day + int(days[knots_count - 1]) + 1, -1)
+            self._curve_store.shorten(curve_id, knots_count)
+
+        # undo curves additions
+        count = sum(1 for step in self._curve_positions if step < position)
+        for curve_id in self._curve_store.ids[count:]:
+            days, times = self._curve_store.knots(curve_id)
+            start_day = self._curve_store.start(curve_id)
+            self._aggregate(start_day + days, times, start_day, -1)
+        self._curve_store.truncate(count)
+        self._curve_mintimes.truncate(count)
+        del self._curve_positions[count:]
+
+        self._references = [(step, id) for step, id in self._references if step < position]
 
 
     def _init_reference(self) -> None:
         
-        reference_initialized = False
+        self._remove_unusable_first_persons()
+
+        self._position = 0
+
+        # reference keeps its own dates
+        reference_id = self._maxtimes.index[0]
+        days, _ = self._get_person_curve(reference_id)
+        self._add_curve(reference_id, int(days[0]))
+        self._set_reference(reference_id)
+
+
+    def _remove_unusable_first_persons(self) -> None:
+        """
+        Remove first persons until one can become the reference
+        """
+        
+        reference_found = False
         
-        while not reference_initialized:
+        while not reference_found:
             if len(self._maxtimes) < 1:
                 raise ValueError("Not enough data to work on")
             
-            self._reference_id = self._maxtimes.index[0]
-            
-            # create reference dataframe
-            self._reference_df = self._create_person_dataframe(self._reference_id)
-            
-            self._reference_df = self._remove_duplicate_dates(self._reference_df)
-            # ignore too small dataframes
-            if len(self._reference_df.index) < 2:
-                self._maxtimes = self._maxtimes.drop(self._reference_id)
-                self._mintimes = self._mintimes.drop(self._reference_id)
-                continue
+            first_id = self._maxtimes.index[0]
             
-            self._reference_df = utils.remove_not_progressing_solves(self._reference_df)
             # ignore too small dataframes
-            if len(self._reference_df.index) < 2:
-                self._maxtimes = self._maxtimes.drop(self._reference_id)
-                self._mintimes = self._mintimes.drop(self._reference_id)
+            if len(self._get_person_curve(first_id)[0]) < 2:
+                self._maxtimes = self._maxtimes.drop(first_id)
+                self._mintimes = self._mintimes.drop(first_id)
                 continue
 
-            self._reference_df = utils.interpolate_dates(self._reference_df)
-            self._set_reference_values(self._reference_df)
-
-            reference_initialized = True
-
-    def _init_processed_results(self) -> None:
-        self._processed_results = self._reference_df
-        self._df_to_concat = [self._processed_results]
+            reference_found = True
 
 
-    def _update_processed_results(self, new_processed_results: DataFrame) -> None:
-        self._processed_results = new_processed_results
-        self._df_to_concat[0] = self._processed_results
+    def _launch_main_process(self, log_progression: bool = False, log_debug: bool = False, start_position: int = 1) -> None:
+        if self._checkpoint_path is not None:
+            last_checkpoint_time = time.time()
 
-
-    def _launch_main_process(self, log_progression: bool = False, log_debug: bool = False) -> None:
         if log_progression:
             # prepare process progression indication
-            total_loops = len(self._maxtimes[1:len(self._maxtimes)])
+            total_loops = len(self._maxtimes[start_position:len(self._maxtimes)])
             print_every_percent = 0.05
             loops_percent = round(total_loops * 0.05, 0)
             if loops_percent == 0:
@@ -130,7 +558,13 @@ class ReferenceProcessor:
             start_time = time.time()
             previous_time = start_time
 
-        for i, row in enumerate(self._maxtimes[1:len(self._maxtimes)].itertuples()):
+        for i, row in enumerate(self._maxtimes[start_position:len(self._maxtimes)].itertuples()):
+            
+            self._position = start_position + i
+
+            if self._checkpoint_path is not None and time.time() - last_checkpoint_time >= self._checkpoint_interval:
+                self._save_checkpoint(self._position)
+                last_checkpoint_time = time.time()
             
             if log_progression:
                 current_time = time.time()
@@ -142,93 +576,191 @@ class ReferenceProcessor:
                 if i == 0 or i == total_loops - 1 or (i + 1) % loops_percent == 0:
                     print(f'{(i + 1)}/{total_loops} loops, total elapsed/remaining/estimated: {round(total_running_time, 0)}/{round(estimated_running_time - total_running_time, 0)}/{round(estimated_running_time, 0)} seconds')
             
-            person_df = self._create_person_dataframe(row.Index)
-
-            person_df = self._remove_duplicate_dates(person_df)
             # ignore too small dataframes
-            if len(person_df.index) < 2:
+            if len(self._get_person_curve(row.Index)[0]) < 2:
                 continue
 
-            person_df = utils.remove_not_progressing_solves(person_df)
-            # ignore too small dataframes
-            if len(person_df.index) < 2:
-                continue
+            if self._sink is not None:
+                person_start_time = time.perf_counter()
 
             # search matching date
-            matching_date = self._find_closest_date(row[1], log_debug)
-            # align dates
-            delta = matching_date - person_df.index[0]
-            person_df = self._shift_date(person_df, delta)
+            matching_day = self._find_closest_day(row[1], log_debug)
 
-            # interpolate
-            person_df = utils.interpolate_dates(person_df)
-            
-            # add current df to final df
-            self._df_to_concat.append(person_df)
+            # align dates: first solve is set on the matching date, then interpolate
+            self._add_curve(row.Index, matching_day)
 
-        if log_progression:
-            print('Final concatenation...')
-
-        self._processed_results = pd.concat(self._df_to_concat, axis=1, sort=False)
-        self._df_to_concat = [self._processed_results]
+            if self._sink is not None:
+                instrumentation.emit(self._sink, instrumentation.PERSON, time.perf_counter() - person_start_time,
+                    position=self._position, person_id=row.Index)
 
         if log_progression:
             print('Done')
 
 
-    def _create_person_dataframe(self, person_id: str) -> DataFrame:
-        # create df
-        person_df = self._persons_groups.get_group(person_id)
-        person_df = person_df.rename(columns={'best': person_id})
+    def _get_person_curve(self, person_id: str) -> Tuple[NDArray[np.int64], NDArray[np.float64]]:
+        """
+        Days (number of days since 1970-01-01) and times of the deduplicated progressing solves of a person,
+        from a bounded cache: curves are used several times (alignment, then each interpolation of the
+        curve), their lookup and date conversion are made once as long as they are used often enough
+
+        Returns
+        -------
+        Tuple[ndarray, ndarray]
+            Days and times, which must not be modified
+        """
+        curve = self._person_cache.get(person_id)
+
+        if curve is not None:
+            self._person_cache.move_to_end(person_id)
+            return curve
+
+        curve = (utils.dates_to_days(self._person_curves.get_dates(person_id)), self._person_curves.get_times(person_id))
+        self._person_cache[person_id] = curve
 
-        # make date the index
-        return person_df.set_index('date')
+        if len(self._person_cache) > self._person_cache_size:
+            self._person_cache.popitem(last=False)
 
+        return curve
 
-    def _remove_duplicate_dates(self, person_dataframe: DataFrame) -> DataFrame:
-        # remove duplicate dates by keeping best solve
-        return person_dataframe.groupby('date').aggregate(np.min)
 
+    def _add_curve(self, person_id: str, start_day: int) -> None:
+        days, times = self._get_person_curve(person_id)
 
-    def _set_reference_values(self, dataframe: DataFrame) -> None:
-        self._reference_values = dataframe[self._reference_id].dropna().sort_values()
+        # only knots are kept, daily values are evaluated when needed
+        self._curve_store.append(person_id, start_day, days - days[0], times)
+        self._curve_positions.append(self._position)
+        # last progressing solve is the person's min time
+        self._curve_mintimes.append(float(times[-1]))
 
+        self._aggregate(start_day + (days - days[0]), times, start_day, 1)
 
-    def _find_date_for_value(self, dataframe: DataFrame, column_id: str, time: float) -> Any:
+
+    def _aggregate(self, days: NDArray[np.int64], times: NDArray[np.float64], first_day: int, sign: int) -> None:
         """
-        Find time in a dataframe column and return corresponding date
-        /!\ It is assumed time exists in the dataframe
+        Add (sign 1) or remove (sign -1) the values of a curve from first_day to its last knot to the aggregators,
+        evaluated at the points of their grid
+
+        Parameters
+        ----------
+        days: ndarray
+            Days of the knots of the curve, in number of days since 1970-01-01
+        times: ndarray
+            Time at each knot
+        first_day: int
+            First day of the values to aggregate
+        sign: int
+            1 to add values, -1 to remove them
+        """
+        for aggregator in self._aggregators:
+            points = aggregator.grid.points(first_day, int(days[-1]) + 1)
+            if len(points) == 0:
+                continue
+
+            slot = int(aggregator.grid.slots(points[:1])[0])
+            values = np.interp(points, days, times)
+            if sign > 0:
+                aggregator.add(slot, values)
+            else:
+                aggregator.remove(slot, values)
+
+
+    def _set_reference(self, reference_id: str) -> None:
+        self._reference_id = reference_id
+        self._references.append((self._position, reference_id))
+        self._set_reference_values()
+
+
+    def _set_reference_values(self) -> None:
+        self._reference_days, self._reference_times = self._curve_store.knots(self._reference_id)
+        self._reference_last_day = self._curve_store.end(self._reference_id) - 1
+
+        if self._release_curves:
+            # searches for a new reference never go back before the current one
+            self._curve_store.release_until(self._curve_store.position(self._reference_id))
+
+
+    def _get_reference_day(self, index: int) -> int:
+        """
+        Day of the reference value at the given index of the ascending times
+        """
+        return self._reference_last_day - index
+
+
+    def _get_reference_length(self) -> int:
+        """
+        Number of days (i.e. of values) of the reference
+        """
+        return int(self._reference_days[-1]) + 1
+
+
+    def _get_reference_value(self, index: int) -> float:
+        """
+        Reference value at the given index of the ascending times.
+        Curves only hold progressing solves, interpolated: values are strictly decreasing,
+        sorted by ascending time they are the daily values in reverse order
+        """
+        return float(np.interp(self._get_reference_length() - 1 - index, self._reference_days, self._reference_times))
+
+
+    def _search_reference(self, time: float) -> int:
+        """
+        Index of the first value greater than or equal to time in the ascending times of the reference,
+        as np.searchsorted() would return on the daily values, without evaluating them
+        """
+        days = self._reference_days
+        times = self._reference_times
+        length = self._get_reference_length()
+
+        # number of knots with a value greater than or equal to time (knot times are decreasing)
+        knots_count = len(times) - int(np.searchsorted(times[::-1], time))
+
+        # last day with a value greater than or equal to time
+        if knots_count == 0:
+            last_day = -1
+        elif knots_count == len(times):
+            last_day = length - 1
+        else:
+            # between two knots: estimate the day from the segment slope, then adjust to the daily values
+            knot = knots_count - 1
+            segment_end = int(days[knot + 1])
+            estimate = days[knot] + (times[knot] - time) * (days[knot + 1] - days[knot]) / (times[knot] - times[knot + 1])
+            last_day = min(max(int(estimate), int(days[knot])), segment_end - 1)
+
+            while last_day + 1 < segment_end and np.interp(last_day + 1, days, times) >= time:
+                last_day += 1
+            while last_day > days[knot] and np.interp(last_day, days, times) < time:
+                last_day -= 1
+
+        return length - 1 - last_day
+
+
+    def _get_last_data_day(self, column_id: str, days: NDArray[np.int64]) -> int:
+        """
+        Day of the last actual data of a curve (i.e. not interpolated by _interpolate_column)
 
         Parameters
         ----------
-        dataframe: DataFrame
-            DataFrame to look into
         column_id: str
-            ID of the column to look into
-        time: float
-            Value to look for. /!\ It is assumed time exists in the dataframe
+            ID of the curve
+        days: ndarray
+            Days of the person's actual data
 
         Returns
         -------
-        datetime
-            Found date
+        int
+            Day in the aligned curve
         """
-        matching_rows = dataframe[dataframe[column_id] == time]
-
-        return matching_rows.index[0]
+        # curves keep the spacing of the actual data from their start
+        return self._curve_store.start(column_id) + int(days[-1] - days[0])
 
 
-    def _get_date_for_new_time(self, dataframe: DataFrame, column_id: str, time: float) -> Tuple[datetime, float]:
-        # use data from the group (i.e. more spaced data) for a more precise value
-        person_df = self._create_person_dataframe(column_id)
-        person_df = self._remove_duplicate_dates(person_df)
-        person_df = utils.remove_not_progressing_solves(person_df)
+    def _get_day_for_new_time(self, column_id: str, time: float) -> Tuple[int, float]:
+        # use the person's actual data (i.e. more spaced data) for a more precise value
+        days, times = self._get_person_curve(column_id)
         
-        next_to_last_date = person_df.index[len(person_df) - 2]
-        next_to_last_value = person_df.iloc[len(person_df) - 2, 0]
-        last_date = person_df.index[len(person_df) - 1]
-        last_value = person_df.iloc[len(person_df) - 1, 0]
-        days_delta = (last_date - next_to_last_date).days
+        next_to_last_value = times[-2]
+        last_value = times[-1]
+        days_delta = int(days[-1] - days[-2])
         
         # number of days to add to next_to_last_date
         number_of_days_to_add = ((next_to_last_value - time) * days_delta) / (next_to_last_value - last_value)
@@ -237,34 +769,30 @@ class ReferenceProcessor:
         # upper round to make sure date encloses time
         number_of_days_to_add = math.ceil(number_of_days_to_add)
 
-        new_date = self._find_date_for_value(dataframe, column_id, last_value) + timedelta(days=number_of_days_to_add)
+        new_day = self._get_last_data_day(column_id, days) + number_of_days_to_add
         # recompute corresponding time to match the ceiled date
         new_time = last_value - (((next_to_last_value - last_value) * number_of_days_to_add) / days_delta)
         
-        return new_date, new_time
+        return new_day, new_time
+
 
+    def _interpolate_column(self, column_id: str, time: float) -> int:
+        """
+        Extend a curve to reach time, returns the number of days added
+        """
+        day_to_add, time_to_add = self._get_day_for_new_time(column_id, time)
 
-    def _interpolate_column(self, dataframe: DataFrame, column_id: str, time: float) -> DataFrame:
-        person_df = pd.DataFrame(dataframe[column_id], index=dataframe.index)
-        person_df = person_df.dropna()
+        last_day = self._curve_store.end(column_id) - 1
 
-        date_to_add, time_to_add = self._get_date_for_new_time(dataframe, column_id, time)
-    
-        # create new entry and add it
-        new_df = pd.DataFrame([time_to_add], columns = [column_id], index=[date_to_add]) 
-        person_df = person_df.append(new_df)
-        
-        # interpolate
-        person_df = utils.interpolate_dates(person_df)
-        
-        # modify /!\ IN PLACE /!\ using non-NA values from another DataFrame
-        dataframe.update(person_df)
+        # values between the current last day of the curve and the new entry are interpolated from the new knot
+        self._extensions.append((self._position, column_id, self._curve_store.knots_count(column_id)))
+        self._curve_store.extend(column_id, day_to_add - self._curve_store.start(column_id), time_to_add)
 
-        # append new values, if any
-        rows_to_append = person_df.loc[person_df.index.difference(dataframe.index, sort=False)]
-        dataframe = dataframe.append(rows_to_append, sort=False)
-        
-        return dataframe
+        # add new values only
+        last_time = self._curve_store.knots(column_id)[1][-2]
+        self._aggregate(np.array([last_day, day_to_add]), np.array([last_time, time_to_add]), last_day + 1, 1)
+
+        return day_to_add - last_day
 
 
     def _get_reference_min_time(self) -> Any:
@@ -276,7 +804,7 @@ class ReferenceProcessor:
         float
             min time
         """
-        return self._reference_values[0]
+        return self._reference_times[-1]
 
 
     def _update_reference(self, time: float, log_debug: bool = False) -> None:
@@ -285,50 +813,36 @@ class ReferenceProcessor:
         if self._get_reference_min_time() <= time:
             return
 
-        # next columns will be needed: update _processed_results
-        self._processed_results = pd.concat(self._df_to_concat, axis=1, sort=False)
-        self._df_to_concat = [self._processed_results]
-
-        # col1 col2 col3 col4
-        #  #0   #1   #2   #3
-        # len = 4
-        reference_column_number = self._processed_results.columns.get_loc(self._reference_id)
-        last_column_number = len(self._processed_results.columns) - 1
+        curve_ids = self._curve_store.ids
+        reference_column_number = self._curve_store.position(self._reference_id)
         
         # CASE 1: no interpolation needed
         # knowing that first column is not suitable,
-        # test subsequent columns to see if they can become the new reference
-        # left value is inclusive, right value is exclusive in left:right
-        for id in self._processed_results.columns[reference_column_number + 1:last_column_number + 1]:
-            # safe (and faster) using _mintimes_df: subsequent columns have not been interpolated yet
-            if self._mintimes.loc[id, 'best'] <= time:
-                self._reference_id = id
-                self._set_reference_values(self._processed_results)
-                
-                if log_debug:
-                    print(f'CASE 1: no interpolation {self._reference_id}')
-                
-                return
+        # find the first subsequent column that can become the new reference
+        # safe using min times of actual data: subsequent columns have not been interpolated yet
+        column_number = self._curve_mintimes.find_first_at_most(reference_column_number + 1, time)
+
+        if column_number != -1:
+            self._set_reference(curve_ids[column_number])
+            instrumentation.emit(self._sink, instrumentation.REFERENCE_SWITCH, case=1, reference_id=self._reference_id)
+            
+            if log_debug:
+                print(f'CASE 1: no interpolation {self._reference_id}')
+            
+            return
 
         # CASE 2: interpolation needed
         # no column goes low enough: disjointed data
-        # find the column with the lowest time
-        min_id = self._reference_id  # give a default value to avoid mypy error (will be overriden in the loop anway)
-        min_time = math.inf
-
-        # left value is inclusive, right value is exclusive in left:right
-        for id in self._processed_results.columns[reference_column_number:last_column_number + 1]:
-            # skip interpolated values by using _mintimes_df, to favorise actual data
-            # instead of interpolating systematically the same column
-            if self._mintimes.loc[id, 'best'] < min_time:
-                min_time = self._mintimes.loc[id, 'best']
-                min_id = id
+        # find the column with the lowest time, the first one if several
+        # skip interpolated values by using min times of actual data, to favorise actual data
+        # instead of interpolating systematically the same column
+        min_id = curve_ids[self._curve_mintimes.find_min(reference_column_number)]
         
         # interpolate column to reach time of column currently added
-        new_processed_results = self._interpolate_column(self._processed_results, min_id, time)
-        self._update_processed_results(new_processed_results)
-        self._reference_id = min_id
-        self._set_reference_values(self._processed_results)
+        with instrumentation.timed(self._sink, instrumentation.INTERPOLATION, curve_id=min_id) as data:
+            data['days'] = self._interpolate_column(min_id, time)
+        self._set_reference(min_id)
+        instrumentation.emit(self._sink, instrumentation.REFERENCE_SWITCH, case=2, reference_id=self._reference_id)
         
         if log_debug:
             print(f'CASE 2: interpolation {self._reference_id}')
@@ -336,10 +850,10 @@ class ReferenceProcessor:
         return
 
 
-    def _find_closest_date(self, time: float, log_debug: bool = False) -> Any:
+    def _find_closest_day(self, time: float, log_debug: bool = False) -> int:
         """
-        Find date corresponding to the closest matching time within the reference.
-        Updates reference first to make sure closest date can be found.
+        Find day corresponding to the closest matching time within the reference.
+        Updates reference first to make sure closest day can be found.
 
         Parameters
         ----------
@@ -350,8 +864,8 @@ class ReferenceProcessor:
 
         Returns
         -------
-        datetime
-            Found date
+        int
+            Found day
         """
 
         if self._maxtimes.loc[self._reference_id, 'best'] < time:
@@ -359,7 +873,7 @@ class ReferenceProcessor:
 
         self._update_reference(time, log_debug)
 
-        index = self._reference_values.searchsorted(time)
+        index = self._search_reference(time)
 
         #   time
         # 0  10
@@ -372,27 +886,23 @@ class ReferenceProcessor:
         
         # rule out exterior bounds
         if index == 0:
-            if self._reference_values[index] == time:
-                return self._reference_values.index[index]
+            if self._get_reference_value(index) == time:
+                return self._get_reference_day(index)
 
             # value is not in range
             raise RuntimeError(f"Algorithm error: could not find closest date, nor interpolate to find one. Time: {time}, Reference ID: {self._reference_id}")
 
-        if index == len(self._reference_values):
+        if index == self._get_reference_length():
             # value is not in range
             raise RuntimeError(f"Algorithm error: could not find closest date, nor interpolate to find one. Time: {time}, Reference ID: {self._reference_id}")
 
         # find closest value
-        current_time = self._reference_values[index]
-        previous_time = self._reference_values[index - 1]
+        current_time = self._get_reference_value(index)
+        previous_time = self._get_reference_value(index - 1)
 
         if current_time - time <= time - previous_time:
-            return self._reference_values.index[index]
+            return self._get_reference_day(index)
         else:
-            return self._reference_values.index[index - 1]
-
-
-    def _shift_date(self, dataframe: DataFrame, delta: datetime) -> DataFrame:
-        return dataframe.tshift(1, freq=delta)
+            return self._get_reference_day(index - 1)
 
 
@@ -0,0 +1,130 @@
+import math
+from typing import List, Optional
+
+
+class MinSegmentTree:
+    """
+    Values in insertion order, indexed by a segment tree of minimums: finding the first value
+    lower than or equal to a bound, or the lowest value, after a given position takes O(log n)
+    instead of scanning the values.
+    """
+
+    def __init__(self) -> None:
+        self._count = 0
+        self._capacity = 1
+        # node i covers nodes 2i and 2i + 1, leaves start at _capacity (node 0 is unused)
+        # plain list: faster than numpy for the scalar accesses made here
+        self._tree = [math.inf] * 2 # type: List[float]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, value: float) -> None:
+        """
+        Add a value after the existing ones
+        """
+        if self._count == self._capacity:
+            self._rebuild(self._capacity * 2)
+
+        node = self._capacity + self._count
+        self._tree[node] = value
+        self._count += 1
+
+        node //= 2
+        while node > 0:
+            self._tree[node] = min(self._tree[2 * node], self._tree[2 * node + 1])
+            node //= 2
+
+    def truncate(self, count: int) -> None:
+        """
+        Remove the values inserted from the given position
+
+        Parameters
+        ----------
+        count: int
+            Number of values to keep
+        """
+        leaves = self._tree[self._capacity:self._capacity + min(count, self._count)]
+        self._count = len(leaves)
+        self._rebuild(self._capacity, leaves)
+
+    def find_first_at_most(self, start: int, bound: float) -> int:
+        """
+        Position of the first value lower than or equal to bound, from the given position
+
+        Parameters
+        ----------
+        start: int
+            Position to start from, included
+        bound: float
+            Value to compare to
+
+        Returns
+        -------
+        int
+            Found position, or -1 if no value matches
+        """
+        if start >= self._count:
+            return -1
+
+        node = self._capacity + start
+
+        # go right until a node holds a matching value
+        while self._tree[node] > bound:
+            # lowest ancestor (or node itself) being a left child
+            while node % 2 == 1:
+                node //= 2
+            if node == 0:
+                return -1
+            node += 1
+
+        # go down to the leftmost matching leaf
+        while node < self._capacity:
+            node = 2 * node if self._tree[2 * node] <= bound else 2 * node + 1
+
+        return node - self._capacity
+
+    def find_min(self, start: int) -> int:
+        """
+        Position of the lowest value from the given position. The first one is kept among equal values
+
+        Parameters
+        ----------
+        start: int
+            Position to start from, included
+
+        Returns
+        -------
+        int
+            Found position, or -1 if there is no value from start
+        """
+        if start >= self._count:
+            return -1
+
+        # min of [left, right) from the bottom up
+        min_value = math.inf
+        left = self._capacity + start
+        right = self._capacity + self._count
+        while left < right:
+            if left % 2 == 1:
+                min_value = min(min_value, self._tree[left])
+                left += 1
+            if right % 2 == 1:
+                right -= 1
+                min_value = min(min_value, self._tree[right])
+            left //= 2
+            right //= 2
+
+        return self.find_first_at_most(start, min_value)
+
+    def _rebuild(self, capacity: int, leaves: Optional[List[float]] = None) -> None:
+        if leaves is None:
+            leaves = self._tree[self._capacity:self._capacity + self._count]
+
+        tree = [math.inf] * (2 * capacity)
+        tree[capacity:capacity + len(leaves)] = leaves
+        for node in range(capacity - 1, 0, -1):
+            tree[node] = min(tree[2 * node], tree[2 * node + 1])
+
+        self._capacity = capacity
+        self._tree = tree
@@ -0,0 +1,218 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from pandas import DataFrame, Series
+from numpy.typing import NDArray
+from typing import Any, Callable, Dict, List, Optional
+
+from cubingpa.raw_data import RawData
+
+
+METADATA_FILE_NAME = 'metadata.json'
+
+# incremented whenever the snapshot layout changes, invalidating older snapshots
+FORMAT_VERSION = 1
+
+# dictionaries of encoded raw data (see RawData.encode()), each one saved as a .npy file
+_DICTIONARIES = ['person_ids', 'event_ids', 'competition_ids']
+
+# first part of the names of the snapshot .npy files: table or dictionary
+_FILE_PREFIXES = ['results', 'competitions', 'dictionary']
+
+# how a column is stored on disk
+# numerical columns are a single .npy file, other columns are dictionary encoded (codes and categories .npy files)
+_KIND_VALUES = 'values'
+_KIND_CATEGORY = 'category'
+_KIND_OBJECT = 'object'
+
+
+def save(raw_data: RawData, directory: str, fingerprint: str) -> None:
+    """
+    Save raw data as a set of memory-mappable .npy files, one or two per column,
+    plus one per dictionary when encoded.
+
+    Object columns are saved dictionary encoded but loaded back as objects, rebuilding one python string
+    per row: save encoded data (see RawData.encode()) for a warm start mostly made of memory-mapping
+
+    Parameters
+    ----------
+    raw_data: RawData
+        Data to save
+    directory: str
+        Snapshot directory, created if needed. An existing snapshot is overwritten
+    fingerprint: str
+        Fingerprint of the source the data comes from, see db_data_loader.fingerprint()
+        and export_data_loader.fingerprint()
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    # metadata is written last: a snapshot without metadata is never considered valid
+    metadata_path = os.path.join(directory, METADATA_FILE_NAME)
+    if os.path.exists(metadata_path):
+        os.remove(metadata_path)
+
+    # files of a previous snapshot, which may have other columns
+    for file_name in os.listdir(directory):
+        if file_name.endswith('.npy') and file_name.split('.')[0] in _FILE_PREFIXES:
+            os.remove(os.path.join(directory, file_name))
+
+    tables = {
+        'results': _save_table(raw_data.results, directory, 'results'),
+        'competitions': _save_table(raw_data.competitions, directory, 'competitions')
+    }
+
+    dictionaries = [] # type: List[str]
+    if raw_data.encoded:
+        for name in _DICTIONARIES:
+            np.save(_dictionary_path(directory, name), _to_file_array(getattr(raw_data, name)))
+            dictionaries.append(name)
+
+    metadata = {'version': FORMAT_VERSION, 'fingerprint': fingerprint, 'tables': tables, 'dictionaries': dictionaries}
+
+    with open(metadata_path, 'w') as metadata_file:
+        json.dump(metadata, metadata_file)
+
+
+def load(directory: str, fingerprint: Optional[str] = None) -> Optional[RawData]:
+    """
+    Load raw data from a snapshot. Numerical columns and dictionary codes are memory-mapped,
+    object columns are rebuilt as python strings (see save())
+
+    Parameters
+    ----------
+    directory: str
+        Snapshot directory
+    fingerprint: str, optional
+        Expected source fingerprint. If given and different from the snapshot one, the snapshot is ignored
+
+    Returns
+    -------
+    RawData
+        Snapshot data, or None if there is no valid snapshot. Encoded if the saved data was
+    """
+    metadata = _read_metadata(directory)
+
+    if metadata is None:
+        return None
+
+    if fingerprint is not None and metadata['fingerprint'] != fingerprint:
+        return None
+
+    results = _load_table(directory, 'results', metadata['tables']['results'])
+    competitions = _load_table(directory, 'competitions', metadata['tables']['competitions'])
+
+    dictionaries = {name: _from_file_array(np.load(_dictionary_path(directory, name)))
+        for name in metadata.get('dictionaries', [])}
+
+    return RawData(results, competitions, **dictionaries)
+
+
+def load_or_create(directory: str, fingerprint: str, loader: Callable[[], RawData]) -> RawData:
+    """
+    Load raw data from a snapshot, or from the source if the snapshot is missing or outdated.
+    In the latter case, the snapshot is refreshed
+
+    Parameters
+    ----------
+    directory: str
+        Snapshot directory
+    fingerprint: str
+        Fingerprint of the source
+    loader: Callable[[], RawData]
+        Function loading data from the source, ex: db_data_loader.load
+
+    Returns
+    -------
+    RawData
+    """
+    raw_data = load(directory, fingerprint)
+
+    if raw_data is None:
+        raw_data = loader()
+        save(raw_data, directory, fingerprint)
+
+    return raw_data
+
+
+def _read_metadata(directory: str) -> Optional[Dict[str, Any]]:
+    metadata_path = os.path.join(directory, METADATA_FILE_NAME)
+
+    if not os.path.exists(metadata_path):
+        return None
+
+    with open(metadata_path) as metadata_file:
+        metadata = json.load(metadata_file) # type: Dict[str, Any]
+
+    if metadata.get('version') != FORMAT_VERSION:
+        return None
+
+    return metadata
+
+
+def _column_path(directory: str, table_name: str, column: str, part: str) -> str:
+    return os.path.join(directory, f'{table_name}.{column}.{part}.npy')
+
+
+def _dictionary_path(directory: str, name: str) -> str:
+    return os.path.join(directory, f'dictionary.{name}.npy')
+
+
+def _to_file_array(values: pd.Index) -> NDArray[Any]:
+    array = np.asarray(values) # type: NDArray[Any]
+    # fixed width strings can be memory-mapped, python objects can't
+    return array.astype(str) if array.dtype == object else array
+
+
+def _from_file_array(array: NDArray[Any]) -> pd.Index:
+    # back to python strings, as in the source table
+    return pd.Index(array.astype(object) if array.dtype.kind == 'U' else array)
+
+
+def _save_table(table: DataFrame, directory: str, table_name: str) -> List[List[str]]:
+    """
+    Save each column of the table, returning the list of [column, kind]
+    """
+    columns = [] # type: List[List[str]]
+
+    for column in table.columns:
+        series = table[column]
+
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            kind = _KIND_CATEGORY
+            categorical = series.array
+        elif series.dtype == object:
+            kind = _KIND_OBJECT
+            categorical = pd.Categorical(series)
+        else:
+            kind = _KIND_VALUES
+            np.save(_column_path(directory, table_name, column, kind), series.to_numpy())
+            columns.append([column, kind])
+            continue
+
+        np.save(_column_path(directory, table_name, column, 'codes'), categorical.codes)
+        np.save(_column_path(directory, table_name, column, 'categories'), _to_file_array(categorical.categories))
+        columns.append([column, kind])
+
+    return columns
+
+
+def _load_table(directory: str, table_name: str, columns: List[List[str]]) -> DataFrame:
+    data = {} # type: Dict[str, Series]
+
+    for column, kind in columns:
+        if kind == _KIND_VALUES:
+            data[column] = pd.Series(np.load(_column_path(directory, table_name, column, kind), mmap_mode='r'), copy=False)
+            continue
+
+        codes = np.load(_column_path(directory, table_name, column, 'codes'), mmap_mode='r')
+        categories = _from_file_array(np.load(_column_path(directory, table_name, column, 'categories')))
+        categorical = pd.Categorical.from_codes(codes, categories=categories)
+
+        if kind == _KIND_OBJECT:
+            # python strings have to be materialized
+            data[column] = pd.Series(np.asarray(categorical), dtype=object)
+        else:
+            data[column] = pd.Series(categorical)
+
+    return pd.DataFrame(data, copy=False)
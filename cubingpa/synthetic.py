@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+from numpy.typing import NDArray
+from typing import Any, Dict, Sequence, Tuple
+
+from cubingpa.events import EventId
+from cubingpa.raw_data import RawData
+
+
+# range of the first result of a person, in centiseconds
+_DEFAULT_TIME_RANGE = (3000, 30000)
+_TIME_RANGES = {
+    EventId.E_222: (200, 2000),
+    EventId.E_333: (700, 12000),
+    EventId.E_444: (2500, 30000),
+    EventId.E_555: (5000, 50000),
+    EventId.E_333_BF: (3000, 60000),
+    EventId.E_444_BF: (15000, 200000),
+    EventId.E_555_BF: (30000, 400000)
+} # type: Dict[EventId, Tuple[int, int]]
+
+
+def generate(persons: int = 1000, events: Sequence[EventId] = (EventId.E_333,), competitions: int = 500,
+    results_per_person: int = 10, first_year: int = 2004, last_year: int = 2019, participation: float = 0.8,
+    invalid_ratio: float = 0.1, seed: int = 0) -> RawData:
+    """
+    Generate random raw data looking like the WCA one, for tests and benchmarks.
+
+    Each person takes part in each event with the given probability, at random competitions
+    (at most one result per competition) from a random first one. Times follow an improvement
+    curve: exponential decrease from a random first time towards a random fraction of it, with noise.
+
+    Parameters
+    ----------
+    persons: int, optional
+        Number of persons. Default: 1000
+    events: Sequence[EventId], optional
+        Events to generate results for. Default: 3x3x3 only
+    competitions: int, optional
+        Number of competitions, at distinct dates. Default: 500
+    results_per_person: int, optional
+        Average number of results per person and event (before removing duplicate competitions). Default: 10
+    first_year: int, optional
+        Year of the first competition. Default: 2004
+    last_year: int, optional
+        Year of the last competition. Default: 2019
+    participation: float, optional
+        Probability for a person to take part in an event. Default: 0.8
+    invalid_ratio: float, optional
+        Ratio of DNF results (-1). Default: 0.1
+    seed: int, optional
+        Random seed, same seed gives same data. Default: 0
+
+    Returns
+    -------
+    RawData
+        Same layout as the one returned by cubingpa.db_data_loader.load()
+    """
+    rng = np.random.default_rng(seed)
+
+    competitions_df = _generate_competitions(rng, competitions, first_year, last_year)
+
+    results = [_generate_event_results(rng, event, persons, competitions, results_per_person, participation, invalid_ratio)
+        for event in events]
+    results_df = pd.concat(results, ignore_index=True) if len(results) > 0 \
+        else pd.DataFrame(columns=['personId', 'eventId', 'best', 'competitionId'])
+
+    return RawData(results_df, competitions_df)
+
+
+def _generate_competitions(rng: np.random.Generator, competitions: int, first_year: int, last_year: int) -> pd.DataFrame:
+    first_day = np.datetime64(f'{first_year}-01-01', 'D')
+    days_count = int((np.datetime64(f'{last_year + 1}-01-01', 'D') - first_day).astype(np.int64))
+
+    if competitions > days_count:
+        raise ValueError("More competitions than days")
+
+    # distinct dates, in chronological order of the ids
+    days = np.sort(rng.choice(days_count, competitions, replace=False))
+    dates = pd.DatetimeIndex(first_day + days)
+
+    return pd.DataFrame({'id': _competition_ids(np.arange(competitions)),
+        'YEAR': dates.year, 'MONTH': dates.month, 'DAY': dates.day})
+
+
+def _generate_event_results(rng: np.random.Generator, event: EventId, persons: int, competitions: int,
+    results_per_person: int, participation: float, invalid_ratio: float) -> pd.DataFrame:
+    # persons taking part in the event
+    participants = np.flatnonzero(rng.random(persons) < participation)
+
+    # random competitions from a random first one, for each participant
+    counts = rng.integers(1, 2 * results_per_person, len(participants))
+    firsts = rng.integers(0, competitions, len(participants))
+    owners = np.repeat(np.arange(len(participants)), counts)
+    starts = firsts[owners]
+    competition_numbers = starts + (rng.random(len(owners)) * (competitions - starts)).astype(np.int64)
+
+    # at most one result per competition, sorted by competition for each participant
+    keys = np.unique(owners * competitions + competition_numbers)
+    owners = keys // competitions
+    competition_numbers = keys % competitions
+
+    # number of the result in the participant's results
+    first_results = np.searchsorted(owners, np.arange(len(participants)))
+    ranks = np.arange(len(owners)) - first_results[owners]
+
+    # improvement curve of each participant
+    low, high = _TIME_RANGES.get(event, _DEFAULT_TIME_RANGE)
+    first_times = np.exp(rng.uniform(np.log(low), np.log(high), len(participants)))
+    floors = rng.uniform(0.3, 0.8, len(participants))
+    rates = rng.uniform(0.05, 0.5, len(participants))
+
+    times = first_times[owners] * (floors[owners] + (1 - floors[owners]) * np.exp(-rates[owners] * ranks))
+    times *= rng.lognormal(0, 0.08, len(owners))
+    best = np.maximum(times, 1).astype(np.int64)
+    best[rng.random(len(owners)) < invalid_ratio] = -1
+
+    return pd.DataFrame({'personId': _person_ids(participants[owners]),
+        'eventId': np.full(len(owners), event.value, dtype=object),
+        'best': best,
+        'competitionId': _competition_ids(competition_numbers)})
+
+
+def _person_ids(numbers: NDArray[np.int64]) -> NDArray[Any]:
+    return np.char.add('2010SYNT', np.char.zfill(numbers.astype(str), 6)).astype(object)
+
+
+def _competition_ids(numbers: NDArray[np.int64]) -> NDArray[Any]:
+    return np.char.add('Synthetic', np.char.zfill(numbers.astype(str), 6)).astype(object)
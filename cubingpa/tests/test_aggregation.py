@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+import pytest
+from numpy.typing import NDArray
+
+from cubingpa import data_filter, synthetic
+from cubingpa.aggregation import Aggregator, MeanAggregator, QuantileAggregator, bootstrap_average
+from cubingpa.curve_store import CurveStore
+from cubingpa.events import EventId
+from cubingpa.reference_processor import ReferenceProcessor
+from cubingpa.time_grid import TimeGrid, Resolution
+
+
+def day(date: str) -> int:
+    return int(np.datetime64(date, 'D').astype(np.int64))
+
+
+
+def test_mean_overlapping() -> None:
+    aggregator = MeanAggregator()
+    aggregator.add(day('2019-01-02'), np.array([30.0, 20.0, 10.0]))
+    aggregator.add(day('2019-01-01'), np.array([50.0, 40.0, 30.0]))
+    df_expected = pd.DataFrame({'Average time': [50.0, 35.0, 25.0, 10.0]},
+        index=pd.to_datetime(['01/01/2019','01/02/2019','01/03/2019','01/04/2019']))
+    df_after = aggregator.to_dataframe()
+    assert df_expected.equals(df_after)
+
+def test_mean_disjoint() -> None:
+    aggregator = MeanAggregator()
+    aggregator.add(day('2019-01-01'), np.array([50.0]))
+    aggregator.add(day('2019-01-04'), np.array([30.0, 20.0]))
+    df_expected = pd.DataFrame({'Average time': [50.0, 30.0, 20.0]},
+        index=pd.to_datetime(['01/01/2019','01/04/2019','01/05/2019']))
+    df_after = aggregator.to_dataframe()
+    assert df_expected.equals(df_after)
+
+def test_mean_extended_day_by_day() -> None:
+    aggregator = MeanAggregator()
+    for offset in range(10):
+        aggregator.add(day('2019-01-01') + offset, np.array([float(offset)]))
+    df_after = aggregator.to_dataframe()
+    assert list(df_after['Average time']) == [float(offset) for offset in range(10)]
+    assert df_after.index[-1] == pd.Timestamp('2019-01-10')
+
+def test_quantiles_single_value() -> None:
+    aggregator = QuantileAggregator(1.0, 100.0)
+    aggregator.add(day('2019-01-01'), np.array([50.0, 40.0]))
+    df_after = aggregator.to_dataframe()
+    assert list(df_after.columns) == ['p10', 'p25', 'p50', 'p75', 'p90']
+    assert list(df_after.index) == list(pd.to_datetime(['01/01/2019','01/02/2019']))
+    # within the relative precision of a bin: 100 ** (1 / 512)
+    assert np.allclose(df_after['p50'], [50.0, 40.0], rtol=0.01)
+    assert np.allclose(df_after['p10'], df_after['p90'])
+
+def test_quantiles_many_curves() -> None:
+    aggregator = QuantileAggregator(1.0, 1000.0, quantiles=[0.1, 0.5, 0.9], bins=1024)
+    values = np.arange(1.0, 1001.0)
+    for value in values:
+        aggregator.add(day('2019-01-01'), np.array([value]))
+    df_after = aggregator.to_dataframe()
+    assert list(df_after.columns) == ['p10', 'p50', 'p90']
+    expected = np.quantile(values, [0.1, 0.5, 0.9])
+    assert np.allclose(df_after.iloc[0], expected, rtol=0.01)
+
+def test_quantiles_few_values() -> None:
+    aggregator = QuantileAggregator(1.0, 100.0, quantiles=[0.5])
+    aggregator.add(day('2019-01-01'), np.array([40.0, 50.0]))
+    df_after = aggregator.to_dataframe()
+    # DataFrame.quantile() interpolates between the values (45), the histogram within the bin of 40
+    assert 40.0 <= df_after['p50'].iloc[0] < 41.0
+
+def test_process_quantiles_close_to_exact_on_days_with_many_curves() -> None:
+    filtered_results = data_filter.filter(synthetic.generate(2000, seed=1), EventId.E_333)
+    processed_results = ReferenceProcessor(filtered_results).process()
+    df_after = ReferenceProcessor(filtered_results).process_quantiles(quantiles=[0.5])
+    exact = processed_results.quantile(0.5, axis=1)
+    errors = ((df_after['p50'] - exact) / exact).abs()
+    counts = processed_results.notna().sum(axis=1)
+    assert errors[counts >= 100].max() < 0.02
+    assert errors[counts >= 200].max() < 0.01
+
+def test_quantiles_remove() -> None:
+    aggregator = QuantileAggregator(1.0, 100.0, quantiles=[0.5])
+    aggregator.add(day('2019-01-01'), np.array([10.0, 10.0]))
+    aggregator.add(day('2019-01-01'), np.array([90.0, 90.0]))
+    aggregator.remove(day('2019-01-02'), np.array([90.0]))
+    df_after = aggregator.to_dataframe()
+    assert np.isclose(df_after['p50'].iloc[1], 10.0, rtol=0.01)
+
+def test_mean_weekly() -> None:
+    grid = TimeGrid('W')
+    aggregator = MeanAggregator(grid)
+    slots = grid.slots(np.array([day('2019-01-07')]))
+    aggregator.add(int(slots[0]), np.array([50.0, 40.0]))
+    aggregator.add(int(slots[0]) + 1, np.array([30.0]))
+    df_expected = pd.DataFrame({'Average time': [50.0, 35.0]}, index=pd.to_datetime(['01/07/2019','01/14/2019']))
+    df_after = aggregator.to_dataframe()
+    assert df_expected.equals(df_after)
+    assert aggregator.parameters() == {'resolution': 'W'}
+
+@pytest.mark.parametrize('resolution', ['W', 'M', 10])
+def test_process_average_resolution(resolution: Resolution) -> None:
+    filtered_results = data_filter.filter(synthetic.generate(200, seed=3), EventId.E_333)
+    df_daily = ReferenceProcessor(filtered_results).process_average()
+    df_after = ReferenceProcessor(filtered_results).process_average(resolution=resolution)
+    # same values as the daily average, at the points of the grid only
+    assert np.allclose(df_daily.loc[df_after.index, 'Average time'], df_after['Average time'])
+    processed_results = ReferenceProcessor(filtered_results).process(resolution=resolution)
+    assert processed_results.index.equals(df_after.index)
+    assert np.allclose(processed_results.mean(axis=1), df_after['Average time'])
+
+def test_process_quantiles_weekly() -> None:
+    filtered_results = data_filter.filter(synthetic.generate(200, seed=3), EventId.E_333)
+    df_daily = ReferenceProcessor(filtered_results).process_quantiles(bins=64)
+    df_after = ReferenceProcessor(filtered_results).process_quantiles(bins=64, resolution='W')
+    assert (df_after.index.dayofweek == 0).all()
+    assert df_daily.loc[df_after.index].equals(df_after)
+
+def test_bootstrap_average() -> None:
+    store = CurveStore()
+    store.append('person1', day('2019-01-01'), np.array([0, 2]), np.array([50.0, 40.0]))
+    store.append('person2', day('2019-01-02'), np.array([0, 2]), np.array([30.0, 10.0]))
+    df_after = bootstrap_average(store, resamples=50)
+    assert list(df_after.columns) == ['Average time', 'Lower bound', 'Upper bound']
+    assert list(df_after['Average time']) == [50.0, 37.5, 30.0, 10.0]
+    # a single curve on the first and last days: no uncertainty
+    assert list(df_after['Lower bound'].iloc[[0, 3]]) == [50.0, 10.0]
+    assert (df_after['Lower bound'] <= df_after['Average time']).all()
+    assert (df_after['Upper bound'] >= df_after['Average time']).all()
+    assert df_after.equals(bootstrap_average(store, resamples=50))
+
+def test_process_preview() -> None:
+    filtered_results = data_filter.filter(synthetic.generate(300, seed=4), EventId.E_333)
+    df_full = ReferenceProcessor(filtered_results).process_average()
+    # all the persons
+    df_after = ReferenceProcessor(filtered_results).process_preview(fraction=1)
+    assert np.allclose(df_full['Average time'], df_after['Average time'])
+    # same seed, same sample
+    df_sample = ReferenceProcessor(filtered_results).process_preview(fraction=0.2, seed=1)
+    assert df_sample.equals(ReferenceProcessor(filtered_results).process_preview(fraction=0.2, seed=1))
+    assert not df_sample.equals(ReferenceProcessor(filtered_results).process_preview(fraction=0.2, seed=2))
+
+def test_incomplete_aggregator_not_created() -> None:
+    class NoResizeAggregator(Aggregator):
+        def to_dataframe(self) -> pd.DataFrame:
+            return pd.DataFrame()
+
+        def _add(self, offset: int, values: NDArray[np.float64], sign: int) -> None:
+            pass
+
+    with pytest.raises(TypeError):
+        NoResizeAggregator() # type: ignore[abstract]
@@ -0,0 +1,27 @@
+import pandas as pd
+
+from cubingpa import batch
+from cubingpa.events import EventId
+from cubingpa.raw_data import RawData
+
+
+def create_raw_data() -> RawData:
+    df_results = pd.DataFrame({'personId': ['person1', 'person1', 'person1', 'person2', 'person2',
+        'person1', 'person1', 'person2', 'person2'],
+        'eventId': ['333', '333', '333', '333', '333', '444', '444', '444', '444'],
+        'best': [5000, 4000, 3000, 4500, 3500, 9000, 8000, 8500, 7000],
+        'competitionId': ['comp1', 'comp2', 'comp3', 'comp2', 'comp3', 'comp1', 'comp3', 'comp2', 'comp3']})
+    df_competitions = pd.DataFrame({'id': ['comp1', 'comp2', 'comp3'], 'YEAR': [2011, 2011, 2012],
+        'MONTH': [1, 3, 1], 'DAY': [1, 1, 1]})
+    return RawData(df_results, df_competitions)
+
+
+
+def test_process_events_same_as_sequential() -> None:
+    raw_data = create_raw_data()
+    events = [EventId.E_333, EventId.E_444]
+    results = batch.process_events(raw_data, events, processes=2)
+    assert list(results) == events
+    for event in events:
+        df_expected = batch.process_event(raw_data, event)
+        assert df_expected.equals(results[event])
@@ -0,0 +1,25 @@
+import os
+from typing import Any
+
+from cubingpa import benchmark, export_data_loader, synthetic
+
+
+
+def test_run_all_stages() -> None:
+    measures = benchmark.run(scales=[50, 100], track_memory=True)
+    assert list(measures['persons'].unique()) == [50, 100]
+    stages = list(measures[measures['persons'] == 50]['stage'])
+    assert stages[:2] == ['load export', 'load snapshot']
+    assert stages[-3:] == ['process', 'processed dataframe', 'process average']
+    assert len([stage for stage in stages if stage.startswith('filter: ')]) == 7
+    assert (measures['seconds'] >= 0).all()
+    assert (measures['peak_memory'] > 0).all()
+
+def test_write_export(tmp_path: Any) -> None:
+    raw_data = synthetic.generate(20)
+    export_path = os.path.join(tmp_path, 'WCA_export.tsv.zip')
+    benchmark.write_export(raw_data, export_path)
+    loaded = export_data_loader.load(export_path)
+    assert list(loaded.results['personId']) == list(raw_data.results['personId'])
+    assert list(loaded.results['best']) == list(raw_data.results['best'])
+    assert list(loaded.competitions['YEAR']) == list(raw_data.competitions['YEAR'])
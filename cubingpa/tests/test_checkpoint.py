@@ -0,0 +1,82 @@
+import os
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from typing import Any
+
+from cubingpa import checkpoint
+from cubingpa.reference_processor import ReferenceProcessor
+
+
+def create_filtered_results() -> pd.DataFrame:
+    rows = [('person1', 100.0, datetime(2010,1,1)), ('person1', 90.0, datetime(2010,1,11)),
+        ('person2', 80.0, datetime(2011,1,1)), ('person2', 70.0, datetime(2011,2,1)),
+        ('person3', 75.0, datetime(2012,1,1)), ('person3', 60.0, datetime(2012,3,1)),
+        ('person4', 72.0, datetime(2012,1,1)), ('person4', 50.0, datetime(2012,5,1)),
+        ('person5', 55.0, datetime(2013,1,1)), ('person5', 45.0, datetime(2013,1,5)),
+        ('person6', 30.0, datetime(2013,1,1)), ('person6', 29.0, datetime(2013,1,5))]
+    return pd.DataFrame(rows, columns=['personId', 'best', 'date'])
+
+
+
+def test_save_load(tmp_path: Any) -> None:
+    path = os.path.join(tmp_path, 'checkpoint.npz')
+    checkpoint.save(path, {'next_position': 3}, {'values': np.array([1.0, 2.0])})
+    loaded = checkpoint.load(path)
+    assert loaded is not None
+    metadata, arrays = loaded
+    assert metadata['next_position'] == 3
+    assert list(arrays['values']) == [1.0, 2.0]
+    assert not os.path.exists(path + '.tmp')
+
+def test_load_missing(tmp_path: Any) -> None:
+    assert checkpoint.load(os.path.join(tmp_path, 'checkpoint.npz')) is None
+
+def test_resume_killed_process(tmp_path: Any) -> None:
+    path = os.path.join(tmp_path, 'checkpoint.npz')
+    filtered_results = create_filtered_results()
+    df_expected = ReferenceProcessor(filtered_results).process()
+
+    # save a checkpoint before each person, then stop while processing the 4th one
+    processor = ReferenceProcessor(filtered_results, path, checkpoint_interval=0)
+    add_curve = processor._add_curve
+    def killed_add_curve(person_id: str, start_day: int) -> None:
+        if len(processor._curve_store) == 3:
+            raise KeyboardInterrupt()
+        add_curve(person_id, start_day)
+    processor._add_curve = killed_add_curve # type: ignore
+    try:
+        processor.process()
+    except KeyboardInterrupt:
+        pass
+
+    df_after = ReferenceProcessor(filtered_results, path).process()
+    assert df_expected.equals(df_after)
+
+def test_incremental_update(tmp_path: Any) -> None:
+    path = os.path.join(tmp_path, 'checkpoint.npz')
+    filtered_results = create_filtered_results()
+    df_expected = ReferenceProcessor(filtered_results).process()
+
+    ReferenceProcessor(filtered_results[filtered_results['personId'] != 'person5'], path).process()
+    processor = ReferenceProcessor(filtered_results, path)
+    df_after = processor.process()
+    assert df_expected.equals(df_after)
+
+def test_incremental_update_average(tmp_path: Any) -> None:
+    path = os.path.join(tmp_path, 'checkpoint.npz')
+    filtered_results = create_filtered_results()
+    df_expected = ReferenceProcessor(filtered_results).process_average()
+
+    ReferenceProcessor(filtered_results[filtered_results['personId'] != 'person6'], path).process_average()
+    df_after = ReferenceProcessor(filtered_results, path).process_average()
+    pd.testing.assert_frame_equal(df_expected, df_after)
+
+def test_incremental_update_quantiles(tmp_path: Any) -> None:
+    path = os.path.join(tmp_path, 'checkpoint.npz')
+    filtered_results = create_filtered_results()
+    df_expected = ReferenceProcessor(filtered_results).process_quantiles()
+
+    ReferenceProcessor(filtered_results[filtered_results['personId'] != 'person5'], path).process_quantiles()
+    df_after = ReferenceProcessor(filtered_results, path).process_quantiles()
+    pd.testing.assert_frame_equal(df_expected, df_after)
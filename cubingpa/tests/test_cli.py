@@ -0,0 +1,50 @@
+import os
+import sys
+import subprocess
+import pandas as pd
+from typing import Any
+
+from cubingpa import batch, benchmark, cli, curve_file, synthetic
+from cubingpa.events import EventId
+
+
+def create_export(directory: str) -> str:
+    export_path = os.path.join(directory, 'WCA_export.tsv.zip')
+    benchmark.write_export(synthetic.generate(100, events=[EventId.E_333, EventId.E_444]), export_path)
+    return export_path
+
+
+
+def test_export_to_csv(tmp_path: Any) -> None:
+    export_path = create_export(tmp_path)
+    output = os.path.join(tmp_path, 'output')
+    cli.main(['333', '444', '--export', export_path, '--output', output])
+    assert sorted(os.listdir(output)) == ['333.csv', '444.csv']
+    df_after = pd.read_csv(os.path.join(output, '333.csv'), index_col='date', parse_dates=True)
+    df_expected = batch.process_event(synthetic.generate(100, events=[EventId.E_333, EventId.E_444]), EventId.E_333)
+    assert list(df_after['Average time'].round(6)) == list(df_expected['Average time'].round(6))
+
+def test_cache_then_snapshot(tmp_path: Any) -> None:
+    export_path = create_export(tmp_path)
+    cache = os.path.join(tmp_path, 'cache')
+    cli.main(['333', '--export', export_path, '--cache', cache, '-o', os.path.join(tmp_path, 'first')])
+    cli.main(['333', '--snapshot', cache, '-o', os.path.join(tmp_path, 'second')])
+    with open(os.path.join(tmp_path, 'first', '333.csv')) as first, open(os.path.join(tmp_path, 'second', '333.csv')) as second:
+        assert first.read() == second.read()
+
+def test_no_db_nor_plotting_imports(tmp_path: Any) -> None:
+    export_path = create_export(tmp_path)
+    script = ("import sys\n"
+        "from cubingpa import cli\n"
+        f"cli.main(['333', '--export', {export_path!r}, '-o', {os.path.join(tmp_path, 'output')!r}])\n"
+        "assert 'sqlalchemy' not in sys.modules and 'matplotlib' not in sys.modules, 'heavy module imported'\n")
+    subprocess.run([sys.executable, '-c', script], check=True, capture_output=True)
+
+def test_export_to_curves(tmp_path: Any) -> None:
+    export_path = create_export(tmp_path)
+    output = os.path.join(tmp_path, 'output')
+    cli.main(['333', '--export', export_path, '--format', 'curves', '-o', output])
+    curves = curve_file.load(os.path.join(output, '333'))
+    assert curves is not None
+    assert curves.metadata == {'event': '333'}
+    assert len(curves) > 0
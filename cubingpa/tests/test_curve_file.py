@@ -0,0 +1,55 @@
+import os
+import numpy as np
+import pandas as pd
+from typing import Any
+
+from cubingpa import curve_file, data_filter, synthetic
+from cubingpa.curve_store import CurveStore
+from cubingpa.events import EventId
+from cubingpa.reference_processor import ReferenceProcessor
+
+
+def day(date: str) -> int:
+    return int(np.datetime64(date, 'D').astype(np.int64))
+
+def create_store() -> CurveStore:
+    store = CurveStore()
+    store.append('person1', day('2019-01-01'), np.array([0, 2]), np.array([50.0, 40.0]))
+    store.append('person2', day('2019-01-02'), np.array([0, 1, 2]), np.array([30.0, 20.0, 10.0]))
+    store.append('person3', day('2019-01-06'), np.array([0]), np.array([5.0]))
+    return store
+
+
+
+def test_save_load_curves(tmp_path: Any) -> None:
+    curve_file.save(create_store(), tmp_path, {'event': '333'})
+    curves = curve_file.load(tmp_path)
+    assert curves is not None
+    assert len(curves) == 3
+    assert curves.metadata == {'event': '333'}
+    assert list(curves.ids) == ['person1', 'person2', 'person3']
+    assert curves.start('person2') == day('2019-01-02')
+    assert curves.values('person2').dtype == np.float32
+    assert list(curves.values('person2')) == [30.0, 20.0, 10.0]
+    assert isinstance(curves.values('person2'), np.memmap)
+
+def test_average(tmp_path: Any) -> None:
+    curve_file.save(create_store(), tmp_path)
+    curves = curve_file.load(tmp_path)
+    assert curves is not None
+    df_expected = pd.DataFrame({'Average time': [50.0, 37.5, 30.0, 10.0, 5.0]},
+        index=pd.to_datetime(['01/01/2019','01/02/2019','01/03/2019','01/04/2019','01/06/2019']))
+    assert df_expected.equals(curves.get_average())
+    assert list(curves.get_average('2019-01-03', '2019-01-05')['Average time']) == [30.0, 10.0]
+    assert list(curves.get_counts()) == [1, 2, 2, 1, 0, 1]
+
+def test_average_same_as_processor(tmp_path: Any) -> None:
+    filtered_results = data_filter.filter(synthetic.generate(200), EventId.E_333)
+    curve_file.save(ReferenceProcessor(filtered_results).process_curves(), tmp_path)
+    curves = curve_file.load(tmp_path)
+    assert curves is not None
+    df_expected = ReferenceProcessor(filtered_results).process_average()
+    pd.testing.assert_frame_equal(df_expected, curves.get_average())
+
+def test_load_missing(tmp_path: Any) -> None:
+    assert curve_file.load(os.path.join(tmp_path, 'missing')) is None
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+from cubingpa import curve_store
+from cubingpa.curve_store import CurveStore
+from cubingpa.time_grid import TimeGrid
+
+
+def day(date: str) -> int:
+    return int(np.datetime64(date, 'D').astype(np.int64))
+
+def knots(*pairs: float) -> tuple: # type: ignore
+    return np.array(pairs[0::2], dtype=np.int64), np.array(pairs[1::2], dtype=np.float64)
+
+
+
+def test_append_and_extend() -> None:
+    store = CurveStore()
+    store.append('person1', day('2019-01-01'), *knots(0, 50.0, 1, 45.0))
+    store.extend('person1', 2, 40.0)
+    assert store.ids == ['person1']
+    assert store.start('person1') == day('2019-01-01')
+    assert store.end('person1') == day('2019-01-04')
+    assert list(store.values('person1')) == [50.0, 45.0, 40.0]
+
+def test_values_interpolated_between_knots() -> None:
+    store = CurveStore()
+    store.append('person1', day('2019-01-01'), *knots(0, 50.0, 4, 30.0))
+    store.extend('person1', 6, 20.0)
+    assert store.length('person1') == 7
+    assert store.knots_count('person1') == 3
+    assert list(store.values('person1')) == [50.0, 45.0, 40.0, 35.0, 30.0, 25.0, 20.0]
+    days = np.array([day('2018-12-31'), day('2019-01-02'), day('2019-01-06'), day('2019-01-08')])
+    assert np.array_equal(store.values_at('person1', days), [np.nan, 45.0, 25.0, np.nan], equal_nan=True)
+
+def test_to_dataframe_overlapping() -> None:
+    store = CurveStore()
+    store.append('person1', day('2019-01-01'), *knots(0, 50.0, 1, 45.0, 2, 40.0))
+    store.append('person2', day('2019-01-02'), *knots(0, 30.0, 2, 10.0))
+    df_expected = pd.DataFrame({'person1': [50.0, 45.0, 40.0, np.nan], 'person2': [np.nan, 30.0, 20.0, 10.0]},
+        index=pd.to_datetime(['01/01/2019','01/02/2019','01/03/2019','01/04/2019']))
+    df_after = store.to_dataframe()
+    assert df_expected.equals(df_after)
+
+def test_to_dataframe_disjoint() -> None:
+    store = CurveStore()
+    store.append('person1', day('2019-01-05'), *knots(0, 30.0, 1, 20.0))
+    store.append('person2', day('2019-01-01'), *knots(0, 50.0, 1, 45.0))
+    df_expected = pd.DataFrame({'person1': [np.nan, np.nan, 30.0, 20.0], 'person2': [50.0, 45.0, np.nan, np.nan]},
+        index=pd.to_datetime(['01/01/2019','01/02/2019','01/05/2019','01/06/2019']))
+    df_after = store.to_dataframe()
+    assert df_expected.equals(df_after)
+
+def test_to_dataframe_weekly() -> None:
+    store = CurveStore()
+    store.append('person1', day('2019-01-01'), *knots(0, 50.0, 20, 30.0))
+    store.append('person2', day('2019-01-08'), *knots(0, 40.0, 4, 36.0))
+    store.append('person3', day('2019-01-29'), *knots(0, 10.0, 1, 9.0))
+    df_daily = store.to_dataframe()
+    df_after = store.to_dataframe(TimeGrid('W'))
+    # person2 covers no Monday
+    df_expected = df_daily.loc[pd.to_datetime(['01/07/2019','01/14/2019','01/21/2019'])]
+    assert df_expected.equals(df_after)
+
+def test_extend_many_times() -> None:
+    store = CurveStore()
+    days, times = knots(0, 50.0)
+    store.append('person1', day('2019-01-01'), days, times)
+    for offset in range(1, 10):
+        store.extend('person1', offset, 50.0 - offset)
+    assert store.length('person1') == 10
+    assert list(store.values('person1')) == [50.0 - offset for offset in range(10)]
+    # appended arrays are not modified
+    assert list(days) == [0]
+    assert list(times) == [50.0]
+
+def test_shorten_then_extend() -> None:
+    store = CurveStore()
+    store.append('person1', day('2019-01-01'), *knots(0, 50.0, 1, 45.0))
+    store.extend('person1', 2, 40.0)
+    store.extend('person1', 3, 35.0)
+    store.shorten('person1', 3)
+    store.extend('person1', 4, 30.0)
+    assert list(store.values('person1')) == [50.0, 45.0, 40.0, 35.0, 30.0]
+
+def test_from_arrays() -> None:
+    store = CurveStore()
+    store.append('person1', day('2019-01-01'), *knots(0, 50.0, 2, 40.0))
+    store.append('person2', day('2019-01-02'), *knots(0, 30.0, 1, 10.0))
+    store.extend('person1', 3, 35.0)
+    rebuilt = curve_store.from_arrays(store.to_arrays())
+    assert rebuilt.ids == store.ids
+    assert rebuilt.to_dataframe().equals(store.to_dataframe())
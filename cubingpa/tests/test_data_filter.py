@@ -1,9 +1,13 @@
 import pandas as pd
 from pandas import DataFrame
 from datetime import datetime
+from typing import List
 
-from cubingpa import data_filter
+import pytest
+
+from cubingpa import data_filter, synthetic
 from cubingpa.events import EventId
+from cubingpa.raw_data import RawData
 
 
 def debug_print(df_before: DataFrame, df_after: DataFrame, df_expected: DataFrame) -> None:
@@ -245,3 +249,55 @@ def test_convert_year_month_day_to_date_nominal() -> None:
     debug_print(df_before, df_after, df_expected)
     assert df_expected.equals(df_after)
 
+
+
+
+def create_raw_data(seed: int) -> RawData:
+    raw_data = synthetic.generate(300, events=[EventId.E_333, EventId.E_222], competitions=100, seed=seed)
+    competitions = raw_data.competitions.copy()
+    # competitions on the same date, results of missing competitions, unordered rows
+    competitions.loc[5:20, ['YEAR', 'MONTH', 'DAY']] = competitions.loc[30, ['YEAR', 'MONTH', 'DAY']].to_numpy()
+    competitions = competitions.drop(index=[40, 41, 42]).sample(frac=1, random_state=seed)
+    return RawData(raw_data.results.sample(frac=1, random_state=seed), competitions)
+
+@pytest.mark.parametrize('seed', [0, 1])
+@pytest.mark.parametrize('encoded', [False, True])
+def test_fused_filter_same_as_steps(seed: int, encoded: bool) -> None:
+    raw_data = create_raw_data(seed)
+    if encoded:
+        raw_data = raw_data.encode()
+    for event_id in [EventId.E_333, EventId.E_222, EventId.E_444]:
+        df_expected = data_filter.filter(raw_data, event_id, fused=False)
+        df_after = data_filter.filter(raw_data, event_id)
+        assert df_expected.equals(df_after)
+        assert df_expected.index.equals(df_after.index)
+        assert list(df_expected.dtypes) == list(df_after.dtypes)
+
+def test_fused_filter_duplicate_competitions() -> None:
+    df_results = pd.DataFrame({'personId': ['person1', 'person1'], 'eventId': ['333', '333'], 'best': [5000, 4000],
+        'competitionId': ['comp1', 'comp2']})
+    df_competitions = pd.DataFrame({'id': ['comp1', 'comp2', 'comp2'], 'YEAR': [2011, 2012, 2013], 'MONTH': [1, 1, 1], 'DAY': [1, 1, 1]})
+    raw_data = RawData(df_results, df_competitions)
+    # the join duplicates results, as the steps do
+    assert data_filter.filter(raw_data, EventId.E_333).equals(data_filter.filter(raw_data, EventId.E_333, fused=False))
+    assert len(data_filter.filter(raw_data, EventId.E_333)) == 3
+
+def test_fused_filter_falls_back_to_steps_when_merge_keeps_left_order(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(data_filter, '_MERGE_GROUPS_BY_KEY', False)
+    stages = [] # type: List[str]
+    data_filter.filter(create_raw_data(0), EventId.E_333, sink=lambda event: stages.append(event.data['stage']))
+    assert '_join_results_on_competitions' in stages
+    assert '_sort_and_build' not in stages
+
+@pytest.mark.parametrize('encoded', [False, True])
+def test_filter_many(encoded: bool) -> None:
+    raw_data = create_raw_data(2)
+    if encoded:
+        raw_data = raw_data.encode()
+    events = [EventId.E_222, EventId.E_444, EventId.E_333]
+    filtered_results = data_filter.filter_many(raw_data, events)
+    assert list(filtered_results) == events
+    for event_id in events:
+        df_expected = data_filter.filter(raw_data, event_id, fused=False)
+        assert df_expected.equals(filtered_results[event_id])
+        assert df_expected.index.equals(filtered_results[event_id].index)
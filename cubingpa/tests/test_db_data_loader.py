@@ -0,0 +1,115 @@
+import asyncio
+import sqlite3
+import pandas as pd
+from pathlib import Path
+from sqlalchemy import event
+from typing import Any, List
+
+from cubingpa import db_data_loader, data_filter, synthetic
+from cubingpa.events import EventId
+from cubingpa.reference_processor import ReferenceProcessor
+
+
+def write_db(directory: Path) -> str:
+    raw_data = synthetic.generate(persons=50, events=(EventId.E_333, EventId.E_444), competitions=20)
+    db_path = directory / 'WCA.db'
+
+    with sqlite3.connect(db_path) as connection:
+        results = raw_data.results.astype({'eventId': 'object', 'competitionId': 'object'})
+        results.index.name = 'id'
+        # ids starting at 1, like an auto increment column
+        results.index += 1
+        results.to_sql('Results', connection)
+        raw_data.competitions.to_sql('Competitions', connection, index=False)
+
+    return f'sqlite:///{db_path}'
+
+
+
+def test_load_event_pushdown(tmp_path: Path) -> None:
+    url = write_db(tmp_path)
+    raw_data = db_data_loader.load(url=url)
+    event_raw_data = db_data_loader.load(EventId.E_444, url=url)
+    assert set(event_raw_data.results['eventId']) == {'444'}
+    assert (event_raw_data.results['best'] != -1).all()
+    df_expected = data_filter.filter(raw_data, EventId.E_444).reset_index(drop=True)
+    df_after = data_filter.filter(event_raw_data, EventId.E_444).reset_index(drop=True)
+    assert df_expected.equals(df_after)
+
+def test_load_chunked(tmp_path: Path) -> None:
+    url = write_db(tmp_path)
+    raw_data = db_data_loader.load(url=url)
+    chunked_raw_data = db_data_loader.load(url=url, chunksize=7)
+    for column in ['personId', 'eventId', 'competitionId']:
+        assert isinstance(chunked_raw_data.results[column].dtype, pd.CategoricalDtype)
+        assert list(chunked_raw_data.results[column].cat.categories) == sorted(set(raw_data.results[column]))
+    assert chunked_raw_data.results['best'].dtype == 'int32'
+    assert chunked_raw_data.results.astype(raw_data.results.dtypes.to_dict()).equals(raw_data.results)
+    df_expected = ReferenceProcessor(data_filter.filter(raw_data, EventId.E_333)).process_average()
+    df_after = ReferenceProcessor(data_filter.filter(chunked_raw_data, EventId.E_333)).process_average()
+    assert df_expected.equals(df_after)
+
+def test_load_chunked_streams_results(tmp_path: Path) -> None:
+    url = write_db(tmp_path)
+    engine = db_data_loader.get_engine(url)
+    # stream_results option of the connection running each Results query
+    streamed = [] # type: List[bool]
+
+    def record(connection: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        if 'FROM Results' in statement:
+            streamed.append(bool(connection.get_execution_options().get('stream_results')))
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        db_data_loader.load(url=url, chunksize=7)
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+    assert streamed == [True]
+
+def test_load_partitions_same_as_single_query(tmp_path: Path) -> None:
+    url = write_db(tmp_path)
+    raw_data = db_data_loader.load(url=url)
+    partitioned_raw_data = db_data_loader.load(url=url, partitions=3)
+    assert len(raw_data.results) > 0
+    assert raw_data.results.equals(partitioned_raw_data.results)
+    assert raw_data.competitions.equals(partitioned_raw_data.competitions)
+
+def test_load_partitions_chunked(tmp_path: Path) -> None:
+    url = write_db(tmp_path)
+    raw_data = db_data_loader.load(url=url, chunksize=7)
+    partitioned_raw_data = db_data_loader.load(url=url, chunksize=7, partitions=4)
+    assert raw_data.results['best'].dtype == 'int32'
+    assert raw_data.results.equals(partitioned_raw_data.results)
+
+def test_load_partitions_event(tmp_path: Path) -> None:
+    url = write_db(tmp_path)
+    raw_data = db_data_loader.load(EventId.E_444, url=url)
+    partitioned_raw_data = db_data_loader.load(EventId.E_444, url=url, partitions=5)
+    assert set(raw_data.results['eventId']) == {'444'}
+    assert raw_data.results.equals(partitioned_raw_data.results)
+    df_expected = data_filter.filter(raw_data, EventId.E_444)
+    df_after = data_filter.filter(partitioned_raw_data, EventId.E_444)
+    assert df_expected.equals(df_after)
+
+def test_engine_reused(tmp_path: Path) -> None:
+    url = write_db(tmp_path)
+    engine = db_data_loader.get_engine(url)
+    db_data_loader.load(url=url, partitions=2)
+    db_data_loader.fingerprint(url)
+    assert db_data_loader.get_engine(url) is engine
+
+def test_load_async(tmp_path: Path) -> None:
+    url = write_db(tmp_path)
+
+    async def load_both() -> None:
+        first, second = await asyncio.gather(db_data_loader.load_async(url=url), db_data_loader.load_async(url=url, partitions=2))
+        assert first.results.equals(second.results)
+
+    asyncio.run(load_both())
+
+def test_fingerprint(tmp_path: Path) -> None:
+    url = write_db(tmp_path)
+    raw_data = db_data_loader.load(url=url)
+    rows = len(raw_data.results)
+    assert db_data_loader.fingerprint(url).startswith(f'db:Results:{rows}/{rows}:Competitions:')
@@ -0,0 +1,56 @@
+import zipfile
+import pandas as pd
+from pathlib import Path
+
+from cubingpa import export_data_loader, data_filter
+from cubingpa.events import EventId
+from cubingpa.raw_data import RawData
+
+
+RESULTS_TSV = (
+    'competitionId\teventId\troundTypeId\tpos\tbest\taverage\tpersonName\tpersonId\n'
+    'Comp2011\t333\t1\t1\t1500\t1700\tPerson "One\t2011ONEP01\n'
+    'Comp2011\t333bf\t1\t1\t-1\t0\tPerson "One\t2011ONEP01\n'
+    'Comp2012\t333\t1\t2\t1200\t1300\tPerson "One\t2011ONEP01\n'
+    'Comp2011\t333\t1\t2\t2000\t2100\tPerson Two\t2011TWOP01\n'
+    'Comp2012\t333\t1\t1\t1800\t1900\tPerson Two\t2011TWOP01\n'
+    'Comp2012\t444\t1\t1\t9000\t9500\tPerson Two\t2011TWOP01\n'
+)
+
+COMPETITIONS_TSV = (
+    'id\tname\tinformation\tyear\tmonth\tday\tendMonth\tendDay\n'
+    'Comp2011\tComp 2011\tsome "quoted\ttext\t2011\t4\t12\t4\t12\n'
+    'Comp2012\tComp 2012\t\t2012\t2\t4\t2\t5\n'
+)
+
+
+def write_export(directory: Path) -> str:
+    export_path = directory / 'WCA_export.tsv.zip'
+    with zipfile.ZipFile(export_path, 'w') as export_zip:
+        export_zip.writestr(export_data_loader.RESULTS_FILE_NAME, RESULTS_TSV)
+        export_zip.writestr(export_data_loader.COMPETITIONS_FILE_NAME, COMPETITIONS_TSV)
+    return str(export_path)
+
+
+
+def test_load_columns(tmp_path: Path) -> None:
+    raw_data = export_data_loader.load(write_export(tmp_path))
+    assert list(raw_data.results.columns) == ['personId', 'eventId', 'best', 'competitionId']
+    assert list(raw_data.competitions.columns) == ['id', 'YEAR', 'MONTH', 'DAY']
+    assert raw_data.results['best'].dtype == 'int32'
+    for column in ['personId', 'eventId', 'competitionId']:
+        assert isinstance(raw_data.results[column].dtype, pd.CategoricalDtype)
+
+def test_load_chunked(tmp_path: Path) -> None:
+    raw_data = export_data_loader.load(write_export(tmp_path), chunksize=2)
+    assert len(raw_data.results) == 6
+    assert list(raw_data.results['eventId']) == ['333', '333bf', '333', '333', '333', '444']
+    assert list(raw_data.results['best']) == [1500, -1, 1200, 2000, 1800, 9000]
+
+def test_load_filter_same_as_object_columns(tmp_path: Path) -> None:
+    raw_data = export_data_loader.load(write_export(tmp_path), chunksize=4)
+    object_raw_data = RawData(raw_data.results.astype({'personId': 'object', 'eventId': 'object', 'competitionId': 'object',
+        'best': 'int64'}), raw_data.competitions.astype({'YEAR': 'int64', 'MONTH': 'int64', 'DAY': 'int64'}))
+    df_after = data_filter.filter(raw_data, EventId.E_333)
+    df_expected = data_filter.filter(object_raw_data, EventId.E_333)
+    assert df_expected.equals(df_after.astype({'personId': 'object'}))
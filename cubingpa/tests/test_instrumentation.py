@@ -0,0 +1,76 @@
+import pandas as pd
+from datetime import datetime
+
+from cubingpa import data_filter, instrumentation, synthetic
+from cubingpa.events import EventId
+from cubingpa.instrumentation import ProfileCollector
+from cubingpa.raw_data import RawData
+from cubingpa.reference_processor import ReferenceProcessor
+
+
+def create_filtered_results() -> pd.DataFrame:
+    # person3 switches the reference to person2 (CASE 1), person4 needs person2 to be interpolated (CASE 2)
+    rows = [('person1', 100.0, datetime(2010,1,1)), ('person1', 90.0, datetime(2010,1,11)),
+        ('person2', 95.0, datetime(2011,1,1)), ('person2', 50.0, datetime(2011,2,1)),
+        ('person3', 80.0, datetime(2012,1,1)), ('person3', 70.0, datetime(2012,3,1)),
+        ('person4', 40.0, datetime(2012,1,1)), ('person4', 35.0, datetime(2012,5,1))]
+    return pd.DataFrame(rows, columns=['personId', 'best', 'date'])
+
+
+
+def test_filter_stages() -> None:
+    df_results = pd.DataFrame({'personId': ['person1', 'person1', 'person2', 'person2', 'person3'],
+        'eventId': ['333', '333', '333', '444', '333'], 'best': [5000, 4000, -1, 3000, 2000],
+        'competitionId': ['comp1', 'comp2', 'comp1', 'comp1', 'comp2']})
+    df_competitions = pd.DataFrame({'id': ['comp1', 'comp2'], 'YEAR': [2011, 2012], 'MONTH': [1, 1], 'DAY': [1, 1]})
+    collector = ProfileCollector()
+    data_filter.filter(RawData(df_results, df_competitions), EventId.E_333, sink=collector, fused=False)
+    stages = collector.stages()
+    assert list(stages['stage']) == ['_filter_on_event', '_remove_invalid_results', '_remove_persons_with_insufficient_results',
+        '_convert_results_to_seconds', '_join_results_on_competitions', '_sort_results', '_convert_year_month_day_to_date']
+    assert list(stages['rows_in'][:3]) == [5, 4, 3]
+    assert list(stages['rows_out'][:3]) == [4, 3, 2]
+
+def test_fused_filter_stages() -> None:
+    df_results = pd.DataFrame({'personId': ['person1', 'person1', 'person2', 'person2', 'person3'],
+        'eventId': ['333', '333', '333', '444', '333'], 'best': [5000, 4000, -1, 3000, 2000],
+        'competitionId': ['comp1', 'comp2', 'comp1', 'comp1', 'comp3']})
+    df_competitions = pd.DataFrame({'id': ['comp1', 'comp2'], 'YEAR': [2011, 2012], 'MONTH': [1, 1], 'DAY': [1, 1]})
+    collector = ProfileCollector()
+    data_filter.filter(RawData(df_results, df_competitions), EventId.E_333, sink=collector)
+    stages = collector.stages()
+    assert list(stages['stage']) == ['_filter_on_event', '_remove_invalid_results', '_remove_persons_with_insufficient_results',
+        '_join_competitions', '_sort_and_build']
+    assert list(stages['rows_in']) == [5, 4, 3, 2, 2]
+    assert list(stages['rows_out']) == [4, 3, 2, 2, 2]
+
+def test_fused_filter_stages_same_counts_as_steps() -> None:
+    raw_data = synthetic.generate(200, events=[EventId.E_333, EventId.E_222], seed=3)
+    steps_collector, fused_collector = ProfileCollector(), ProfileCollector()
+    data_filter.filter(raw_data, EventId.E_333, sink=steps_collector, fused=False)
+    data_filter.filter(raw_data, EventId.E_333, sink=fused_collector)
+    columns = ['stage', 'rows_in', 'rows_out']
+    assert steps_collector.stages()[columns][:3].equals(fused_collector.stages()[columns][:3])
+
+def test_processor_events() -> None:
+    collector = ProfileCollector()
+    ReferenceProcessor(create_filtered_results(), sink=collector).process()
+    names = [event.name for event in collector.events]
+    assert names.count(instrumentation.PERSON) == 3
+    switches = [event.data['case'] for event in collector.events if event.name == instrumentation.REFERENCE_SWITCH]
+    assert switches == [1, 2]
+    interpolations = [event for event in collector.events if event.name == instrumentation.INTERPOLATION]
+    assert len(interpolations) == 1
+    assert interpolations[0].data['curve_id'] == 'person2'
+    assert list(collector.stages()['stage']) == ['preprocess', 'init reference', 'main process', 'dataframe']
+    assert 'CASE 2' in collector.report()
+
+def test_summary() -> None:
+    collector = ProfileCollector()
+    instrumentation.emit(collector, instrumentation.PERSON, 1.0, position=1, person_id='person1')
+    instrumentation.emit(collector, instrumentation.PERSON, 3.0, position=2, person_id='person2')
+    instrumentation.emit(None, instrumentation.PERSON, 5.0, position=3, person_id='person3')
+    summary = collector.summary()
+    assert summary.loc['person', 'count'] == 2
+    assert summary.loc['person', 'total_seconds'] == 4.0
+    assert summary.loc['person', 'max_seconds'] == 3.0
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+from cubingpa import person_curves, data_filter, synthetic
+from cubingpa.events import EventId
+
+
+def create_filtered_results() -> pd.DataFrame:
+    return pd.DataFrame({'personId': ['person1', 'person1', 'person1', 'person1', 'person2', 'person3', 'person3'],
+        'best': [50.0, 45.0, 48.0, 40.0, 30.0, 20.0, 25.0],
+        'date': [datetime(2019,1,1), datetime(2019,1,1), datetime(2019,2,1), datetime(2019,3,1),
+            datetime(2019,1,1), datetime(2019,1,1), datetime(2019,2,1)]})
+
+
+
+def test_preprocess_offsets() -> None:
+    curves = person_curves.preprocess(create_filtered_results())
+    assert list(curves.person_ids) == ['person1', 'person2', 'person3']
+    assert list(curves.offsets) == [0, 2, 3, 4]
+    assert curves.length('person1') == 2
+    assert curves.length('person3') == 1
+
+def test_preprocess_same_as_per_person() -> None:
+    curves = person_curves.preprocess(create_filtered_results())
+    df_expected = pd.DataFrame({'person1': [45.0, 40.0]},
+        index=pd.DatetimeIndex([datetime(2019,1,1), datetime(2019,3,1)], name='date'))
+    df_after = curves.get_dataframe('person1')
+    assert df_expected.equals(df_after)
+
+def test_preprocess_encoded() -> None:
+    filtered_results = create_filtered_results()
+    filtered_results['personId'] = pd.Categorical(filtered_results['personId'], categories=['person0', 'person1', 'person2', 'person3'])
+    curves = person_curves.preprocess(filtered_results)
+    assert list(curves.person_ids) == ['person1', 'person2', 'person3']
+    assert list(curves.get_times('person2')) == [30.0]
+
+def test_subset() -> None:
+    curves = person_curves.preprocess(create_filtered_results()).subset(pd.Index(['person3', 'person1']))
+    assert list(curves.offsets) == [0, 1, 3]
+    assert list(curves.get_times('person1')) == [45.0, 40.0]
+    assert list(curves.get_times('person3')) == [20.0]
+
+def test_preprocess_workers_same_as_single_process() -> None:
+    filtered_results = data_filter.filter(synthetic.generate(persons=3000), EventId.E_333)
+    curves = person_curves.preprocess(filtered_results)
+    parallel_curves = person_curves.preprocess(filtered_results, workers=3)
+    assert curves.person_ids.equals(parallel_curves.person_ids)
+    assert np.array_equal(curves.offsets, parallel_curves.offsets)
+    assert np.array_equal(curves.dates, parallel_curves.dates)
+    assert np.array_equal(curves.times, parallel_curves.times)
+
+def test_split_persons_encoded() -> None:
+    filtered_results = data_filter.filter(synthetic.generate(persons=3000).encode(), EventId.E_333)
+    chunks = person_curves._split_persons(filtered_results, 2)
+    assert len(chunks) == 2
+    assert sum(len(chunk) for chunk in chunks) == len(filtered_results)
+    # persons are not split across chunks, and chunks follow the categories order
+    assert chunks[0]['personId'].cat.codes.max() < chunks[1]['personId'].cat.codes.min()
+    curves = person_curves._concatenate([person_curves._preprocess(chunk) for chunk in chunks])
+    assert curves.person_ids.equals(person_curves.preprocess(filtered_results).person_ids)
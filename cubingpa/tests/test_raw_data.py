@@ -0,0 +1,46 @@
+import pandas as pd
+
+from cubingpa import data_filter
+from cubingpa.events import EventId
+from cubingpa.raw_data import RawData
+
+
+def create_raw_data() -> RawData:
+    df_results = pd.DataFrame({'personId': ['person2', 'person1', 'person2', 'person1', 'person3'],
+        'eventId': ['333', '333', '333', '333bf', '333'], 'best': [1500, 2000, 1400, 9000, 1800],
+        'competitionId': ['comp2', 'comp1', 'comp1', 'comp1', 'comp2']})
+    df_competitions = pd.DataFrame({'id': ['comp1', 'comp2', 'comp3'], 'YEAR': [2011, 2012, 2013],
+        'MONTH': [4, 2, 1], 'DAY': [12, 4, 1]})
+    return RawData(df_results, df_competitions)
+
+
+
+def test_encode_dictionaries() -> None:
+    raw_data = create_raw_data()
+    assert not raw_data.encoded
+    encoded = raw_data.encode()
+    assert encoded.encoded
+    assert encoded.person_ids is not None and encoded.event_ids is not None and encoded.competition_ids is not None
+    assert list(encoded.person_ids) == ['person1', 'person2', 'person3']
+    assert list(encoded.event_ids) == ['333', '333bf']
+    assert list(encoded.competition_ids) == ['comp1', 'comp2', 'comp3']
+
+def test_encode_shared_competitions_dictionary() -> None:
+    encoded = create_raw_data().encode()
+    assert encoded.results['competitionId'].dtype == encoded.competitions['id'].dtype
+    assert list(encoded.results['personId'].cat.codes) == [1, 0, 1, 0, 2]
+
+def test_encode_keeps_values() -> None:
+    raw_data = create_raw_data()
+    encoded = raw_data.encode()
+    assert raw_data.results.equals(encoded.results.astype(object).astype({'best': 'int64'}))
+
+def test_encode_twice() -> None:
+    encoded = create_raw_data().encode()
+    assert encoded.encode() is encoded
+
+def test_filter_encoded_same_as_filter() -> None:
+    raw_data = create_raw_data()
+    df_expected = data_filter.filter(raw_data, EventId.E_333)
+    df_after = data_filter.filter(raw_data.encode(), EventId.E_333)
+    assert df_expected.equals(df_after.astype({'personId': object}))
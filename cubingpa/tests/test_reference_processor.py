@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+from datetime import datetime
+
+from cubingpa import data_filter, synthetic
+from cubingpa.events import EventId
+from cubingpa.reference_processor import ReferenceProcessor
+
+
+def create_filtered_results() -> pd.DataFrame:
+    rows = [('person1', 100.0, datetime(2010,1,1)), ('person1', 90.0, datetime(2010,1,11)),
+        ('person2', 95.0, datetime(2011,1,1)), ('person2', 50.0, datetime(2011,2,1)),
+        ('person3', 80.0, datetime(2012,1,1)), ('person3', 70.0, datetime(2012,3,1))]
+    return pd.DataFrame(rows, columns=['personId', 'best', 'date'])
+
+
+
+def test_person_cache_hit() -> None:
+    processor = ReferenceProcessor(create_filtered_results())
+    days, times = processor._get_person_curve('person2')
+    assert list(times) == [95.0, 50.0]
+    assert days[1] - days[0] == 31
+    assert processor._get_person_curve('person2')[0] is days
+
+def test_person_cache_evicts_least_recently_used() -> None:
+    processor = ReferenceProcessor(create_filtered_results(), person_cache_size=2)
+    person1_days, _ = processor._get_person_curve('person1')
+    processor._get_person_curve('person2')
+    processor._get_person_curve('person1')
+    processor._get_person_curve('person3')
+    assert list(processor._person_cache) == ['person1', 'person3']
+    assert processor._get_person_curve('person1')[0] is person1_days
+
+def test_person_cache_size_same_results() -> None:
+    filtered_results = data_filter.filter(synthetic.generate(300, seed=5), EventId.E_333)
+    df_expected = ReferenceProcessor(filtered_results).process()
+    processor = ReferenceProcessor(filtered_results, person_cache_size=3)
+    df_after = processor.process()
+    assert len(processor._person_cache) == 3
+    assert df_expected.equals(df_after)
+
+def test_workers_same_results() -> None:
+    filtered_results = data_filter.filter(synthetic.generate(2500, seed=7), EventId.E_333)
+    df_expected = ReferenceProcessor(filtered_results).process_average()
+    df_after = ReferenceProcessor(filtered_results, workers=2).process_average()
+    assert df_expected.equals(df_after)
+
+def test_process_after_preview_raises() -> None:
+    filtered_results = data_filter.filter(synthetic.generate(200, seed=5), EventId.E_333)
+    processor = ReferenceProcessor(filtered_results)
+    processor.process_preview(fraction=0.2)
+    persons_count = len(processor._maxtimes)
+    with pytest.raises(RuntimeError):
+        processor.process_preview(fraction=0.2)
+    with pytest.raises(RuntimeError):
+        processor.process_average()
+    # the sample is not taken again from the previous sample
+    assert len(processor._maxtimes) == persons_count
+
+def test_process_twice_raises() -> None:
+    processor = ReferenceProcessor(create_filtered_results())
+    processor.process()
+    with pytest.raises(RuntimeError):
+        processor.process_curves()
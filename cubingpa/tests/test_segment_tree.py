@@ -0,0 +1,33 @@
+from cubingpa.segment_tree import MinSegmentTree
+
+
+def create_tree() -> MinSegmentTree:
+    tree = MinSegmentTree()
+    for value in [50.0, 40.0, 45.0, 30.0, 35.0, 30.0]:
+        tree.append(value)
+    return tree
+
+
+
+def test_find_first_at_most() -> None:
+    tree = create_tree()
+    assert tree.find_first_at_most(0, 40.0) == 1
+    assert tree.find_first_at_most(2, 40.0) == 3
+    assert tree.find_first_at_most(4, 30.0) == 5
+    assert tree.find_first_at_most(0, 20.0) == -1
+    assert tree.find_first_at_most(6, 100.0) == -1
+
+def test_find_min_first_of_equals() -> None:
+    tree = create_tree()
+    assert tree.find_min(0) == 3
+    assert tree.find_min(4) == 5
+    assert tree.find_min(6) == -1
+
+def test_truncate() -> None:
+    tree = create_tree()
+    tree.truncate(3)
+    assert len(tree) == 3
+    assert tree.find_min(0) == 1
+    assert tree.find_first_at_most(0, 30.0) == -1
+    tree.append(20.0)
+    assert tree.find_min(0) == 3
@@ -0,0 +1,75 @@
+import pandas as pd
+from pathlib import Path
+
+from cubingpa import snapshot
+from cubingpa.raw_data import RawData
+
+
+def create_raw_data() -> RawData:
+    df_results = pd.DataFrame({'personId': ['person1', 'person2', 'person1'],
+        'eventId': pd.Categorical(['333', '333', '444']),
+        'best': [1500, -1, 9000], 'competitionId': ['comp1', 'comp1', 'comp2']})
+    df_competitions = pd.DataFrame({'id': ['comp1', 'comp2'], 'YEAR': [2011, 2012],
+        'MONTH': [4, 2], 'DAY': [12, 4]})
+    return RawData(df_results, df_competitions)
+
+
+
+def test_load_missing(tmp_path: Path) -> None:
+    assert snapshot.load(str(tmp_path)) is None
+
+def test_save_load_round_trip(tmp_path: Path) -> None:
+    raw_data = create_raw_data()
+    snapshot.save(raw_data, str(tmp_path), 'fingerprint')
+    loaded = snapshot.load(str(tmp_path), 'fingerprint')
+    assert loaded is not None
+    assert raw_data.results.equals(loaded.results)
+    assert raw_data.competitions.equals(loaded.competitions)
+
+def test_save_load_round_trip_encoded(tmp_path: Path) -> None:
+    raw_data = create_raw_data().encode()
+    snapshot.save(raw_data, str(tmp_path), 'fingerprint')
+    loaded = snapshot.load(str(tmp_path), 'fingerprint')
+    assert loaded is not None
+    assert loaded.encoded
+    assert loaded.person_ids is not None and loaded.person_ids.equals(raw_data.person_ids)
+    assert loaded.event_ids is not None and loaded.event_ids.equals(raw_data.event_ids)
+    assert loaded.competition_ids is not None and loaded.competition_ids.equals(raw_data.competition_ids)
+    assert loaded.encode() is loaded
+    assert raw_data.results.equals(loaded.results)
+    assert raw_data.competitions.equals(loaded.competitions)
+
+def test_save_load_round_trip_not_encoded(tmp_path: Path) -> None:
+    snapshot.save(create_raw_data(), str(tmp_path), 'fingerprint')
+    loaded = snapshot.load(str(tmp_path), 'fingerprint')
+    assert loaded is not None
+    assert not loaded.encoded
+
+def test_save_removes_previous_snapshot_files(tmp_path: Path) -> None:
+    raw_data = create_raw_data()
+    snapshot.save(RawData(raw_data.results.assign(extra=1), raw_data.competitions), str(tmp_path), 'fingerprint')
+    assert (tmp_path / 'results.extra.values.npy').exists()
+    (tmp_path / 'other.txt').write_text('kept')
+    snapshot.save(raw_data, str(tmp_path), 'fingerprint')
+    assert not (tmp_path / 'results.extra.values.npy').exists()
+    assert (tmp_path / 'other.txt').exists()
+    loaded = snapshot.load(str(tmp_path), 'fingerprint')
+    assert loaded is not None
+    assert raw_data.results.equals(loaded.results)
+
+def test_load_other_fingerprint(tmp_path: Path) -> None:
+    snapshot.save(create_raw_data(), str(tmp_path), 'fingerprint')
+    assert snapshot.load(str(tmp_path), 'other fingerprint') is None
+
+def test_load_or_create_refreshes_outdated(tmp_path: Path) -> None:
+    snapshot.save(create_raw_data(), str(tmp_path), 'old fingerprint')
+    loaded = snapshot.load_or_create(str(tmp_path), 'new fingerprint', create_raw_data)
+    assert len(loaded.results) == 3
+    assert snapshot.load(str(tmp_path), 'new fingerprint') is not None
+
+def test_load_or_create_uses_snapshot(tmp_path: Path) -> None:
+    snapshot.save(create_raw_data(), str(tmp_path), 'fingerprint')
+    def fail() -> RawData:
+        raise AssertionError("source should not be loaded")
+    loaded = snapshot.load_or_create(str(tmp_path), 'fingerprint', fail)
+    assert len(loaded.competitions) == 2
@@ -0,0 +1,25 @@
+from cubingpa import data_filter, synthetic
+from cubingpa.events import EventId
+from cubingpa.reference_processor import ReferenceProcessor
+
+
+
+def test_generate_layout() -> None:
+    raw_data = synthetic.generate(100, events=[EventId.E_333, EventId.E_444], competitions=50)
+    assert list(raw_data.results.columns) == ['personId', 'eventId', 'best', 'competitionId']
+    assert list(raw_data.competitions.columns) == ['id', 'YEAR', 'MONTH', 'DAY']
+    assert set(raw_data.results['eventId']) == {'333', '444'}
+    assert raw_data.results['competitionId'].isin(raw_data.competitions['id']).all()
+    assert not raw_data.results.duplicated(['personId', 'eventId', 'competitionId']).any()
+    assert (raw_data.results['best'] != 0).all()
+
+def test_generate_same_seed_same_data() -> None:
+    first = synthetic.generate(50, seed=1)
+    second = synthetic.generate(50, seed=1)
+    assert first.results.equals(second.results)
+    assert first.competitions.equals(second.competitions)
+
+def test_generate_processable() -> None:
+    raw_data = synthetic.generate(100)
+    average = ReferenceProcessor(data_filter.filter(raw_data, EventId.E_333)).process_average()
+    assert len(average) > 0
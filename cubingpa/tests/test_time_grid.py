@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cubingpa.time_grid import TimeGrid
+
+
+def day(date: str) -> int:
+    return int(np.datetime64(date, 'D').astype(np.int64))
+
+def dates(days: np.ndarray) -> list: # type: ignore
+    return [str(date) for date in days.astype('datetime64[D]')]
+
+
+
+def test_daily() -> None:
+    grid = TimeGrid()
+    assert grid.resolution == 'D'
+    assert grid.is_daily
+    assert list(grid.points(day('2019-01-01'), day('2019-01-04'))) == [day('2019-01-01'), day('2019-01-02'), day('2019-01-03')]
+    # slots are days
+    assert list(grid.slots(np.array([day('2019-01-01')]))) == [day('2019-01-01')]
+
+def test_weekly() -> None:
+    grid = TimeGrid('W')
+    assert grid.step == 7
+    assert dates(grid.points(day('2019-01-01'), day('2019-01-22'))) == ['2019-01-07', '2019-01-14', '2019-01-21']
+    # consecutive points have consecutive slots
+    slots = grid.slots(grid.points(day('2019-01-01'), day('2019-01-22')))
+    assert list(np.diff(slots)) == [1, 1]
+    assert list(grid.days(slots)) == list(grid.points(day('2019-01-01'), day('2019-01-22')))
+
+def test_monthly() -> None:
+    grid = TimeGrid('M')
+    assert grid.step is None
+    assert dates(grid.points(day('2019-01-01'), day('2019-03-02'))) == ['2019-01-01', '2019-02-01', '2019-03-01']
+    assert dates(grid.points(day('2019-01-02'), day('2019-03-01'))) == ['2019-02-01']
+    assert list(grid.dates(grid.slots(np.array([day('2019-02-15')])))) == [pd.Timestamp('2019-02-01')]
+
+def test_number_of_days() -> None:
+    assert TimeGrid(14).resolution == '14D'
+    assert TimeGrid('14D').step == 14
+    # anchored on 1970-01-01
+    assert all(point % 3 == 0 for point in TimeGrid(3).points(day('2019-01-01'), day('2019-02-01')))
+
+def test_empty_points() -> None:
+    assert len(TimeGrid('W').points(day('2019-01-01'), day('2019-01-07'))) == 0
+    assert len(TimeGrid().points(day('2019-01-01'), day('2019-01-01'))) == 0
+
+@pytest.mark.parametrize('resolution', ['Y', '0D', 0, -7, 'd'])
+def test_invalid_resolution(resolution: object) -> None:
+    with pytest.raises(ValueError):
+        TimeGrid(resolution) # type: ignore
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 from cubingpa import utils
@@ -57,6 +58,37 @@ def test_remove_not_progressing_solves_not_default_column() -> None:
     assert df_expected.equals(df_after)
 
 
+def test_remove_not_progressing_solves_one_row() -> None:
+    df_before = pd.DataFrame({'best': [50]}, index=[0])
+    df_expected = df_before
+    df_after = utils.remove_not_progressing_solves(df_before)
+    assert df_expected.equals(df_after)
+
+
+
+def test_remove_not_progressing_solves_grouped_mixed() -> None:
+    df_before = pd.DataFrame({'personId': ['person1', 'person1', 'person1', 'person2', 'person2', 'person2'],
+        'best': [50, 60, 40, 45, 30, 30]}, index=[0,1,2,3,4,5])
+    df_expected = pd.DataFrame({'personId': ['person1', 'person1', 'person2', 'person2'],
+        'best': [50, 40, 45, 30]}, index=[0,2,3,4])
+    df_after = utils.remove_not_progressing_solves_grouped(df_before, 'personId', 'best')
+    assert df_expected.equals(df_after)
+
+def test_remove_not_progressing_solves_grouped_higher_than_other_group() -> None:
+    df_before = pd.DataFrame({'personId': ['person1', 'person1', 'person2', 'person2'],
+        'best': [50, 20, 45, 40]}, index=[0,1,2,3])
+    df_expected = df_before
+    df_after = utils.remove_not_progressing_solves_grouped(df_before, 'personId', 'best')
+    assert df_expected.equals(df_after)
+
+def test_remove_not_progressing_solves_grouped_same_as_per_group() -> None:
+    df_before = pd.DataFrame({'personId': ['person1'] * 8 + ['person2'] * 4,
+        'best': [50, 60, 60, 50, 45, 45, 70, 45, 50, 45, 40, 50]}, index=range(12))
+    df_expected = pd.concat([utils.remove_not_progressing_solves(group, column_number=1)
+        for _, group in df_before.groupby('personId')])
+    df_after = utils.remove_not_progressing_solves_grouped(df_before, 'personId', 'best')
+    assert df_expected.equals(df_after)
+
 
 def test_interpolate_dates_interpolate_once() -> None:
     df_before = pd.DataFrame({'best': [50.0, 40.0, 30.0]}, index=pd.to_datetime(['01/01/2019','01/05/2019','01/06/2019']))
@@ -90,3 +122,30 @@ def test_convert_date_index_to_timedelta_one_day() -> None:
     df_after = utils.convert_date_index_to_timedelta(df_before)
     assert df_expected.equals(df_after)
 
+
+def test_interpolate_dates_weekly() -> None:
+    df_before = pd.DataFrame({'best': [50.0, 30.0]}, index=pd.to_datetime(['01/01/2019','01/21/2019']))
+    df_expected = pd.DataFrame({'best': [44.0, 37.0, 30.0]}, index=pd.to_datetime(['01/07/2019','01/14/2019','01/21/2019'])).astype(float)
+    df_after = utils.interpolate_dates(df_before, 'W')
+    assert np.allclose(df_expected['best'], df_after['best'])
+    assert df_expected.index.equals(df_after.index)
+
+def test_convert_date_index_to_timedelta_weekly() -> None:
+    df_before = pd.DataFrame({'best': [50.0, 40.0]}, index=pd.to_datetime(['01/07/2019','01/14/2019']))
+    df_after = utils.convert_date_index_to_timedelta(df_before, 'W')
+    assert list(df_after.index) == [pd.Timedelta(days=0), pd.Timedelta(days=7)]
+
+def test_convert_date_index_to_timedelta_monthly() -> None:
+    df_before = pd.DataFrame({'best': [50.0, 40.0, 30.0]}, index=pd.to_datetime(['01/01/2019','02/01/2019','03/01/2019']))
+    df_after = utils.convert_date_index_to_timedelta(df_before, 'M')
+    assert list(df_after.index) == [pd.Timedelta(days=0), pd.Timedelta(days=31), pd.Timedelta(days=59)]
+
+def test_concat_chunks_generator() -> None:
+    chunks = [pd.DataFrame({'id': pd.Categorical(['b', 'c', None]), 'best': np.array([1, 2, 3], dtype=np.int32)}),
+        pd.DataFrame({'id': pd.Categorical(['a', 'b']), 'best': np.array([4, 5], dtype=np.int32)})]
+    df_after = utils.concat_chunks((chunk for chunk in chunks), ['id', 'best'])
+    assert list(df_after['id'].cat.categories) == ['a', 'b', 'c']
+    assert list(df_after['id'].astype(object).fillna('')) == ['b', 'c', '', 'a', 'b']
+    assert df_after['best'].dtype == 'int32'
+    assert list(df_after['best']) == [1, 2, 3, 4, 5]
+    assert list(utils.concat_chunks(iter([]), ['id', 'best']).columns) == ['id', 'best']
@@ -0,0 +1,114 @@
+import re
+import numpy as np
+import pandas as pd
+from numpy.typing import NDArray
+from typing import Optional, Union
+
+
+# 'D' (daily), 'W' (weekly), 'M' (monthly), 'nD' or n: every n days
+Resolution = Union[str, int]
+
+# 1970-01-05, first Monday after 1970-01-01
+_FIRST_MONDAY = 4
+
+
+class TimeGrid:
+    """
+    Days on which curves are evaluated, at a given resolution.
+
+    Points of the grid are fixed, whatever the curves: every day, every Monday for a weekly
+    resolution, the first day of each month for a monthly resolution, or every n days from 1970-01-01.
+    Curves evaluated on the same grid thus share the same points, and a coarser grid simply skips days
+    of the daily one (values at its points are the daily values).
+
+    Each point has a slot: its number in the grid, consecutive points having consecutive slots.
+    On the daily grid, slots are days (number of days since 1970-01-01).
+
+    Parameters
+    ----------
+    resolution: Resolution, optional
+        'D' for daily, 'W' for weekly, 'M' for monthly, or a number of days (ex: 14 or '14D'). Default: 'D'
+    """
+
+    def __init__(self, resolution: Resolution = 'D') -> None:
+        # days between points, None for a monthly grid
+        self._step = _parse(resolution) # type: Optional[int]
+        self._origin = _FIRST_MONDAY if resolution == 'W' else 0
+
+    @property
+    def resolution(self) -> str:
+        """
+        Normalized resolution: 'D', 'W', 'M' or 'nD'
+        """
+        if self._step is None:
+            return 'M'
+        if self._step == 1:
+            return 'D'
+        if self._step == 7 and self._origin == _FIRST_MONDAY:
+            return 'W'
+        return f'{self._step}D'
+
+    @property
+    def step(self) -> Optional[int]:
+        """
+        Number of days between two points, None for a monthly grid
+        """
+        return self._step
+
+    @property
+    def is_daily(self) -> bool:
+        return self._step == 1
+
+    def points(self, start_day: int, end_day: int) -> NDArray[np.int64]:
+        """
+        Days of the points from start_day (included) to end_day (excluded), in number of days since 1970-01-01
+        """
+        if end_day <= start_day:
+            return np.zeros(0, dtype=np.int64)
+
+        first_slot = int(self.slots(np.array([start_day - 1]))[0]) + 1
+        last_slot = int(self.slots(np.array([end_day - 1]))[0])
+
+        return self.days(np.arange(first_slot, last_slot + 1, dtype=np.int64))
+
+    def slots(self, days: NDArray[np.int64]) -> NDArray[np.int64]:
+        """
+        Slot of the last point on or before each day
+        """
+        if self._step is None:
+            return np.asarray(days).astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+
+        return (np.asarray(days, dtype=np.int64) - self._origin) // self._step
+
+    def days(self, slots: NDArray[np.int64]) -> NDArray[np.int64]:
+        """
+        Day of each slot, in number of days since 1970-01-01
+        """
+        if self._step is None:
+            return np.asarray(slots).astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)
+
+        return self._origin + np.asarray(slots, dtype=np.int64) * self._step
+
+    def dates(self, slots: NDArray[np.int64]) -> pd.DatetimeIndex:
+        """
+        Date of each slot
+        """
+        return pd.DatetimeIndex(self.days(slots).astype('datetime64[D]'))
+
+
+def _parse(resolution: Resolution) -> Optional[int]:
+    if isinstance(resolution, (int, np.integer)) and not isinstance(resolution, bool) and resolution > 0:
+        return int(resolution)
+
+    if resolution == 'D':
+        return 1
+    if resolution == 'W':
+        return 7
+    if resolution == 'M':
+        return None
+
+    match = re.fullmatch(r'([0-9]+)D', resolution) if isinstance(resolution, str) else None
+    if match is not None and int(match.group(1)) > 0:
+        return int(match.group(1))
+
+    raise ValueError(f"Invalid resolution: {resolution}")
@@ -1,7 +1,11 @@
+import numpy as np
 import pandas as pd
 from pandas import DataFrame
 from datetime import datetime
-from typing import List, NamedTuple
+from numpy.typing import NDArray
+from typing import Any, Dict, Iterable, List, NamedTuple
+
+from cubingpa.time_grid import TimeGrid, Resolution
 
 
 def remove_not_progressing_solves(dataframe: DataFrame, column_number: int = 0) -> DataFrame:
@@ -21,59 +25,192 @@ def remove_not_progressing_solves(dataframe: DataFrame, column_number: int = 0)
     Dataframe with progressing solves results only
     """
     
-    rows_to_drop = []
-    
-    previous_time = dataframe.iloc[0, column_number]
+    values = dataframe.iloc[:, column_number].to_numpy()
 
-    for row in dataframe[1:len(dataframe)].itertuples():
-        # index is counted as a column in a row
-        current_time = row[column_number + 1]
-        if current_time >= previous_time:
-            rows_to_drop.append(row.Index)
-        else:
-            # update previous_time only if current row is not to be removed
-            previous_time = current_time
-                
-    return dataframe.drop(rows_to_drop)
+    return dataframe[progressing_mask(values)]
+
+
+def remove_not_progressing_solves_grouped(dataframe: DataFrame, group_column: str, value_column: str) -> DataFrame:
+    """
+    Same as remove_not_progressing_solves, for all the groups of a dataframe at once
+    (usually results of every person, sorted by person then by ascending date)
+
+    Parameters
+    ----------
+    dataframe: Dataframe
+        Dataframe having a group column and a column containing solve results
+    group_column: str
+        Name of the column identifying groups (ex: personId). Each group is considered separately
+    value_column: str
+        Name of the column containing solve results
+
+    Returns
+    -------
+    Dataframe with progressing solves results only, within each group
+    """
+    groups = dataframe[group_column]
+    values = dataframe[value_column]
+
+    # a solve is progressing if it is strictly lower than every previous solve of its group
+    running_min = values.groupby(groups, sort=False, observed=True).cummin()
+    previous_min = running_min.groupby(groups, sort=False, observed=True).shift(1)
+
+    return dataframe[previous_min.isna().to_numpy() | (values < previous_min).to_numpy()]
 
 
-def interpolate_dates(dataframe: DataFrame) -> DataFrame:
+def progressing_mask(values: NDArray[Any]) -> NDArray[np.bool_]:
+    """
+    Considering solve results (usually sorted by ascending date), tell which ones make progress over
+    all the previous ones
+
+    Parameters
+    ----------
+    values: ndarray
+        Solve results
+
+    Returns
+    -------
+    Boolean ndarray, True for progressing solves. First solve is always progressing
+    """
+    mask = np.ones(len(values), dtype=bool)
+
+    if len(values) > 1:
+        # strictly lower than the running minimum of the previous solves
+        mask[1:] = values[1:] < np.minimum.accumulate(values[:-1])
+
+    return mask
+
+
+def interpolate_dates(dataframe: DataFrame, resolution: Resolution = 'D') -> DataFrame:
     """
     Considering a dataframe with dates as an index and numerical columns, sorted in ascending date order,
-    build a 1-day frequency dataframe by interpolating missing data
+    build a 1-day frequency dataframe by interpolating missing data.
+    With a coarser resolution, only the points of the matching time grid are kept (see cubingpa.time_grid.TimeGrid),
+    values being interpolated in time from the surrounding data
 
     Parameters
     ----------
     dataframe: Dataframe
         Dataframe with dates as an index and numerical columns, sorted in ascending date order
+    resolution: Resolution, optional
+        'D' (every day), 'W' (every Monday), 'M' (first day of each month) or a number of days. Default: 'D'
 
     Returns
     -------
-    Dataframe with a 1-day frequency
+    Dataframe with a 1-day frequency, or with the points of the resolution
     """
 
     start_date = dataframe.index[0]
     end_date = dataframe.index[dataframe.index.size-1]
-    
-    full_dates = pd.date_range(start=start_date, end=end_date, freq='D')
-    full_index = dataframe.index | pd.Index(full_dates)
-    
-    return dataframe.reindex(full_index).interpolate()
 
+    grid = TimeGrid(resolution)
+
+    if grid.is_daily:
+        full_dates = pd.date_range(start=start_date, end=end_date, freq='D')
+        full_index = dataframe.index | pd.Index(full_dates)
+
+        return dataframe.reindex(full_index).interpolate()
 
-def convert_date_index_to_timedelta(dataframe: DataFrame) -> DataFrame:
+    start_day, end_day = dates_to_days(np.array([start_date, end_date], dtype='datetime64[ns]'))
+    grid_dates = grid.dates(grid.slots(grid.points(int(start_day), int(end_day) + 1)))
+    full_index = dataframe.index.union(grid_dates)
+
+    return dataframe.reindex(full_index).interpolate(method='time').reindex(grid_dates)
+
+
+def dates_to_days(dates: NDArray[Any]) -> NDArray[np.int64]:
+    """
+    Convert datetime64 dates to numbers of days since 1970-01-01
+
+    Parameters
+    ----------
+    dates: ndarray
+        datetime64 dates, without time of day
+
+    Returns
+    -------
+    ndarray of integers
+    """
+    return np.asarray(dates).astype('datetime64[D]').astype(np.int64)
+
+
+def convert_date_index_to_timedelta(dataframe: DataFrame, resolution: Resolution = 'D') -> DataFrame:
     """
-    Considering a dataframe with dates as an index, sorted in ascending date order, with a 1-day frequency,
-    convert the date index to a timedelta index in days
+    Considering a dataframe with dates as an index, sorted in ascending date order, with a 1-day frequency
+    (or the given resolution, as returned by interpolate_dates), convert the date index to a timedelta index in days
 
     Parameters
     ----------
     dataframe: Dataframe
         Dataframe with dates as an index, sorted in ascending date order, with a 1-day frequency
+    resolution: Resolution, optional
+        Resolution of the dates, see interpolate_dates(). Default: 'D'
 
     Returns
     -------
-    Dataframe with a 1-day timedelta index
+    Dataframe with a timedelta index, from 0 days by steps of the resolution
     """
-    timedelta_index = pd.timedelta_range(start='0 days', periods=len(dataframe.index), freq='D')
+    step = TimeGrid(resolution).step
+
+    if step is None:
+        # months have different lengths
+        timedelta_index = pd.TimedeltaIndex(dataframe.index - dataframe.index[0])
+    else:
+        timedelta_index = pd.timedelta_range(start='0 days', periods=len(dataframe.index), freq=f'{step}D')
+
     return dataframe.set_index(timedelta_index)
+
+
+def concat_chunks(chunks: Iterable[DataFrame], columns: List[str]) -> DataFrame:
+    """
+    Concatenate dataframes read in chunks, keeping categorical columns categorical
+    (pd.concat falls back to object columns when categories differ between chunks).
+
+    Chunks are consumed one at a time: only their columns values are kept, categorical values as
+    codes of categories growing with each chunk. Given a generator, memory is thus bounded by the
+    compact columns plus one chunk. Categories of the result are sorted, as RawData.encode() sorts them
+
+    Parameters
+    ----------
+    chunks: Iterable[Dataframe]
+        Dataframes having the same columns, possibly a generator
+    columns: List[str]
+        Columns of the resulting dataframe, used as is if there is no chunk
+
+    Returns
+    -------
+    Dataframe with a new range index
+    """
+    parts = {column: [] for column in columns} # type: Dict[str, List[NDArray[Any]]]
+    # code of each category, by categorical column
+    categories = {} # type: Dict[str, Dict[Any, int]]
+    dtypes = {} # type: Dict[str, Any]
+
+    for chunk in chunks:
+        for column in columns:
+            values = chunk[column]
+
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                codes = categories.setdefault(column, {})
+                # codes of the chunk categories, then -1 for missing values
+                chunk_codes = np.array([codes.setdefault(category, len(codes)) for category in values.cat.categories] + [-1],
+                    dtype=np.int32)
+                parts[column].append(chunk_codes[values.cat.codes.to_numpy()])
+            else:
+                parts[column].append(values.to_numpy())
+                dtypes[column] = values.dtype
+
+    if len(parts[columns[0]]) == 0:
+        return pd.DataFrame(columns=columns)
+
+    data = {}
+    for column in columns:
+        if column in categories:
+            column_categories = pd.Index(list(categories[column]))
+            order = column_categories.argsort()
+            ranks = np.append(np.argsort(order), -1).astype(np.int32)
+            data[column] = pd.Series(pd.Categorical.from_codes(ranks[np.concatenate(parts[column])], categories=column_categories[order]))
+        else:
+            data[column] = pd.Series(np.concatenate(parts[column]), dtype=dtypes[column])
+
+    return pd.DataFrame(data)